@@ -1,4 +1,11 @@
+import asyncio
+import functools
+import json
+import logging
 import os
+import re
+import sys
+import threading
 import uuid
 from pathlib import Path
 from typing import List
@@ -11,7 +18,12 @@ os.environ['TTS_HOME'] = str(MODELS_DIR)
 # Автоматически соглашаемся с лицензией Coqui TTS
 os.environ['COQUI_TOS_AGREED'] = '1'
 
-# Проверяем совместимость зависимостей
+# Логирование через очередь с id запроса (TTS_LOG_LEVEL, TTS_LOG_FORMAT)
+from services.log import configure_logging, new_request_id, request_id_var  # noqa
+configure_logging()
+logger = logging.getLogger(__name__)
+
+# Проверяем совместимость зависимостей (в фоне после запуска: импорт transformers занимает секунды)
 def check_dependencies():
     """Проверяет совместимость зависимостей"""
     try:
@@ -22,802 +34,289 @@ def check_dependencies():
         major, minor = int(version_parts[0]), int(version_parts[1])
         
         if major > 4 or (major == 4 and minor >= 40):
-            print("⚠️ ВНИМАНИЕ: Обнаружена несовместимая версия transformers")
-            print(f"📋 Текущая версия: {transformers_version}")
-            print("💡 Рекомендуется: transformers==4.35.2")
-            print("🔧 Запустите: python fix_dependencies.py")
+            logger.warning(
+                'ВНИМАНИЕ: Обнаружена несовместимая версия transformers %s. '
+                'Рекомендуется: transformers==4.35.2, запустите: python fix_dependencies.py',
+                transformers_version
+            )
             
     except ImportError:
-        print("⚠️ Transformers не установлен")
+        logger.warning('Transformers не установлен')
     except Exception as e:
-        print(f"⚠️ Ошибка проверки зависимостей: {e}")
-
-# Проверяем зависимости при запуске
-check_dependencies()
+        logger.warning('Ошибка проверки зависимостей: %s', e)
 
 from fastapi import FastAPI, Request, Form, HTTPException, UploadFile, File
-from fastapi.responses import HTMLResponse
+from fastapi.responses import HTMLResponse, JSONResponse, Response, StreamingResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
 
-from services.tts import generate_audio
+from services.batching import BatchScheduler, BATCH_ENABLED, BATCH_MAX_SIZE, BATCH_MAX_WAIT_MS, BATCH_MAX_CHARS
+from services.bulk import group_rows, manifest_kind, parse_manifest, run_bulk
+from services.catalog import model_catalog
+from services.config import env_bool, env_int
+from services.delivery import (
+    etag_cache, etag_matches, media_type, parse_range, precompress, precompressed_variant, read_file,
+    resolve_audio_path, RangeNotSatisfiable, IMMUTABLE_CACHE_CONTROL
+)
+from services.downloads import download_manager, PREFETCH_MODELS
+from services.encoding import (
+    encode_file, output_extension, prepare_reference, resolve_format, synthesis_path, OUTPUT_FORMATS
+)
+from services.executor import synthesis_executor, QueueFullError, ExecutorClosedError
+from services.jobs import JobManager, create_job_store, FINISHED_STATES
+from services.metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, ERRORS, REQUESTS, registry, stage_timer
+from services.model_index import model_index
+from services.retention import BULK_DIR, output_store
+from services.tts import (
+    generate_audio, generate_audio_batch, gpu_available, gpu_checked, import_backend, stream_audio, preload_model, warm_up
+)
+from services.voices import voice_registry
+from services.warmup import Warmup, PRELOAD_MODELS, WARMUP_RUNS
+from services.workers import prepare_shared_models
 
 app = FastAPI(title='TTS Generator')
 
 # Настройка шаблонов
 templates = Jinja2Templates(directory='templates')
 
+# Создаем папку output если её нет (до подключения статических файлов)
+os.makedirs('output', exist_ok=True)
+
 # Настройка статических файлов
 app.mount("/output", StaticFiles(directory="output"), name="output")
 
-# Создаем папку output если её нет
-os.makedirs('output', exist_ok=True)
-
 # Создаем папку для загруженных файлов
 UPLOAD_DIR = Path('uploads')
 UPLOAD_DIR.mkdir(exist_ok=True)
 
-# Доступные модели TTS с подробными описаниями
-AVAILABLE_MODELS = {
-    '🌍 Многоязычные модели с клонированием голоса': [
-        {
-            'id': 'tts_models/multilingual/multi-dataset/xtts_v2',
-            'name': 'XTTS v2 Multilingual',
-            'description': 'XTTS-v2.0.3 by Coqui с поддержкой 17 языков и клонированием голоса',
-            'language': 'multilingual',
-            'gender': 'mixed',
-            'quality': 'high',
-            'voice_cloning': True,
-            'speakers': True,
-            'default_speakers': ['female', 'male'],
-            'supported_languages': ['en', 'es', 'fr', 'de', 'it', 'pt', 'pl', 'tr', 'ru', 'nl', 'cs', 'ar', 'zh-cn', 'ja', 'hu', 'ko', 'hi']
-        },
-        {
-            'id': 'tts_models/multilingual/multi-dataset/xtts_v1.1',
-            'name': 'XTTS v1.1 Multilingual',
-            'description': 'XTTS-v1.1 с поддержкой 14 языков и клонированием голоса',
-            'language': 'multilingual',
-            'gender': 'mixed',
-            'quality': 'high',
-            'voice_cloning': True,
-            'speakers': True,
-            'default_speakers': ['female', 'male']
-        },
-        {
-            'id': 'tts_models/multilingual/multi-dataset/your_tts',
-            'name': 'YourTTS Multilingual',
-            'description': 'Your TTS модель с клонированием голоса и поддержкой множества языков',
-            'language': 'multilingual',
-            'gender': 'mixed',
-            'quality': 'high',
-            'voice_cloning': True,
-            'speakers': True,
-            'supported_languages': ['en', 'fr-fr', 'pt-br']
-        },
-        {
-            'id': 'tts_models/multilingual/multi-dataset/bark',
-            'name': 'Bark Multilingual',
-            'description': '🐶 Bark TTS модель с эмоциями и клонированием голоса',
-            'language': 'multilingual',
-            'gender': 'mixed',
-            'quality': 'high',
-            'voice_cloning': True,
-            'speakers': True
-        }
-    ],
-    '🇷🇺 Русские модели': [
-        {
-            'id': 'tts_models/multilingual/multi-dataset/xtts_v2',
-            'name': 'XTTS v2 (Русский)',
-            'description': 'XTTS-v2.0.3 с поддержкой русского языка и клонированием голоса',
-            'language': 'ru',
-            'gender': 'mixed',
-            'quality': 'high',
-            'voice_cloning': True,
-            'speakers': True,
-            'default_speakers': ['female', 'male'],
-            'supported_languages': ['ru']
-        }
-    ],
-    '🇺🇸 Английские модели': [
-        {
-            'id': 'tts_models/en/ljspeech/tacotron2-DDC',
-            'name': 'LJSpeech Tacotron2-DDC',
-            'description': 'Tacotron2 с Double Decoder Consistency - высококачественная английская речь',
-            'language': 'en',
-            'gender': 'mixed',
-            'quality': 'high',
-            'voice_cloning': False,
-            'speakers': False
-        },
-        {
-            'id': 'tts_models/en/ljspeech/tacotron2-DDC_ph',
-            'name': 'LJSpeech Tacotron2-DDC Phonemes',
-            'description': 'Tacotron2 с Double Decoder Consistency и фонемами',
-            'language': 'en',
-            'gender': 'mixed',
-            'quality': 'high',
-            'voice_cloning': False,
-            'speakers': False
-        },
-        {
-            'id': 'tts_models/en/ljspeech/glow-tts',
-            'name': 'LJSpeech Glow-TTS',
-            'description': 'Glow-TTS модель с контролем темпа речи',
-            'language': 'en',
-            'gender': 'mixed',
-            'quality': 'high',
-            'voice_cloning': False,
-            'speakers': False
-        },
-        {
-            'id': 'tts_models/en/ljspeech/speedy-speech',
-            'name': 'LJSpeech Speedy Speech',
-            'description': 'Speedy Speech с Alignment Network для изучения длительностей',
-            'language': 'en',
-            'gender': 'mixed',
-            'quality': 'medium',
-            'voice_cloning': False,
-            'speakers': False
-        },
-        {
-            'id': 'tts_models/en/ljspeech/tacotron2-DCA',
-            'name': 'LJSpeech Tacotron2-DCA',
-            'description': 'Tacotron2 с Double Decoder Consistency',
-            'language': 'en',
-            'gender': 'mixed',
-            'quality': 'high',
-            'voice_cloning': False,
-            'speakers': False
-        },
-        {
-            'id': 'tts_models/en/ljspeech/vits',
-            'name': 'LJSpeech VITS',
-            'description': 'VITS End2End TTS модель с фонемами',
-            'language': 'en',
-            'gender': 'mixed',
-            'quality': 'high',
-            'voice_cloning': False,
-            'speakers': False
-        },
-        {
-            'id': 'tts_models/en/ljspeech/fast_pitch',
-            'name': 'LJSpeech FastPitch',
-            'description': 'FastPitch модель с Aligner Network',
-            'language': 'en',
-            'gender': 'mixed',
-            'quality': 'medium',
-            'voice_cloning': False,
-            'speakers': False
-        },
-        {
-            'id': 'tts_models/en/ljspeech/overflow',
-            'name': 'LJSpeech Overflow',
-            'description': 'Overflow модель, обученная на LJSpeech',
-            'language': 'en',
-            'gender': 'mixed',
-            'quality': 'high',
-            'voice_cloning': False,
-            'speakers': False
-        },
-        {
-            'id': 'tts_models/en/ljspeech/neural_hmm',
-            'name': 'LJSpeech Neural HMM',
-            'description': 'Neural HMM модель, обученная на LJSpeech',
-            'language': 'en',
-            'gender': 'mixed',
-            'quality': 'high',
-            'voice_cloning': False,
-            'speakers': False
-        },
-        {
-            'id': 'tts_models/en/vctk/vits',
-            'name': 'VCTK VITS',
-            'description': 'VITS модель с 109 различными спикерами с английским акцентом',
-            'language': 'en',
-            'gender': 'mixed',
-            'quality': 'high',
-            'voice_cloning': False,
-            'speakers': True
-        },
-        {
-            'id': 'tts_models/en/vctk/fast_pitch',
-            'name': 'VCTK FastPitch',
-            'description': 'FastPitch модель, обученная на VCTK датасете',
-            'language': 'en',
-            'gender': 'mixed',
-            'quality': 'medium',
-            'voice_cloning': False,
-            'speakers': True
-        },
-        {
-            'id': 'tts_models/en/sam/tacotron-DDC',
-            'name': 'Sam Tacotron-DDC',
-            'description': 'Tacotron2 с Double Decoder Consistency, обученная на Sam датасете',
-            'language': 'en',
-            'gender': 'mixed',
-            'quality': 'high',
-            'voice_cloning': False,
-            'speakers': False
-        },
-        {
-            'id': 'tts_models/en/blizzard2013/capacitron-t2-c50',
-            'name': 'Blizzard2013 Capacitron-T2-C50',
-            'description': 'Capacitron добавления к Tacotron 2 с Capacity 50',
-            'language': 'en',
-            'gender': 'mixed',
-            'quality': 'high',
-            'voice_cloning': False,
-            'speakers': False
-        },
-        {
-            'id': 'tts_models/en/blizzard2013/capacitron-t2-c150_v2',
-            'name': 'Blizzard2013 Capacitron-T2-C150 v2',
-            'description': 'Capacitron добавления к Tacotron 2 с Capacity 150',
-            'language': 'en',
-            'gender': 'mixed',
-            'quality': 'high',
-            'voice_cloning': False,
-            'speakers': False
-        },
-        {
-            'id': 'tts_models/en/multi-dataset/tortoise-v2',
-            'name': 'Tortoise v2',
-            'description': 'Tortoise TTS модель с высоким качеством',
-            'language': 'en',
-            'gender': 'mixed',
-            'quality': 'high',
-            'voice_cloning': False,
-            'speakers': False
-        },
-        {
-            'id': 'tts_models/en/jenny/jenny',
-            'name': 'Jenny VITS',
-            'description': 'VITS модель, обученная на Jenny(Dioco) датасете',
-            'language': 'en',
-            'gender': 'female',
-            'quality': 'high',
-            'voice_cloning': False,
-            'speakers': False
-        },
-        {
-            'id': 'tts_models/en/ek1/tacotron2',
-            'name': 'EK1 Tacotron2',
-            'description': 'EK1 en-rp tacotron2 by NMStoker',
-            'language': 'en',
-            'gender': 'mixed',
-            'quality': 'high',
-            'voice_cloning': False,
-            'speakers': False
-        }
-    ],
-    '🇩🇪 Немецкие модели': [
-        {
-            'id': 'tts_models/de/thorsten/tacotron2-DDC',
-            'name': 'Thorsten Tacotron2-DDC',
-            'description': 'Thorsten-Dec2021-22k-DDC - высококачественная немецкая речь',
-            'language': 'de',
-            'gender': 'mixed',
-            'quality': 'high',
-            'voice_cloning': False,
-            'speakers': False
-        },
-        {
-            'id': 'tts_models/de/thorsten/tacotron2-DCA',
-            'name': 'Thorsten Tacotron2-DCA',
-            'description': 'Tacotron2 с Double Decoder Consistency для немецкого языка',
-            'language': 'de',
-            'gender': 'mixed',
-            'quality': 'high',
-            'voice_cloning': False,
-            'speakers': False
-        },
-        {
-            'id': 'tts_models/de/thorsten/vits',
-            'name': 'Thorsten VITS',
-            'description': 'VITS модель для немецкого языка',
-            'language': 'de',
-            'gender': 'mixed',
-            'quality': 'high',
-            'voice_cloning': False,
-            'speakers': False
-        },
-        {
-            'id': 'tts_models/de/css10/vits-neon',
-            'name': 'German CSS10 VITS-Neon',
-            'description': 'VITS-Neon модель для немецкого языка',
-            'language': 'de',
-            'gender': 'mixed',
-            'quality': 'high',
-            'voice_cloning': False,
-            'speakers': False
-        }
-    ],
-    '🇫🇷 Французские модели': [
-        {
-            'id': 'tts_models/fr/mai/tacotron2-DDC',
-            'name': 'MAI French Tacotron2-DDC',
-            'description': 'Tacotron2 с Double Decoder Consistency для французского языка',
-            'language': 'fr',
-            'gender': 'mixed',
-            'quality': 'high',
-            'voice_cloning': False,
-            'speakers': False
-        },
-        {
-            'id': 'tts_models/fr/css10/vits',
-            'name': 'French CSS10 VITS',
-            'description': 'VITS модель для французского языка',
-            'language': 'fr',
-            'gender': 'mixed',
-            'quality': 'high',
-            'voice_cloning': False,
-            'speakers': False
-        }
-    ],
-    '🇪🇸 Испанские модели': [
-        {
-            'id': 'tts_models/es/mai/tacotron2-DDC',
-            'name': 'MAI Spanish Tacotron2-DDC',
-            'description': 'Tacotron2 с Double Decoder Consistency для испанского языка',
-            'language': 'es',
-            'gender': 'mixed',
-            'quality': 'high',
-            'voice_cloning': False,
-            'speakers': False
-        },
-        {
-            'id': 'tts_models/es/css10/vits',
-            'name': 'Spanish CSS10 VITS',
-            'description': 'VITS модель для испанского языка',
-            'language': 'es',
-            'gender': 'mixed',
-            'quality': 'high',
-            'voice_cloning': False,
-            'speakers': False
-        }
-    ],
-    '🇮🇹 Итальянские модели': [
-        {
-            'id': 'tts_models/it/mai_female/glow-tts',
-            'name': 'MAI Italian Female Glow-TTS',
-            'description': 'GlowTTS модель для итальянского языка (женский голос)',
-            'language': 'it',
-            'gender': 'female',
-            'quality': 'high',
-            'voice_cloning': False,
-            'speakers': False
-        },
-        {
-            'id': 'tts_models/it/mai_female/vits',
-            'name': 'MAI Italian Female VITS',
-            'description': 'VITS модель для итальянского языка (женский голос)',
-            'language': 'it',
-            'gender': 'female',
-            'quality': 'high',
-            'voice_cloning': False,
-            'speakers': False
-        },
-        {
-            'id': 'tts_models/it/mai_male/glow-tts',
-            'name': 'MAI Italian Male Glow-TTS',
-            'description': 'GlowTTS модель для итальянского языка (мужской голос)',
-            'language': 'it',
-            'gender': 'male',
-            'quality': 'high',
-            'voice_cloning': False,
-            'speakers': False
-        },
-        {
-            'id': 'tts_models/it/mai_male/vits',
-            'name': 'MAI Italian Male VITS',
-            'description': 'VITS модель для итальянского языка (мужской голос)',
-            'language': 'it',
-            'gender': 'male',
-            'quality': 'high',
-            'voice_cloning': False,
-            'speakers': False
-        }
-    ],
-    '🇯🇵 Японские модели': [
-        {
-            'id': 'tts_models/ja/kokoro/tacotron2-DDC',
-            'name': 'Japanese Kokoro Tacotron2-DDC',
-            'description': 'Tacotron2 с Double Decoder Consistency, обученная на Kokoro Speech Dataset',
-            'language': 'ja',
-            'gender': 'mixed',
-            'quality': 'high',
-            'voice_cloning': False,
-            'speakers': False
-        }
-    ],
-    '🇨🇳 Китайские модели': [
-        {
-            'id': 'tts_models/zh-CN/baker/tacotron2-DDC-GST',
-            'name': 'Chinese Baker Tacotron2-DDC-GST',
-            'description': 'Tacotron2 с Double Decoder Consistency и GST для китайского языка',
-            'language': 'zh',
-            'gender': 'mixed',
-            'quality': 'high',
-            'voice_cloning': False,
-            'speakers': False
-        }
-    ],
-    '🇳🇱 Голландские модели': [
-        {
-            'id': 'tts_models/nl/mai/tacotron2-DDC',
-            'name': 'MAI Dutch Tacotron2-DDC',
-            'description': 'Tacotron2 с Double Decoder Consistency для голландского языка',
-            'language': 'nl',
-            'gender': 'mixed',
-            'quality': 'high',
-            'voice_cloning': False,
-            'speakers': False
-        },
-        {
-            'id': 'tts_models/nl/css10/vits',
-            'name': 'Dutch CSS10 VITS',
-            'description': 'VITS модель для голландского языка',
-            'language': 'nl',
-            'gender': 'mixed',
-            'quality': 'high',
-            'voice_cloning': False,
-            'speakers': False
-        }
-    ],
-    '🇺🇦 Украинские модели': [
-        {
-            'id': 'tts_models/uk/mai/glow-tts',
-            'name': 'MAI Ukrainian Glow-TTS',
-            'description': 'GlowTTS модель для украинского языка',
-            'language': 'uk',
-            'gender': 'mixed',
-            'quality': 'high',
-            'voice_cloning': False,
-            'speakers': False
-        },
-        {
-            'id': 'tts_models/uk/mai/vits',
-            'name': 'MAI Ukrainian VITS',
-            'description': 'VITS модель для украинского языка',
-            'language': 'uk',
-            'gender': 'mixed',
-            'quality': 'high',
-            'voice_cloning': False,
-            'speakers': False
-        }
-    ],
-    '🇹🇷 Турецкие модели': [
-        {
-            'id': 'tts_models/tr/common-voice/glow-tts',
-            'name': 'Turkish Common Voice Glow-TTS',
-            'description': 'Турецкая GlowTTS модель с неизвестным спикером из Common-Voice датасета',
-            'language': 'tr',
-            'gender': 'mixed',
-            'quality': 'high',
-            'voice_cloning': False,
-            'speakers': False
-        }
-    ],
-    '🇵🇱 Польские модели': [
-        {
-            'id': 'tts_models/pl/mai_female/vits',
-            'name': 'MAI Polish Female VITS',
-            'description': 'VITS модель для польского языка (женский голос)',
-            'language': 'pl',
-            'gender': 'female',
-            'quality': 'high',
-            'voice_cloning': False,
-            'speakers': False
-        }
-    ],
-    '🇧🇾 Белорусские модели': [
-        {
-            'id': 'tts_models/be/common-voice/glow-tts',
-            'name': 'Belarusian Common Voice Glow-TTS',
-            'description': 'Белорусская GlowTTS модель, созданная @alex73',
-            'language': 'be',
-            'gender': 'mixed',
-            'quality': 'high',
-            'voice_cloning': False,
-            'speakers': False
-        }
-    ],
-    '🌍 Другие языки': [
-        {
-            'id': 'tts_models/bg/cv/vits',
-            'name': 'Bulgarian VITS',
-            'description': 'VITS модель для болгарского языка',
-            'language': 'bg',
-            'gender': 'mixed',
-            'quality': 'high',
-            'voice_cloning': False,
-            'speakers': False
-        },
-        {
-            'id': 'tts_models/cs/cv/vits',
-            'name': 'Czech VITS',
-            'description': 'VITS модель для чешского языка',
-            'language': 'cs',
-            'gender': 'mixed',
-            'quality': 'high',
-            'voice_cloning': False,
-            'speakers': False
-        },
-        {
-            'id': 'tts_models/da/cv/vits',
-            'name': 'Danish VITS',
-            'description': 'VITS модель для датского языка',
-            'language': 'da',
-            'gender': 'mixed',
-            'quality': 'high',
-            'voice_cloning': False,
-            'speakers': False
-        },
-        {
-            'id': 'tts_models/et/cv/vits',
-            'name': 'Estonian VITS',
-            'description': 'VITS модель для эстонского языка',
-            'language': 'et',
-            'gender': 'mixed',
-            'quality': 'high',
-            'voice_cloning': False,
-            'speakers': False
-        },
-        {
-            'id': 'tts_models/ga/cv/vits',
-            'name': 'Irish VITS',
-            'description': 'VITS модель для ирландского языка',
-            'language': 'ga',
-            'gender': 'mixed',
-            'quality': 'high',
-            'voice_cloning': False,
-            'speakers': False
-        },
-        {
-            'id': 'tts_models/hu/css10/vits',
-            'name': 'Hungarian VITS',
-            'description': 'VITS модель для венгерского языка',
-            'language': 'hu',
-            'gender': 'mixed',
-            'quality': 'high',
-            'voice_cloning': False,
-            'speakers': False
-        },
-        {
-            'id': 'tts_models/el/cv/vits',
-            'name': 'Greek VITS',
-            'description': 'VITS модель для греческого языка',
-            'language': 'el',
-            'gender': 'mixed',
-            'quality': 'high',
-            'voice_cloning': False,
-            'speakers': False
-        },
-        {
-            'id': 'tts_models/fi/css10/vits',
-            'name': 'Finnish VITS',
-            'description': 'VITS модель для финского языка',
-            'language': 'fi',
-            'gender': 'mixed',
-            'quality': 'high',
-            'voice_cloning': False,
-            'speakers': False
-        },
-        {
-            'id': 'tts_models/hr/cv/vits',
-            'name': 'Croatian VITS',
-            'description': 'VITS модель для хорватского языка',
-            'language': 'hr',
-            'gender': 'mixed',
-            'quality': 'high',
-            'voice_cloning': False,
-            'speakers': False
-        },
-        {
-            'id': 'tts_models/lt/cv/vits',
-            'name': 'Lithuanian VITS',
-            'description': 'VITS модель для литовского языка',
-            'language': 'lt',
-            'gender': 'mixed',
-            'quality': 'high',
-            'voice_cloning': False,
-            'speakers': False
-        },
-        {
-            'id': 'tts_models/lv/cv/vits',
-            'name': 'Latvian VITS',
-            'description': 'VITS модель для латышского языка',
-            'language': 'lv',
-            'gender': 'mixed',
-            'quality': 'high',
-            'voice_cloning': False,
-            'speakers': False
-        },
-        {
-            'id': 'tts_models/mt/cv/vits',
-            'name': 'Maltese VITS',
-            'description': 'VITS модель для мальтийского языка',
-            'language': 'mt',
-            'gender': 'mixed',
-            'quality': 'high',
-            'voice_cloning': False,
-            'speakers': False
-        },
-        {
-            'id': 'tts_models/pt/cv/vits',
-            'name': 'Portuguese VITS',
-            'description': 'VITS модель для португальского языка',
-            'language': 'pt',
-            'gender': 'mixed',
-            'quality': 'high',
-            'voice_cloning': False,
-            'speakers': False
-        },
-        {
-            'id': 'tts_models/ro/cv/vits',
-            'name': 'Romanian VITS',
-            'description': 'VITS модель для румынского языка',
-            'language': 'ro',
-            'gender': 'mixed',
-            'quality': 'high',
-            'voice_cloning': False,
-            'speakers': False
-        },
-        {
-            'id': 'tts_models/sk/cv/vits',
-            'name': 'Slovak VITS',
-            'description': 'VITS модель для словацкого языка',
-            'language': 'sk',
-            'gender': 'mixed',
-            'quality': 'high',
-            'voice_cloning': False,
-            'speakers': False
-        },
-        {
-            'id': 'tts_models/sl/cv/vits',
-            'name': 'Slovenian VITS',
-            'description': 'VITS модель для словенского языка',
-            'language': 'sl',
-            'gender': 'mixed',
-            'quality': 'high',
-            'voice_cloning': False,
-            'speakers': False
-        },
-        {
-            'id': 'tts_models/sv/cv/vits',
-            'name': 'Swedish VITS',
-            'description': 'VITS модель для шведского языка',
-            'language': 'sv',
-            'gender': 'mixed',
-            'quality': 'high',
-            'voice_cloning': False,
-            'speakers': False
-        },
-        {
-            'id': 'tts_models/ca/custom/vits',
-            'name': 'Catalan VITS',
-            'description': 'VITS модель для каталанского языка, обученная на 101460 высказываниях от 257 спикеров',
-            'language': 'ca',
-            'gender': 'mixed',
-            'quality': 'high',
-            'voice_cloning': False,
-            'speakers': False
-        },
-        {
-            'id': 'tts_models/fa/custom/glow-tts',
-            'name': 'Persian Female Glow-TTS',
-            'description': 'Персидская GlowTTS модель (женский голос)',
-            'language': 'fa',
-            'gender': 'female',
-            'quality': 'medium',
-            'voice_cloning': False,
-            'speakers': False
-        },
-        {
-            'id': 'tts_models/bn/custom/vits-male',
-            'name': 'Bangla Male VITS',
-            'description': 'Бенгальская VITS модель (мужской голос)',
-            'language': 'bn',
-            'gender': 'male',
-            'quality': 'high',
-            'voice_cloning': False,
-            'speakers': False
-        },
-        {
-            'id': 'tts_models/bn/custom/vits-female',
-            'name': 'Bangla Female VITS',
-            'description': 'Бенгальская VITS модель (женский голос)',
-            'language': 'bn',
-            'gender': 'female',
-            'quality': 'high',
-            'voice_cloning': False,
-            'speakers': False
-        },
-        {
-            'id': 'tts_models/ewe/openbible/vits',
-            'name': 'Ewe VITS',
-            'description': 'VITS модель для языка эве',
-            'language': 'ewe',
-            'gender': 'mixed',
-            'quality': 'high',
-            'voice_cloning': False,
-            'speakers': False
-        },
-        {
-            'id': 'tts_models/hau/openbible/vits',
-            'name': 'Hausa VITS',
-            'description': 'VITS модель для языка хауса',
-            'language': 'hau',
-            'gender': 'mixed',
-            'quality': 'high',
-            'voice_cloning': False,
-            'speakers': False
-        },
-        {
-            'id': 'tts_models/lin/openbible/vits',
-            'name': 'Lingala VITS',
-            'description': 'VITS модель для языка лингала',
-            'language': 'lin',
-            'gender': 'mixed',
-            'quality': 'high',
-            'voice_cloning': False,
-            'speakers': False
-        },
-        {
-            'id': 'tts_models/tw_akuapem/openbible/vits',
-            'name': 'Twi Akuapem VITS',
-            'description': 'VITS модель для языка тви (акуапем)',
-            'language': 'tw_akuapem',
-            'gender': 'mixed',
-            'quality': 'high',
-            'voice_cloning': False,
-            'speakers': False
-        },
-        {
-            'id': 'tts_models/tw_asante/openbible/vits',
-            'name': 'Twi Asante VITS',
-            'description': 'VITS модель для языка тви (ашанти)',
-            'language': 'tw_asante',
-            'gender': 'mixed',
-            'quality': 'high',
-            'voice_cloning': False,
-            'speakers': False
-        },
-        {
-            'id': 'tts_models/yor/openbible/vits',
-            'name': 'Yoruba VITS',
-            'description': 'VITS модель для языка йоруба',
-            'language': 'yor',
-            'gender': 'mixed',
-            'quality': 'high',
-            'voice_cloning': False,
-            'speakers': False
-        }
-    ]
-}
+# Ограничение размера образца голоса; запросы заметно больше отклоняются еще до чтения тела
+UPLOAD_MAX_BYTES = env_int('TTS_UPLOAD_MAX_BYTES', 50 * 1024 * 1024)
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+UPLOAD_FORM_OVERHEAD = 1024 * 1024
 
-def get_unique_filename(output_dir: str, filename: str) -> str:
-    """Генерирует уникальное имя файла если файл уже существует"""
-    base_path = Path(output_dir) / filename
-    if not base_path.exists():
-        return str(base_path)
-    
-    # Получаем имя и расширение
-    stem = base_path.stem
-    suffix = base_path.suffix
-    
-    # Добавляем случайный UUID
-    unique_filename = f'{stem}_{uuid.uuid4().hex[:8]}{suffix}'
-    return str(Path(output_dir) / unique_filename)
+def upload_too_large_message() -> str:
+    return f'Файл слишком большой. Максимальный размер: {UPLOAD_MAX_BYTES // (1024 * 1024)}MB'
+
+@app.middleware('http')
+async def reject_large_uploads(request: Request, call_next):
+    """Отклоняет загрузку по Content-Length, не дожидаясь, пока тело будет принято и разобрано"""
+    content_length = request.headers.get('content-length')
+    if request.method == 'POST' and content_length and content_length.isdigit():
+        if int(content_length) > UPLOAD_MAX_BYTES + UPLOAD_FORM_OVERHEAD:
+            return JSONResponse({'detail': upload_too_large_message()}, status_code=413)
+    return await call_next(request)
+
+@app.middleware('http')
+async def assign_request_id(request: Request, call_next):
+    """
+    Id запроса попадает во все записи лога, сделанные при его обработке (в том числе
+    в потоках синтеза), и возвращается клиенту в заголовке X-Request-ID.
+    """
+    request_id = request.headers.get('x-request-id', '')[:64] or new_request_id()
+    token = request_id_var.set(request_id)
+    try:
+        response = await call_next(request)
+    finally:
+        request_id_var.reset(token)
+    response.headers['X-Request-ID'] = request_id
+    return response
+
+# Пакетирование коротких запросов к одной модели (включается TTS_BATCH_ENABLED)
+def dispatch_batch(key, items):
+    """Отправляет собранный пакет в исполнитель синтеза"""
+    model_name, language, speaker, voice_id = key
+    return synthesis_executor.submit(
+        generate_audio_batch,
+        model_name,
+        items,
+        gpu=True,
+        language=language,
+        speaker=speaker,
+        voice_id=voice_id
+    )
+
+batch_scheduler = BatchScheduler(
+    dispatch_batch,
+    max_batch=BATCH_MAX_SIZE,
+    max_wait_ms=BATCH_MAX_WAIT_MS,
+    max_chars=BATCH_MAX_CHARS,
+    enabled=BATCH_ENABLED
+)
+
+# Предзагрузка и прогрев моделей при старте (TTS_PRELOAD)
+warmup = Warmup(PRELOAD_MODELS, load=preload_model, warm=warm_up, runs=WARMUP_RUNS)
+
+# Запуск бенчмарка через API (нагружает сервер, поэтому по умолчанию выключен)
+BENCHMARK_ENDPOINT = env_bool('TTS_BENCHMARK_ENDPOINT', False)
+
+# Импортировать TTS/torch в фоне сразу после запуска, чтобы первый запрос не ждал импорта
+BACKGROUND_IMPORT = env_bool('TTS_BACKGROUND_IMPORT', True)
+
+# Не скачивать модель внутри запроса синтеза: запрос получает 503 и прогресс загрузки
+DOWNLOAD_ON_DEMAND = env_bool('TTS_DOWNLOAD_ON_DEMAND', True)
+
+# Фоновые задачи генерации (хранилище задается TTS_JOB_STORE)
+job_manager = JobManager(create_job_store(), synthesis_executor)
+JOB_EVENTS_INTERVAL = 0.5
+
+
+@functools.lru_cache(maxsize=1)
+def render_index() -> str:
+    """Главная страница зависит только от каталога моделей, поэтому рендерится один раз"""
+    return templates.get_template('index.html').render(models=model_catalog.categories)
 
 @app.get('/', response_class=HTMLResponse)
-async def index(request: Request):
+async def index():
     """Главная страница с формой"""
-    return templates.TemplateResponse('index.html', {
-        'request': request,
-        'models': AVAILABLE_MODELS
-    })
+    return HTMLResponse(render_index())
+
+def validate_model_name(model_name: str):
+    """Проверяет, что модель есть в каталоге"""
+    if not model_catalog.exists(model_name):
+        raise HTTPException(status_code=400, detail='Неверная модель')
+
+def require_downloaded(model_name: str):
+    """
+    Запускает фоновую загрузку модели, если ее нет на диске, и отвечает 503 с Retry-After,
+    чтобы запрос не ждал скачивания (прогресс - GET /downloads/{model_name}).
+    """
+    if not DOWNLOAD_ON_DEMAND or download_manager.is_downloaded(model_name):
+        return
+    status = download_manager.start(model_name)
+    if status['state'] == 'done':
+        return
+    if status['state'] == 'failed':
+        raise HTTPException(status_code=502, detail=f"Не удалось скачать модель {model_name}: {status['error']}")
+    progress = f" ({status['progress']:.0%})" if status.get('bytes_total') else ''
+    raise HTTPException(
+        status_code=503,
+        detail=f'Модель {model_name} скачивается{progress}, повторите запрос позже',
+        headers={'Retry-After': '10'}
+    )
+
+def download_waiter(model_names):
+    """
+    Для задач с еще не скачанными моделями: запускает их загрузку и возвращает функцию ожидания,
+    которую JobManager вызывает вне исполнителя синтеза (None - ждать нечего).
+    """
+    if not DOWNLOAD_ON_DEMAND:
+        return None
+    missing = [name for name in model_names if not download_manager.is_downloaded(name)]
+    if not missing:
+        return None
+    for name in missing:
+        download_manager.start(name)
+    return lambda: [download_manager.wait(name) for name in missing]
+
+def validate_voice_id(voice_id: str):
+    """Проверяет, что зарегистрированный голос существует"""
+    if voice_id and voice_registry.get(voice_id) is None:
+        raise HTTPException(status_code=400, detail=f'Голос {voice_id} не найден')
+
+def reference_sample_rate(model_name: str = None):
+    """
+    Частота, с которой модель читает образец голоса (из индекса метаданных, без загрузки модели).
+    None - модель не указана или еще не скачана: используется TTS_REFERENCE_SAMPLE_RATE.
+    """
+    if not model_name or not model_catalog.exists(model_name):
+        return None
+    entry = model_index.get(model_name)
+    return entry.get('reference_sample_rate') if entry else None
+
+async def save_speaker_file(speaker_file: UploadFile, model_name: str = None):
+    """
+    Сохраняет загруженный образец голоса и возвращает путь к нему (или None).
+    Файл пишется на диск блоками с ограничением размера, затем один раз
+    приводится к моно WAV с частотой входа модели и обрезается до полезного фрагмента.
+    """
+    if not speaker_file or not speaker_file.filename:
+        return None
+
+    # Проверяем расширение файла
+    allowed_extensions = ['.wav', '.mp3', '.flac', '.m4a']
+    file_ext = Path(speaker_file.filename).suffix.lower()
+    if file_ext not in allowed_extensions:
+        raise HTTPException(
+            status_code=400, 
+            detail=f'Неподдерживаемый формат файла. Разрешены: {", ".join(allowed_extensions)}'
+        )
+    if speaker_file.size is not None and speaker_file.size > UPLOAD_MAX_BYTES:
+        raise HTTPException(status_code=413, detail=upload_too_large_message())
+
+    # Сохраняем загруженный файл блоками, не держа его целиком в памяти
+    file_id = uuid.uuid4().hex[:8]
+    upload_path = UPLOAD_DIR / f'upload_{file_id}{file_ext}'
+    received = 0
+    try:
+        with open(upload_path, 'wb') as f:
+            while chunk := await speaker_file.read(UPLOAD_CHUNK_SIZE):
+                received += len(chunk)
+                if received > UPLOAD_MAX_BYTES:
+                    raise HTTPException(status_code=413, detail=upload_too_large_message())
+                f.write(chunk)
+
+        sample_rate = await asyncio.to_thread(reference_sample_rate, model_name)
+        speaker_wav_path = Path(await asyncio.to_thread(
+            prepare_reference, upload_path, UPLOAD_DIR / f'speaker_{file_id}.wav', sample_rate
+        ))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    finally:
+        upload_path.unlink(missing_ok=True)
+    
+    logger.debug('Speaker file saved', extra={'path': str(speaker_wav_path)})
+    return speaker_wav_path
+
+def remove_speaker_file(speaker_wav_path):
+    """Удаляет временный файл образца голоса после использования"""
+    if speaker_wav_path and speaker_wav_path.exists():
+        try:
+            speaker_wav_path.unlink()
+            logger.debug('Cleaned up speaker file', extra={'path': str(speaker_wav_path)})
+        except:
+            pass
+
+def validate_output_format(audio_format: str, bitrate: str):
+    """Проверяет формат выходного файла и битрейт"""
+    try:
+        return resolve_format(audio_format, bitrate)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+async def prepare_generation(text: str, model_name: str, output_filename: str, speaker_file: UploadFile,
+                             audio_format: str = 'wav'):
+    """
+    Валидирует параметры генерации и сохраняет образец голоса.
+    @return: (путь к выходному файлу, путь к образцу голоса или None)
+    """
+    # Валидация входных данных
+    if not text.strip():
+        raise HTTPException(status_code=400, detail='Текст не может быть пустым')
+    
+    if not output_filename.strip():
+        raise HTTPException(status_code=400, detail='Имя файла не может быть пустым')
+    
+    validate_model_name(model_name)
+    
+    # Заменяем расширение на расширение выбранного формата
+    extension = output_extension(audio_format)
+    if Path(output_filename).suffix.lower() in {spec['extension'] for spec in OUTPUT_FORMATS.values()}:
+        output_filename = output_filename[:-len(Path(output_filename).suffix)]
+    output_filename += extension
+    
+    # Уникальное имя выбирается по индексу результатов, файл пишется в подпапку-шард
+    output_path = output_store.reserve(output_filename)
+    
+    # Обрабатываем загруженный файл образца голоса
+    speaker_wav_path = await save_speaker_file(speaker_file, model_name)
+    return output_path, speaker_wav_path
+
+def finalize_output(wav_path: str, output_path: str, audio_format: str, bitrate: int = None, model_name: str = ''):
+    """Кодирует синтезированный WAV в выбранный формат и сохраняет предсжатый вариант"""
+    with stage_timer('encode', model_name):
+        encode_file(wav_path, output_path, audio_format, bitrate)
+        precompress(output_path)
+    output_store.add(output_path)
 
 @app.post('/generate')
 async def generate_tts(
@@ -826,102 +325,520 @@ async def generate_tts(
     output_filename: str = Form(...),
     speaker_file: UploadFile = File(None),
     language: str = Form(None),
-    speaker: str = Form(None)
+    speaker: str = Form(None),
+    voice_id: str = Form(None),
+    format: str = Form(None),
+    bitrate: str = Form(None)
 ):
     """API endpoint для генерации TTS"""
     try:
-        # Валидация входных данных
-        if not text.strip():
-            raise HTTPException(status_code=400, detail='Текст не может быть пустым')
-        
-        if not output_filename.strip():
-            raise HTTPException(status_code=400, detail='Имя файла не может быть пустым')
-        
-        # Проверяем, что модель существует в любой из категорий
-        model_exists = False
-        for category_models in AVAILABLE_MODELS.values():
-            for model in category_models:
-                if model['id'] == model_name:
-                    model_exists = True
-                    break
-            if model_exists:
-                break
-        
-        if not model_exists:
-            raise HTTPException(status_code=400, detail='Неверная модель')
-        
-        # Добавляем расширение .wav если его нет
-        if not output_filename.endswith('.wav'):
-            output_filename += '.wav'
-        
-        # Генерируем уникальное имя файла
-        output_path = get_unique_filename('output', output_filename)
+        validate_voice_id(voice_id)
+        audio_format, bitrate = validate_output_format(format, bitrate)
+        validate_model_name(model_name)
+        require_downloaded(model_name)
+        # Проверка GPU импортирует torch, поэтому при первом запросе она идет вне цикла событий
+        gpu = gpu_checked()
+        if gpu is None:
+            gpu = await asyncio.to_thread(gpu_available)
+        output_path, speaker_wav_path = await prepare_generation(
+            text, model_name, output_filename, speaker_file, audio_format
+        )
+        wav_path = synthesis_path(output_path)
+        REQUESTS.inc(kind='generate', model=model_name)
         
-        # Обрабатываем загруженный файл образца голоса
-        speaker_wav_path = None
-        if speaker_file and speaker_file.filename:
-            # Проверяем расширение файла
-            allowed_extensions = ['.wav', '.mp3', '.flac', '.m4a']
-            file_ext = Path(speaker_file.filename).suffix.lower()
-            if file_ext not in allowed_extensions:
-                raise HTTPException(
-                    status_code=400, 
-                    detail=f'Неподдерживаемый формат файла. Разрешены: {", ".join(allowed_extensions)}'
+        # Генерируем аудио в исполнителе синтеза, не блокируя цикл событий
+        try:
+            if batch_scheduler.accepts(text, speaker_wav_path):
+                # Короткие запросы к одной модели объединяются в пакеты
+                await asyncio.wrap_future(batch_scheduler.submit(
+                    (model_name, language or None, speaker or None, voice_id or None),
+                    {'text': text, 'output_path': wav_path}
+                ))
+            else:
+                await synthesis_executor.run(
+                    generate_audio,
+                    text=text,
+                    model_name=model_name,
+                    output_path=wav_path,
+                    gpu=True,
+                    speaker_wav=str(speaker_wav_path) if speaker_wav_path else None,
+                    language=language,
+                    speaker=speaker,
+                    voice_id=voice_id or None,
+                    cpu_bound=not gpu
                 )
-            
-            # Сохраняем загруженный файл
-            speaker_filename = f'speaker_{uuid.uuid4().hex[:8]}{file_ext}'
-            speaker_wav_path = UPLOAD_DIR / speaker_filename
-            
-            with open(speaker_wav_path, 'wb') as f:
-                content = await speaker_file.read()
-                f.write(content)
-            
-            print(f"📁 Speaker file saved: {speaker_wav_path}")
+        finally:
+            remove_speaker_file(speaker_wav_path)
+
+        # Сжимаем результат в рабочем потоке, чтобы не блокировать цикл событий
+        await asyncio.to_thread(finalize_output, wav_path, output_path, audio_format, bitrate, model_name)
         
-        # Генерируем аудио
-        generate_audio(
+        return {
+            'success': True,
+            'message': f'Аудио успешно сгенерировано: {os.path.basename(output_path)}',
+            'filename': os.path.basename(output_path),
+            'url': f'/audio/{os.path.basename(output_path)}'
+        }
+        
+    except HTTPException:
+        raise
+    except QueueFullError as e:
+        ERRORS.inc(kind='generate', reason='queue_full')
+        raise HTTPException(status_code=429, detail=str(e), headers={'Retry-After': '5'})
+    except ExecutorClosedError as e:
+        ERRORS.inc(kind='generate', reason='closed')
+        raise HTTPException(status_code=503, detail=str(e))
+    except Exception as e:
+        logger.exception('Generation failed')
+        raise HTTPException(status_code=500, detail=f'Ошибка генерации: {str(e)}')
+
+STREAM_FORMATS = ('wav', 'pcm')
+
+async def start_audio_stream(speaker_wav_path=None, **params):
+    """
+    Запускает потоковый синтез в исполнителе.
+    Ждет загрузки модели, чтобы ошибки вернулись обычным HTTP-ответом,
+    и возвращает (частота дискретизации, асинхронный генератор байтов).
+    """
+    loop = asyncio.get_running_loop()
+    queue = asyncio.Queue()
+    cancel_event = threading.Event()
+    finished = object()
+
+    def produce():
+        try:
+            for item in stream_audio(cancel_event=cancel_event, **params):
+                loop.call_soon_threadsafe(queue.put_nowait, item)
+        except Exception as e:
+            loop.call_soon_threadsafe(queue.put_nowait, e)
+        finally:
+            remove_speaker_file(speaker_wav_path)
+            loop.call_soon_threadsafe(queue.put_nowait, finished)
+
+    try:
+        synthesis_executor.submit(produce)
+    except Exception:
+        remove_speaker_file(speaker_wav_path)
+        raise
+
+    sample_rate = await queue.get()
+    if isinstance(sample_rate, Exception):
+        cancel_event.set()
+        raise sample_rate
+
+    async def body():
+        try:
+            while True:
+                item = await queue.get()
+                if item is finished:
+                    break
+                if isinstance(item, Exception):
+                    # Заголовки уже отправлены, поэтому просто обрываем поток
+                    logger.error('Error while streaming audio: %s', item)
+                    break
+                yield item
+        finally:
+            cancel_event.set()
+
+    return sample_rate, body()
+
+async def stream_tts_response(
+    text: str,
+    model_name: str,
+    audio_format: str,
+    language: str = None,
+    speaker: str = None,
+    speaker_wav_path=None,
+    voice_id: str = None
+):
+    """Общая часть потоковых endpoint-ов: валидация, запуск синтеза и ответ"""
+    try:
+        validate_voice_id(voice_id)
+        if not text.strip():
+            raise HTTPException(status_code=400, detail='Текст не может быть пустым')
+        validate_model_name(model_name)
+        require_downloaded(model_name)
+        if audio_format not in STREAM_FORMATS:
+            raise HTTPException(
+                status_code=400,
+                detail=f'Неподдерживаемый формат потока. Разрешены: {", ".join(STREAM_FORMATS)}'
+            )
+
+        REQUESTS.inc(kind='stream', model=model_name)
+        sample_rate, body = await start_audio_stream(
+            speaker_wav_path=speaker_wav_path,
             text=text,
             model_name=model_name,
-            output_path=output_path,
             gpu=True,
             speaker_wav=str(speaker_wav_path) if speaker_wav_path else None,
             language=language,
-            speaker=speaker
+            speaker=speaker,
+            audio_format=audio_format,
+            voice_id=voice_id or None
         )
-        
-        # Удаляем временный файл образца голоса после использования
-        if speaker_wav_path and speaker_wav_path.exists():
-            try:
-                speaker_wav_path.unlink()
-                print(f"🗑️ Cleaned up speaker file: {speaker_wav_path}")
-            except:
-                pass
-        
-        return {
-            'success': True,
-            'message': f'Аудио успешно сгенерировано: {os.path.basename(output_path)}',
-            'filename': os.path.basename(output_path)
-        }
-        
+    except HTTPException:
+        remove_speaker_file(speaker_wav_path)
+        raise
+    except QueueFullError as e:
+        ERRORS.inc(kind='stream', reason='queue_full')
+        raise HTTPException(status_code=429, detail=str(e), headers={'Retry-After': '5'})
+    except ExecutorClosedError as e:
+        ERRORS.inc(kind='stream', reason='closed')
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
-        import traceback
-        error_details = traceback.format_exc()
-        print(f"❌ Full error traceback: {error_details}")
+        ERRORS.inc(kind='stream', reason=type(e).__name__)
         raise HTTPException(status_code=500, detail=f'Ошибка генерации: {str(e)}')
 
+    media_type = 'audio/wav' if audio_format == 'wav' else f'audio/L16;rate={sample_rate};channels=1'
+    return StreamingResponse(
+        body,
+        media_type=media_type,
+        headers={'Cache-Control': 'no-cache', 'X-Sample-Rate': str(sample_rate)}
+    )
+
+@app.post('/generate/stream')
+async def generate_tts_stream(
+    text: str = Form(...),
+    model_name: str = Form(...),
+    speaker_file: UploadFile = File(None),
+    language: str = Form(None),
+    speaker: str = Form(None),
+    format: str = Form('wav'),
+    voice_id: str = Form(None)
+):
+    """Потоковая генерация: аудио отдается по предложениям по мере синтеза"""
+    speaker_wav_path = await save_speaker_file(speaker_file, model_name)
+    return await stream_tts_response(text, model_name, format, language, speaker, speaker_wav_path, voice_id)
+
+@app.get('/generate/stream')
+async def generate_tts_stream_get(
+    text: str,
+    model_name: str,
+    language: str = None,
+    speaker: str = None,
+    format: str = 'wav',
+    voice_id: str = None
+):
+    """Потоковая генерация без образца голоса - можно указать прямо в <audio src>"""
+    return await stream_tts_response(text, model_name, format, language, speaker, voice_id=voice_id)
+
+@app.post('/jobs')
+async def create_job(
+    text: str = Form(...),
+    model_name: str = Form(...),
+    output_filename: str = Form(...),
+    speaker_file: UploadFile = File(None),
+    language: str = Form(None),
+    speaker: str = Form(None),
+    voice_id: str = Form(None),
+    format: str = Form(None),
+    bitrate: str = Form(None)
+):
+    """Создать задачу генерации: возвращает id задачи сразу, синтез идет в фоне"""
+    validate_voice_id(voice_id)
+    audio_format, bitrate = validate_output_format(format, bitrate)
+    output_path, speaker_wav_path = await prepare_generation(
+        text, model_name, output_filename, speaker_file, audio_format
+    )
+    wav_path = synthesis_path(output_path)
+
+    def run(progress_callback):
+        generate_audio(
+            text=text,
+            model_name=model_name,
+            output_path=wav_path,
+            gpu=True,
+            speaker_wav=str(speaker_wav_path) if speaker_wav_path else None,
+            language=language,
+            speaker=speaker,
+            progress_callback=progress_callback,
+            voice_id=voice_id or None
+        )
+        finalize_output(wav_path, output_path, audio_format, bitrate, model_name)
+        return {'filename': os.path.basename(output_path), 'url': f'/audio/{os.path.basename(output_path)}'}
+
+    REQUESTS.inc(kind='job', model=model_name)
+    try:
+        job = job_manager.submit(
+            'generate',
+            run,
+            params={
+                'model_name': model_name,
+                'language': language,
+                'speaker': speaker,
+                'voice_id': voice_id,
+                'text_length': len(text),
+                'format': audio_format,
+                'bitrate': bitrate,
+                'filename': os.path.basename(output_path)
+            },
+            cleanup=lambda: remove_speaker_file(speaker_wav_path),
+            wait=download_waiter([model_name])
+        )
+    except QueueFullError as e:
+        ERRORS.inc(kind='job', reason='queue_full')
+        raise HTTPException(status_code=429, detail=str(e), headers={'Retry-After': '5'})
+    except ExecutorClosedError as e:
+        ERRORS.inc(kind='job', reason='closed')
+        raise HTTPException(status_code=503, detail=str(e))
+
+    return {'job_id': job['id'], 'state': job['state']}
+
+@app.post('/bulk')
+async def create_bulk_job(
+    manifest: UploadFile = File(...),
+    name: str = Form(None),
+    model_name: str = Form(None),
+    language: str = Form(None),
+    speaker: str = Form(None),
+    voice_id: str = Form(None),
+    format: str = Form(None),
+    bitrate: str = Form(None)
+):
+    """
+    Массовый синтез по манифесту JSONL/CSV (text, model_name, speaker, language, filename) как фоновая задача.
+    Файлы пишутся в output/bulk/<name>; повторная отправка с тем же name пропускает готовые строки.
+    """
+    audio_format, bitrate = validate_output_format(format, bitrate)
+    content = await manifest.read(UPLOAD_MAX_BYTES + 1)
+    if len(content) > UPLOAD_MAX_BYTES:
+        raise HTTPException(status_code=413, detail=upload_too_large_message())
+    try:
+        rows = parse_manifest(
+            content.decode('utf-8-sig'),
+            manifest_kind(manifest.filename or ''),
+            {'model_name': model_name, 'language': language, 'speaker': speaker, 'voice_id': voice_id},
+            audio_format
+        )
+    except (UnicodeDecodeError, ValueError) as e:
+        raise HTTPException(status_code=400, detail=f'Ошибка в манифесте: {e}')
+    for model in {row['model_name'] for row in rows}:
+        validate_model_name(model)
+    for voice in {row['voice_id'] for row in rows if row['voice_id']}:
+        validate_voice_id(voice)
+
+    name = re.sub(r'[^\w\-]+', '_', name or Path(manifest.filename or '').stem or uuid.uuid4().hex[:8]).strip('_')
+    output_dir = output_store.directory / BULK_DIR / (name or uuid.uuid4().hex[:8])
+
+    store_key = f'{BULK_DIR}/{output_dir.name}'
+
+    def run(progress_callback):
+        # Папка не удаляется очисткой, пока в нее пишутся файлы
+        with output_store.hold(store_key):
+            summary = run_bulk(rows, output_dir, audio_format, bitrate, progress_callback=progress_callback)
+            output_store.add(output_dir, key=store_key)
+        return {**summary, 'summary_url': f'/{output_dir.as_posix()}/summary.json'}
+
+    for model, group in group_rows(rows).items():
+        REQUESTS.inc(len(group), kind='bulk', model=model)
+    try:
+        job = job_manager.submit(
+            'bulk',
+            run,
+            params={'name': output_dir.name, 'rows': len(rows), 'format': audio_format, 'bitrate': bitrate},
+            wait=download_waiter(group_rows(rows)),
+            dispatcher=True
+        )
+    except QueueFullError as e:
+        ERRORS.inc(kind='bulk', reason='queue_full')
+        raise HTTPException(status_code=429, detail=str(e), headers={'Retry-After': '5'})
+    except ExecutorClosedError as e:
+        ERRORS.inc(kind='bulk', reason='closed')
+        raise HTTPException(status_code=503, detail=str(e))
+    return {'job_id': job['id'], 'state': job['state'], 'rows': len(rows), 'name': output_dir.name}
+
+@app.get('/jobs')
+async def list_jobs(limit: int = 50):
+    """Список последних задач"""
+    return {'jobs': job_manager.list(limit)}
+
+@app.get('/jobs/{job_id}')
+async def get_job(job_id: str):
+    """Состояние задачи: статус, прогресс, оценка оставшегося времени"""
+    job = job_manager.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail='Задача не найдена')
+    job.pop('traceback', None)
+    return job
+
+@app.get('/jobs/{job_id}/events')
+async def job_events(job_id: str):
+    """Server-Sent Events с прогрессом задачи по мере синтеза предложений"""
+    if job_manager.get(job_id) is None:
+        raise HTTPException(status_code=404, detail='Задача не найдена')
+
+    async def stream():
+        last_update = None
+        while True:
+            job = job_manager.get(job_id)
+            if job is None:
+                break
+            if job['updated_at'] != last_update:
+                last_update = job['updated_at']
+                job.pop('traceback', None)
+                yield f"event: {job['state']}\ndata: {json.dumps(job, ensure_ascii=False)}\n\n"
+            if job['state'] in FINISHED_STATES:
+                break
+            await asyncio.sleep(JOB_EVENTS_INTERVAL)
+
+    return StreamingResponse(
+        stream(),
+        media_type='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+@app.api_route('/audio/{filename}', methods=['GET', 'HEAD'])
+async def download_audio(request: Request, filename: str, download: bool = False):
+    """
+    Отдает сгенерированный файл с заголовками для долгого кэширования.
+    Имена файлов уникальны, поэтому содержимое не меняется: Cache-Control immutable,
+    сильный ETag по хэшу содержимого, If-None-Match (304), Range (206) для перемотки
+    и предсжатые варианты (.br, .gz) по Accept-Encoding.
+    """
+    path = resolve_audio_path(output_store, filename)
+    if path is None:
+        raise HTTPException(status_code=404, detail='Файл не найден')
+
+    try:
+        etag = await asyncio.to_thread(etag_cache.get, path)
+        size = path.stat().st_size
+    except FileNotFoundError:
+        # Файл удалили с диска мимо индекса
+        output_store.discard(filename)
+        raise HTTPException(status_code=404, detail='Файл не найден')
+    headers = {
+        'Cache-Control': IMMUTABLE_CACHE_CONTROL,
+        'Accept-Ranges': 'bytes',
+        'Vary': 'Accept-Encoding'
+    }
+    if download:
+        headers['Content-Disposition'] = f'attachment; filename="{path.name}"'
+
+    body_path = path
+    variant_etag = etag
+    variant = precompressed_variant(path, request.headers.get('accept-encoding'))
+    if variant:
+        # У сжатого представления свой сильный ETag
+        body_path, encoding = variant
+        variant_etag = f'{etag[:-1]}-{encoding}"'
+
+    # If-None-Match проверяется раньше Range (RFC 9110, 13.2.2): закэшированный файл не перезапрашивается
+    # частями. Совпадение с ETag исходного файла тоже считается: его клиент получил с ответом 206
+    if_none_match = request.headers.get('if-none-match')
+    if if_none_match:
+        matched = next((tag for tag in (variant_etag, etag) if etag_matches(if_none_match, tag)), None)
+        if matched:
+            return Response(status_code=304, headers={**headers, 'ETag': matched})
+
+    # Диапазон отдается только из исходного файла и только если If-Range совпадает с текущим ETag
+    range_header = request.headers.get('range')
+    if_range = request.headers.get('if-range')
+    if range_header and (not if_range or etag_matches(if_range, etag)):
+        try:
+            byte_range = parse_range(range_header, size)
+        except RangeNotSatisfiable:
+            return Response(status_code=416, headers={**headers, 'Content-Range': f'bytes */{size}'})
+        if byte_range:
+            start, end = byte_range
+            return StreamingResponse(
+                read_file(path, start, end),
+                status_code=206,
+                media_type=media_type(path),
+                headers={
+                    **headers,
+                    'ETag': etag,
+                    'Content-Range': f'bytes {start}-{end}/{size}',
+                    'Content-Length': str(end - start + 1)
+                }
+            )
+
+    if variant:
+        headers['Content-Encoding'] = variant[1]
+    headers['ETag'] = variant_etag
+
+    headers['Content-Length'] = str(body_path.stat().st_size)
+    return StreamingResponse(read_file(body_path), media_type=media_type(path), headers=headers)
+
+@app.post('/voices')
+async def create_voice(
+    speaker_file: UploadFile = File(...),
+    name: str = Form(None),
+    model_name: str = Form(None)
+):
+    """
+    Зарегистрировать образец голоса для повторного использования по voice_id.
+    Если указана модель XTTS, латенты голоса вычисляются сразу.
+    """
+    if model_name:
+        validate_model_name(model_name)
+    speaker_wav_path = await save_speaker_file(speaker_file, model_name)
+    if speaker_wav_path is None:
+        raise HTTPException(status_code=400, detail='Файл образца голоса не загружен')
+
+    try:
+        voice = voice_registry.register(str(speaker_wav_path), name=name or Path(speaker_file.filename).stem)
+    finally:
+        remove_speaker_file(speaker_wav_path)
+
+    if model_name:
+        def prepare_latents():
+            from services.tts import get_tts, get_voice_latents
+            get_voice_latents(get_tts(model_name, gpu=True), model_name, voice['id'])
+        try:
+            await synthesis_executor.run(prepare_latents)
+        except (QueueFullError, ExecutorClosedError) as e:
+            raise HTTPException(status_code=503, detail=str(e), headers={'Retry-After': '5'})
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f'Ошибка подготовки голоса: {str(e)}')
+
+    return voice_registry.get(voice['id'])
+
+@app.get('/voices')
+async def list_voices():
+    """Список зарегистрированных голосов"""
+    return {'voices': voice_registry.list()}
+
+@app.get('/voices/{voice_id}')
+async def get_voice(voice_id: str):
+    """Информация о голосе и моделях, для которых уже вычислены латенты"""
+    voice = voice_registry.get(voice_id)
+    if voice is None:
+        raise HTTPException(status_code=404, detail='Голос не найден')
+    return voice
+
+@app.delete('/voices/{voice_id}')
+async def delete_voice(voice_id: str):
+    """Удалить голос вместе с сохраненными латентами"""
+    if not voice_registry.delete(voice_id):
+        raise HTTPException(status_code=404, detail='Голос не найден')
+    return {'success': True}
+
 @app.get('/models')
-async def get_models():
-    """Получить список доступных моделей"""
-    return {'models': AVAILABLE_MODELS}
+async def get_models(
+    request: Request,
+    language: str = None,
+    voice_cloning: bool = None,
+    speakers: bool = None,
+    quality: str = None,
+    gender: str = None
+):
+    """
+    Список доступных моделей по категориям. Фильтры (например, ?language=ru&voice_cloning=true)
+    оставляют только подходящие модели. Ответы сериализуются один раз и отдаются с ETag.
+    """
+    body, etag = model_catalog.response(
+        language=language, voice_cloning=voice_cloning, speakers=speakers, quality=quality, gender=gender
+    )
+    headers = {'ETag': etag, 'Cache-Control': 'no-cache'}
+    if etag_matches(request.headers.get('if-none-match'), etag):
+        return Response(status_code=304, headers=headers)
+    return Response(body, media_type='application/json', headers=headers)
 
 @app.get('/test/{model_name}')
 async def test_model(model_name: str):
     """Тестовый endpoint для проверки работы модели"""
     try:
-        from services.tts import generate_audio
         import tempfile
-        import os
         
         # Создаем временный файл для теста
         with tempfile.NamedTemporaryFile(suffix='.wav', delete=False) as temp_file:
@@ -929,12 +846,16 @@ async def test_model(model_name: str):
         
         try:
             # Тестируем с коротким текстом
-            generate_audio(
+            await synthesis_executor.run(
+                generate_audio,
                 text="Hello, this is a test.",
                 model_name=model_name,
                 output_path=temp_path,
                 gpu=False,  # Используем CPU для теста
-                language="en" if 'multilingual' in model_name else None
+                language="en" if 'multilingual' in model_name else None,
+                # Проверка должна запускать модель, а не копировать прошлый результат из кэша
+                use_cache=False,
+                cpu_bound=True
             )
             
             # Проверяем, что файл создан
@@ -954,6 +875,8 @@ async def test_model(model_name: str):
             if os.path.exists(temp_path):
                 os.unlink(temp_path)
                 
+    except (QueueFullError, ExecutorClosedError) as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={'Retry-After': '5'})
     except Exception as e:
         import traceback
         return {
@@ -962,59 +885,227 @@ async def test_model(model_name: str):
             'traceback': traceback.format_exc()
         }
 
-@app.get('/speakers/{model_name}')
-async def get_speakers(model_name: str):
-    """Получить список доступных спикеров для модели"""
+@app.post('/benchmark')
+async def create_benchmark(
+    models: str = Form(...),
+    devices: str = Form('cpu'),
+    runs: int = Form(3),
+    concurrency: int = Form(4),
+    language: str = Form(None)
+):
+    """
+    Запустить бенчмарк моделей как фоновую задачу (включается TTS_BENCHMARK_ENDPOINT).
+    Результат в формате python -m services.benchmark - в поле result задачи.
+    """
+    if not BENCHMARK_ENDPOINT:
+        raise HTTPException(status_code=404, detail='Бенчмарк отключен (TTS_BENCHMARK_ENDPOINT)')
+    model_names = [m.strip() for m in models.split(',') if m.strip()]
+    device_names = [d.strip() for d in devices.split(',') if d.strip()]
+    for model_name in model_names:
+        validate_model_name(model_name)
+    for device in device_names:
+        if not re.fullmatch(r'cpu(:\d+)?|cuda:\d+', device):
+            raise HTTPException(status_code=400, detail=f'Неверное устройство: {device}')
+    if not model_names or not device_names or not 1 <= runs <= 20 or not 1 <= concurrency <= 16:
+        raise HTTPException(status_code=400, detail='Неверные параметры бенчмарка')
+
+    def run(progress_callback):
+        from services.benchmark import run_benchmark
+        return run_benchmark(model_names, device_names, runs, concurrency, language=language,
+                             progress_callback=progress_callback)
+
     try:
-        from services.tts import TTS, auto_accept_license, restore_stdin
-        
-        # Автоматически принимаем лицензию для XTTS v2
-        original_stdin = None
-        if 'xtts' in model_name.lower():
-            original_stdin = auto_accept_license()
-        
-        try:
-            tts = TTS(model_name)
-            tts.to('cpu')  # Используем CPU для быстрого получения списка
-            
-            # Проверяем, есть ли у модели спикеры
-            speakers = []
-            try:
-                if hasattr(tts, 'speakers') and tts.speakers:
-                    if isinstance(tts.speakers, dict):
-                        speakers = list(tts.speakers.keys())
-                    else:
-                        speakers = list(tts.speakers)
-                elif 'xtts' in model_name.lower():
-                    # Для XTTS v2 пытаемся получить реальных спикеров
-                    try:
-                        if hasattr(tts, 'speaker_manager') and hasattr(tts.speaker_manager, 'speakers'):
-                            speakers = list(tts.speaker_manager.speakers.keys())
-                        else:
-                            speakers = []
-                    except:
-                        speakers = []
-            except:
-                # Если ошибка, возвращаем пустой список
-                speakers = []
-                
-            return {
-                'model_name': model_name,
-                'speakers': speakers,
-                'has_speakers': len(speakers) > 0
-            }
-        finally:
-            if original_stdin:
-                restore_stdin(original_stdin)
-                
-    except Exception as e:
+        job = job_manager.submit(
+            'benchmark',
+            run,
+            params={'models': model_names, 'devices': device_names, 'runs': runs, 'concurrency': concurrency}
+        )
+    except QueueFullError as e:
+        raise HTTPException(status_code=429, detail=str(e), headers={'Retry-After': '5'})
+    except ExecutorClosedError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    return {'job_id': job['id'], 'state': job['state']}
+
+@app.get('/speakers/{model_name:path}')
+async def get_speakers(model_name: str):
+    """
+    Получить список доступных спикеров для модели.
+    Список берется из индекса метаданных, модель при этом не загружается.
+    """
+    # В индекс попадают только модели из каталога, а не любой путь из запроса
+    if not model_catalog.exists(model_name):
+        raise HTTPException(status_code=404, detail='Модель не найдена')
+
+    # Первое обращение к новой модели читает ее файлы - делаем это вне цикла событий
+    entry = await asyncio.to_thread(model_index.get, model_name)
+    if entry is None:
         return {
             'model_name': model_name,
             'speakers': [],
             'has_speakers': False,
-            'error': str(e)
+            'downloaded': False
         }
 
+    return {
+        'model_name': model_name,
+        'speakers': entry['speakers'],
+        'has_speakers': len(entry['speakers']) > 0,
+        'languages': entry['languages'],
+        'downloaded': True
+    }
+
+@app.get('/models/metadata')
+async def get_models_metadata():
+    """Метаданные всех скачанных моделей из индекса"""
+    return {'models': model_index.all()}
+
+@app.post('/downloads')
+async def start_download(model_name: str = Form(...)):
+    """Скачать модель в фоне (без загрузки в память)"""
+    validate_model_name(model_name)
+    return download_manager.start(model_name)
+
+@app.get('/downloads')
+async def list_downloads():
+    """Прогресс загрузок и размер на диске всех скачанных моделей"""
+    return {
+        'source': download_manager.source or 'coqui',
+        'concurrency': download_manager.concurrency,
+        'downloads': await asyncio.to_thread(download_manager.list)
+    }
+
+@app.get('/downloads/{model_name:path}')
+async def get_download(model_name: str):
+    """Прогресс загрузки одной модели"""
+    validate_model_name(model_name)
+    return await asyncio.to_thread(download_manager.status, model_name)
+
+@app.get('/stats')
+async def get_stats():
+    """Статистика пула загруженных моделей, очереди синтеза и кэша результатов"""
+    from services.result_cache import result_cache
+    from services.tts import device_scheduler, model_pool
+    return {
+        'model_pool': model_pool.stats(),
+        'devices': device_scheduler.stats(),
+        'executor': synthesis_executor.stats(),
+        'result_cache': result_cache.stats(),
+        'voices': voice_registry.stats(),
+        'batching': batch_scheduler.stats(),
+        'output': output_store.stats()
+    }
+
+def collect_service_metrics() -> list:
+    """Показатели пула моделей, устройств, очереди и кэшей для /metrics"""
+    from services.benchmark import current_rss
+    from services.result_cache import result_cache
+    from services.tts import device_scheduler, model_pool
+
+    pool = model_pool.stats()
+    devices = device_scheduler.stats()['devices']
+    executor = synthesis_executor.stats()
+    cache = result_cache.stats()
+    voices = voice_registry.stats()
+    output = output_store.stats()
+    families = [
+        ('tts_resident_models', 'gauge', 'Загруженные реплики моделей', [({}, len(pool['models']))]),
+        ('tts_resident_bytes', 'gauge', 'Оценка памяти загруженных моделей',
+         [({'model': m['model_name'], 'device': m['device']}, m['size_bytes']) for m in pool['models']]),
+        ('tts_model_pool_hits_total', 'counter', 'Попадания в пул моделей', [({}, pool['hits'])]),
+        ('tts_model_pool_misses_total', 'counter', 'Загрузки моделей в пул', [({}, pool['misses'])]),
+        ('tts_model_pool_evictions_total', 'counter', 'Вытеснения моделей из пула', [({}, pool['evictions'])]),
+        ('tts_queue_inflight', 'gauge', 'Задачи синтеза в работе и в очереди', [({}, executor['inflight'])]),
+        ('tts_queue_depth', 'gauge', 'Задачи синтеза, ожидающие свободного исполнителя', [({}, executor['queued'])]),
+        ('tts_queue_rejected_total', 'counter', 'Задачи, отклоненные из-за переполнения очереди',
+         [({}, executor['rejected'])]),
+        ('tts_result_cache_hits_total', 'counter', 'Попадания в кэш результатов', [({}, cache['hits'])]),
+        ('tts_result_cache_misses_total', 'counter', 'Промахи кэша результатов', [({}, cache['misses'])]),
+        ('tts_voice_latent_hits_total', 'counter', 'Латенты голоса из кэша', [({}, voices['latent_hits'])]),
+        ('tts_voice_latent_misses_total', 'counter', 'Вычисления латентов голоса', [({}, voices['latent_misses'])]),
+        ('tts_output_bytes', 'gauge', 'Объем результатов в output/', [({}, output['bytes'])]),
+        ('tts_output_files', 'gauge', 'Результаты в индексе output/', [({}, output['entries'])]),
+        ('tts_output_removed_total', 'counter', 'Удаленные результаты по причине',
+         [({'reason': 'ttl'}, output['expired']), ({'reason': 'lru'}, output['evictions'])]),
+        ('tts_device_inflight', 'gauge', 'Синтезы, выполняющиеся на устройстве',
+         [({'device': d['device']}, d['inflight']) for d in devices]),
+        ('tts_device_free_bytes', 'gauge', 'Свободная память устройства',
+         [({'device': d['device']}, d['free_bytes']) for d in devices]),
+        ('process_resident_memory_bytes', 'gauge', 'RSS процесса веб-сервера', [({}, current_rss())]),
+    ]
+    # Сбор метрик не должен сам импортировать torch
+    torch = sys.modules.get('torch')
+    if torch is not None and torch.cuda.is_available():
+        families.append((
+            'tts_cuda_allocated_bytes', 'gauge', 'Память CUDA, выделенная тензорами',
+            [({'device': f'cuda:{i}'}, torch.cuda.memory_allocated(i)) for i in range(torch.cuda.device_count())]
+        ))
+    return families
+
+registry.add_collector(collect_service_metrics)
+
+@app.get('/metrics')
+async def metrics():
+    """Метрики в формате Prometheus: время этапов синтеза, очередь, пул моделей, кэши, память"""
+    body = await asyncio.to_thread(registry.render)
+    # Тип задается заголовком: через media_type starlette добавил бы charset второй раз
+    return Response(body, headers={'Content-Type': METRICS_CONTENT_TYPE})
+
+def import_ml_backend():
+    """Фоновый импорт TTS, torch и transformers после того, как сервер начал принимать запросы"""
+    try:
+        check_dependencies()
+        import_backend()
+        gpu_available()
+    except Exception as e:
+        logger.error('Background import of the TTS backend failed: %s', e)
+
+@app.on_event('startup')
+def start_warmup():
+    """Запускаем предзагрузку и прогрев моделей из TTS_PRELOAD в фоне"""
+    if synthesis_executor.process_workers:
+        # CPU-модели загружаются до запуска процессов синтеза, чтобы процессы разделяли их веса
+        prepare_shared_models(
+            [model_name for model_name, device in PRELOAD_MODELS if not device or device.startswith('cpu')],
+            preload_model
+        )
+        pids = synthesis_executor.start_processes()
+        logger.info('Synthesis processes started', extra={'pids': pids})
+    for model_name in PREFETCH_MODELS:
+        download_manager.start(model_name)
+    # Индекс результатов строится в потоке очистки, а не при импорте
+    output_store.start()
+    if BACKGROUND_IMPORT:
+        # Процессы синтеза уже запущены: fork не застанет импорт в другом потоке
+        threading.Thread(target=import_ml_backend, name='tts-import', daemon=True).start()
+    warmup.start()
+
+@app.get('/healthz')
+async def healthz():
+    """Проверка живости: процесс отвечает на запросы"""
+    return {'status': 'ok'}
+
+@app.get('/readyz')
+async def readyz():
+    """Проверка готовности: модели из TTS_PRELOAD загружены и прогреты"""
+    from services.tts import model_pool
+    ready = warmup.is_ready()
+    body = {
+        'ready': ready,
+        'preload': warmup.status(),
+        'resident_models': [
+            {'model_name': m['model_name'], 'device': m['device']}
+            for m in model_pool.stats()['models']
+        ]
+    }
+    return JSONResponse(body, status_code=200 if ready else 503)
+
+@app.on_event('shutdown')
+def shutdown_executor():
+    """Останавливаем исполнитель синтеза при завершении приложения"""
+    synthesis_executor.shutdown(wait=False)
+    download_manager.shutdown()
+    output_store.stop()
+
 if __name__ == '__main__':
     import uvicorn
     uvicorn.run(app, host='0.0.0.0', port=8000)
@@ -0,0 +1,134 @@
+import struct
+import wave
+
+import numpy as np
+
+
+def to_pcm16(samples) -> bytes:
+    """Преобразует float-сэмплы [-1, 1] в 16-битный PCM (little-endian)"""
+    data = np.asarray(samples, dtype=np.float32).reshape(-1)
+    data = np.clip(data, -1.0, 1.0)
+    return (data * 32767).astype('<i2').tobytes()
+
+
+def normalize_peak(samples):
+    """Нормализует громкость по пику, как это делает Coqui при сохранении WAV"""
+    data = np.asarray(samples, dtype=np.float32).reshape(-1)
+    return data / max(0.01, float(np.max(np.abs(data))) if data.size else 0.0)
+
+
+def write_wav(path: str, samples, sample_rate: int):
+    """Сохраняет моно-аудио в 16-битный WAV с нормализацией по пику"""
+    with wave.open(str(path), 'wb') as wav_file:
+        wav_file.setnchannels(1)
+        wav_file.setsampwidth(2)
+        wav_file.setframerate(int(sample_rate))
+        wav_file.writeframes(to_pcm16(normalize_peak(samples)))
+
+
+def concatenate(segments: list, sample_rate: int, silence_ms: int = 0, crossfade_ms: int = 0, gaps_ms: list = None):
+    """
+    Склеивает фрагменты аудио.
+    @param silence_ms: Тишина между фрагментами.
+    @param crossfade_ms: Длина перехода: без тишины фрагменты перекрываются,
+        с тишиной - края плавно затухают и нарастают, чтобы не было щелчков.
+    @param gaps_ms: Тишина для каждого стыка отдельно (переопределяет silence_ms).
+    """
+    fade = int(sample_rate * crossfade_ms / 1000)
+    parts = []
+    for index, segment in enumerate(segments):
+        data = np.asarray(segment, dtype=np.float32).reshape(-1)
+        if not parts:
+            parts.append(data)
+            continue
+
+        gap = int(sample_rate * (gaps_ms[index - 1] if gaps_ms else silence_ms) / 1000)
+        previous = parts[-1]
+        n = min(fade, len(previous), len(data))
+        ramp = np.linspace(0.0, 1.0, n, dtype=np.float32) if n else None
+        if gap > 0:
+            if n:
+                previous = previous.copy()
+                previous[-n:] *= ramp[::-1]
+                data = data.copy()
+                data[:n] *= ramp
+                parts[-1] = previous
+            parts.append(np.zeros(gap, dtype=np.float32))
+            parts.append(data)
+        elif n:
+            overlap = previous[-n:] * ramp[::-1] + data[:n] * ramp
+            parts[-1] = previous[:-n]
+            parts.append(overlap)
+            parts.append(data[n:])
+        else:
+            parts.append(data)
+
+    if not parts:
+        return np.zeros(0, dtype=np.float32)
+    return np.concatenate(parts)
+
+
+def duration_seconds(samples, sample_rate: int) -> float:
+    """Длительность аудио в секундах"""
+    return len(np.asarray(samples).reshape(-1)) / float(sample_rate)
+
+
+def wav_header(sample_rate: int, data_size: int = None) -> bytes:
+    """
+    Заголовок 16-битного моно WAV.
+    Без data_size размеры помечаются как 0xFFFFFFFF, чтобы плееры
+    воспроизводили поток неизвестной длины по мере поступления данных.
+    """
+    sample_rate = int(sample_rate)
+    riff_size = 0xFFFFFFFF if data_size is None else 36 + data_size
+    data_size = 0xFFFFFFFF if data_size is None else data_size
+    return (
+        b'RIFF' + struct.pack('<I', riff_size) + b'WAVE'
+        + b'fmt ' + struct.pack('<IHHIIHH', 16, 1, 1, sample_rate, sample_rate * 2, 2, 16)
+        + b'data' + struct.pack('<I', data_size)
+    )
+
+
+def read_wav(path: str):
+    """
+    Читает PCM WAV в моно float32 [-1, 1].
+    @return: (сэмплы, частота дискретизации)
+    """
+    with wave.open(str(path), 'rb') as wav_file:
+        channels = wav_file.getnchannels()
+        width = wav_file.getsampwidth()
+        sample_rate = wav_file.getframerate()
+        frames = wav_file.readframes(wav_file.getnframes())
+
+    if width == 1:
+        data = (np.frombuffer(frames, dtype=np.uint8).astype(np.float32) - 128) / 128
+    elif width == 2:
+        data = np.frombuffer(frames, dtype='<i2').astype(np.float32) / 32768
+    elif width == 4:
+        data = np.frombuffer(frames, dtype='<i4').astype(np.float32) / 2147483648
+    else:
+        raise ValueError(f'Неподдерживаемая разрядность WAV: {width * 8} бит')
+    if channels > 1:
+        data = data.reshape(-1, channels).mean(axis=1)
+    return data, sample_rate
+
+
+def resample(samples, source_rate: int, target_rate: int):
+    """Линейная передискретизация (достаточно для образца голоса)"""
+    data = np.asarray(samples, dtype=np.float32).reshape(-1)
+    if source_rate == target_rate or not data.size:
+        return data
+    length = int(round(len(data) * target_rate / source_rate))
+    positions = np.arange(length, dtype=np.float64) * source_rate / target_rate
+    return np.interp(positions, np.arange(len(data)), data).astype(np.float32)
+
+
+def trim_silence(samples, threshold: float = 0.01):
+    """Убирает тишину в начале и в конце (ниже threshold от пика)"""
+    data = np.asarray(samples, dtype=np.float32).reshape(-1)
+    if not data.size:
+        return data
+    loud = np.flatnonzero(np.abs(data) > threshold * max(float(np.max(np.abs(data))), 1e-6))
+    if not loud.size:
+        return data[:0]
+    return data[loud[0]:loud[-1] + 1]
@@ -0,0 +1,183 @@
+import threading
+import time
+from collections import Counter
+from concurrent.futures import Future
+
+from services.config import env_bool, env_int
+
+
+class BatchScheduler:
+    """
+    Собирает короткие запросы к одной и той же модели (и тому же спикеру/языку)
+    в пакеты: пакет отправляется, когда набрано max_batch запросов
+    или самый старый запрос ждет дольше max_wait_ms.
+    """
+
+    def __init__(self, dispatch, max_batch: int = 8, max_wait_ms: int = 20, max_chars: int = 200, enabled: bool = True):
+        """
+        @param dispatch: Функция dispatch(key, items) -> concurrent.futures.Future со списком
+            результатов (None или исключение) в порядке items.
+        @param max_batch: Максимальный размер пакета.
+        @param max_wait_ms: Сколько ждать попутные запросы после первого запроса в пакете.
+        @param max_chars: Запросы длиннее этого числа символов не пакетируются.
+        """
+        self._dispatch = dispatch
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000
+        self.max_chars = max_chars
+        self.enabled = enabled
+        self._pending = {}
+        self._cond = threading.Condition()
+        self._thread = None
+        self.batch_sizes = Counter()
+        self.requests = 0
+        self.total_wait = 0.0
+
+    def accepts(self, text: str, speaker_wav=None) -> bool:
+        """Подходит ли запрос для пакетирования (короткий текст без разового образца голоса)"""
+        return self.enabled and not speaker_wav and len(text) <= self.max_chars
+
+    def submit(self, key: tuple, item: dict) -> Future:
+        """Добавляет запрос в пакет с ключом key и возвращает Future его результата"""
+        future = Future()
+        with self._cond:
+            self._ensure_thread()
+            self._pending.setdefault(key, []).append((time.monotonic(), item, future))
+            self.requests += 1
+            self._cond.notify()
+        return future
+
+    def stats(self) -> dict:
+        with self._cond:
+            batches = sum(self.batch_sizes.values())
+            dispatched = sum(size * count for size, count in self.batch_sizes.items())
+            return {
+                'enabled': self.enabled,
+                'max_batch': self.max_batch,
+                'max_wait_ms': int(self.max_wait * 1000),
+                'requests': self.requests,
+                'batches': batches,
+                'mean_batch_size': round(dispatched / batches, 3) if batches else 0.0,
+                'mean_wait_ms': round(self.total_wait / dispatched * 1000, 3) if batches else 0.0,
+                'batch_size_histogram': {str(size): count for size, count in sorted(self.batch_sizes.items())},
+                'pending': sum(len(items) for items in self._pending.values()),
+            }
+
+    def _ensure_thread(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._loop, name='tts-batcher', daemon=True)
+            self._thread.start()
+
+    def _loop(self):
+        while True:
+            with self._cond:
+                while not self._pending:
+                    self._cond.wait()
+                ready, timeout = self._collect_ready()
+                if not ready:
+                    self._cond.wait(timeout)
+                    continue
+            for key, batch in ready:
+                self._run(key, batch)
+
+    def _collect_ready(self):
+        """Забирает готовые пакеты; возвращает их и время до ближайшего дедлайна"""
+        now = time.monotonic()
+        ready = []
+        timeout = self.max_wait
+        for key in list(self._pending):
+            items = self._pending[key]
+            waited = now - items[0][0]
+            if len(items) >= self.max_batch or waited >= self.max_wait:
+                batch, rest = items[:self.max_batch], items[self.max_batch:]
+                if rest:
+                    self._pending[key] = rest
+                else:
+                    del self._pending[key]
+                ready.append((key, batch))
+                for queued_at, _, _ in batch:
+                    self.total_wait += now - queued_at
+                self.batch_sizes[len(batch)] += 1
+            else:
+                timeout = min(timeout, self.max_wait - waited)
+        return ready, max(timeout, 0.001)
+
+    def _run(self, key, batch):
+        futures = [future for _, _, future in batch]
+        try:
+            result = self._dispatch(key, [item for _, item, _ in batch])
+        except Exception as e:
+            for future in futures:
+                future.set_exception(e)
+            return
+
+        def scatter(done):
+            try:
+                outcomes = done.result()
+            except Exception as e:
+                outcomes = [e] * len(futures)
+            for future, outcome in zip(futures, outcomes):
+                if isinstance(outcome, BaseException):
+                    future.set_exception(outcome)
+                else:
+                    future.set_result(outcome)
+
+        result.add_done_callback(scatter)
+
+
+def supports_padded_batch(tts, tts_params: dict) -> bool:
+    """
+    Можно ли прогнать несколько текстов через модель одним тензором.
+    Поддерживается VITS без клонирования голоса: его inference принимает x_lengths.
+    """
+    model = getattr(getattr(tts, 'synthesizer', None), 'tts_model', None)
+    if type(model).__name__ != 'Vits' or 'speaker_wav' in tts_params:
+        return False
+    args = getattr(model, 'args', None)
+    if getattr(args, 'use_d_vector_file', False) or getattr(args, 'use_language_embedding', False):
+        return False
+    speaker = tts_params.get('speaker')
+    if speaker is not None:
+        manager = getattr(model, 'speaker_manager', None)
+        return manager is not None and speaker in getattr(manager, 'name_to_id', {})
+    return True
+
+
+def padded_batch_inference(tts, texts: list, tts_params: dict) -> list:
+    """Синтезирует несколько текстов одним дополненным (padded) пакетом VITS"""
+    import torch
+
+    model = tts.synthesizer.tts_model
+    device = next(model.parameters()).device
+    sequences = [model.tokenizer.text_to_ids(text) for text in texts]
+    lengths = torch.tensor([len(seq) for seq in sequences], dtype=torch.long, device=device)
+    x = torch.zeros((len(sequences), int(lengths.max())), dtype=torch.long, device=device)
+    for index, seq in enumerate(sequences):
+        x[index, :len(seq)] = torch.tensor(seq, dtype=torch.long, device=device)
+
+    speaker_ids = None
+    if tts_params.get('speaker') is not None:
+        speaker_id = model.speaker_manager.name_to_id[tts_params['speaker']]
+        speaker_ids = torch.full((len(sequences),), speaker_id, dtype=torch.long, device=device)
+
+    with torch.no_grad():
+        outputs = model.inference(x, aux_input={
+            'x_lengths': lengths,
+            'speaker_ids': speaker_ids,
+            'd_vectors': None,
+            'language_ids': None,
+            'durations': None,
+        })
+
+    # Длина каждого результата определяется маской кадров, умноженной на число сэмплов в кадре
+    audio = outputs['model_outputs'].squeeze(1).cpu().numpy()
+    samples_per_frame = audio.shape[1] // outputs['y_mask'].shape[-1]
+    frames = outputs['y_mask'].sum(dim=(1, 2)).long().tolist()
+    return [audio[index, :frames[index] * samples_per_frame] for index in range(len(sequences))]
+
+
+# Параметры пакетирования задаются через переменные окружения
+BATCH_ENABLED = env_bool('TTS_BATCH_ENABLED', False)
+BATCH_MAX_SIZE = env_int('TTS_BATCH_MAX_SIZE', 8)
+BATCH_MAX_WAIT_MS = env_int('TTS_BATCH_MAX_WAIT_MS', 20)
+BATCH_MAX_CHARS = env_int('TTS_BATCH_MAX_CHARS', 200)
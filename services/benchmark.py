@@ -0,0 +1,276 @@
+"""
+Бенчмарк моделей: время загрузки, время до первого аудио (TTFA), RTF,
+перцентили задержки, пиковая память (RSS процесса, VRAM) и пропускная способность
+при нескольких одновременных клиентах. Результат - JSON для отслеживания трендов.
+
+Работает и на CPU с небольшими моделями:
+    python -m services.benchmark --models tts_models/en/ljspeech/vits --devices cpu --runs 3 --output bench.json
+"""
+import argparse
+import json
+import logging
+import os
+import platform
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from services.log import configure_logging
+
+logger = logging.getLogger(__name__)
+
+# Стандартный корпус: короткий, средний и длинный текст
+CORPUS = {
+    'short': 'Hello, how are you today?',
+    'medium': (
+        'The quick brown fox jumps over the lazy dog. Speech synthesis turns written text '
+        'into natural sounding audio, one sentence at a time.'
+    ),
+    'long': (
+        'Text to speech systems are evaluated by how natural and how fast they are. '
+        'Naturalness is usually measured by listening tests, while speed is measured by the real time factor, '
+        'the ratio of synthesis time to the duration of the produced audio. '
+        'A real time factor below one means that audio is produced faster than it can be played. '
+        'For interactive applications the time to first audio matters even more, because the listener '
+        'starts hearing speech as soon as the first sentence is ready.'
+    ),
+}
+
+DEFAULT_MODELS = ['tts_models/en/ljspeech/vits']
+
+
+def percentiles(values: list) -> dict:
+    if not values:
+        return {}
+    return {
+        'p50': round(float(np.percentile(values, 50)), 4),
+        'p95': round(float(np.percentile(values, 95)), 4),
+        'p99': round(float(np.percentile(values, 99)), 4),
+        'mean': round(float(np.mean(values)), 4),
+    }
+
+
+def current_rss() -> int:
+    """Текущий RSS процесса в байтах (Linux), иначе пик"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError, AttributeError):
+        return peak_rss()
+
+
+def peak_rss() -> int:
+    """
+    Пиковый RSS процесса в байтах (ru_maxrss: КБ в Linux, байты в macOS).
+    В Windows модуля resource нет: берется peak_wset из psutil, если он установлен, иначе 0.
+    """
+    try:
+        import resource
+    except ImportError:
+        try:
+            import psutil
+            memory = psutil.Process().memory_info()
+            return getattr(memory, 'peak_wset', memory.rss)
+        except ImportError:
+            return 0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+def _cuda(device: str):
+    if device.startswith('cpu'):
+        return None
+    import torch
+    return torch.device(device)
+
+
+def _synchronize(device: str):
+    cuda_device = _cuda(device)
+    if cuda_device is not None:
+        import torch
+        torch.cuda.synchronize(cuda_device)
+
+
+def _synthesize(tts, text: str, tts_params: dict, language: str, device: str):
+    """Синтез по сегментам, как при потоковой отдаче. Возвращает (TTFA, общее время, длительность аудио)"""
+    from services.pipeline import segment_text
+    from services.tts import get_max_segment_chars, get_output_sample_rate, synthesize_text
+
+    segments = segment_text(text, get_max_segment_chars(tts, language)) or [(text, True)]
+    samples = 0
+    ttfa = None
+    started = time.perf_counter()
+    for segment, _ in segments:
+        samples += len(np.asarray(synthesize_text(tts, segment, tts_params)).reshape(-1))
+        _synchronize(device)
+        if ttfa is None:
+            ttfa = time.perf_counter() - started
+    total = time.perf_counter() - started
+    return ttfa, total, samples / get_output_sample_rate(tts)
+
+
+def benchmark_model(model_name: str, device: str, runs: int = 3, concurrency: int = 4,
+                    corpus: dict = None, language: str = None, speaker_wav: str = None) -> dict:
+    """
+    Прогоняет корпус на модели и устройстве, возвращает метрики.
+    Модель загружается в отдельный пул и выгружается после прогона: общий пул,
+    из которого обслуживаются запросы, бенчмарк не трогает.
+    """
+    from services.model_pool import ModelPool
+    from services.tts import load_tts
+
+    pool = ModelPool(load_tts, max_models=1)
+    try:
+        return _benchmark_model(pool, model_name, device, runs, concurrency, corpus, language, speaker_wav)
+    finally:
+        pool.clear()
+
+
+def _benchmark_model(pool, model_name: str, device: str, runs: int, concurrency: int, corpus: dict,
+                     language: str, speaker_wav: str) -> dict:
+    from services.tts import resolve_tts_params
+
+    corpus = corpus or CORPUS
+    cuda_device = _cuda(device)
+    if cuda_device is not None:
+        import torch
+        torch.cuda.reset_peak_memory_stats(cuda_device)
+
+    # Время загрузки меряем с холодного старта (в отдельном пуле модели еще нет)
+    rss_before = current_rss()
+    started = time.perf_counter()
+    tts = pool.get(model_name, device)
+    load_seconds = time.perf_counter() - started
+    rss_after_load = current_rss()
+
+    if language is None and getattr(tts, 'languages', None):
+        language = 'en' if 'en' in tts.languages else tts.languages[0]
+    tts_params = resolve_tts_params(tts, model_name, speaker_wav, language)
+
+    # Прогрев: первый синтез платит за инициализацию и в статистику не входит
+    _synthesize(tts, corpus['short'] if 'short' in corpus else next(iter(corpus.values())), tts_params, language, device)
+
+    texts = {}
+    all_latencies = []
+    for name, text in corpus.items():
+        latencies, ttfas, rtfs = [], [], []
+        audio_seconds = 0.0
+        for _ in range(runs):
+            ttfa, total, audio_seconds = _synthesize(tts, text, tts_params, language, device)
+            latencies.append(total)
+            ttfas.append(ttfa)
+            rtfs.append(total / audio_seconds if audio_seconds else 0.0)
+        all_latencies.extend(latencies)
+        texts[name] = {
+            'chars': len(text),
+            'audio_seconds': round(audio_seconds, 3),
+            'latency_seconds': percentiles(latencies),
+            'ttfa_seconds': percentiles(ttfas),
+            'rtf': percentiles(rtfs),
+        }
+
+    # Пропускная способность: concurrency клиентов шлют короткие тексты к одной реплике
+    throughput = None
+    if concurrency > 1:
+        text = corpus.get('short') or next(iter(corpus.values()))
+        requests = concurrency * runs
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            results = list(pool.map(
+                lambda _: _synthesize(tts, text, tts_params, language, device), range(requests)
+            ))
+        elapsed = time.perf_counter() - started
+        throughput = {
+            'clients': concurrency,
+            'requests': requests,
+            'requests_per_second': round(requests / elapsed, 3),
+            'audio_seconds_per_second': round(sum(r[2] for r in results) / elapsed, 3),
+            'latency_seconds': percentiles([r[1] for r in results]),
+        }
+
+    result = {
+        'model_name': model_name,
+        'device': device,
+        'load_seconds': round(load_seconds, 3),
+        # RSS - показатели всего процесса: при запуске через /benchmark в них входят
+        # и модели, и запросы веб-сервера, а не только проверяемая модель
+        'process_rss_load_delta_bytes': max(0, rss_after_load - rss_before),
+        'process_peak_rss_bytes': peak_rss(),
+        'peak_vram_bytes': None,
+        'latency_seconds': percentiles(all_latencies),
+        'texts': texts,
+        'throughput': throughput,
+    }
+    if cuda_device is not None:
+        import torch
+        result['peak_vram_bytes'] = torch.cuda.max_memory_allocated(cuda_device)
+    return result
+
+
+def run_benchmark(models: list, devices: list, runs: int = 3, concurrency: int = 4,
+                  language: str = None, speaker_wav: str = None, progress_callback=None) -> dict:
+    """Бенчмарк всех сочетаний модель x устройство; ошибки записываются в результат, а не прерывают прогон"""
+    import torch
+
+    combinations = [(model_name, device) for model_name in models for device in devices]
+    results = []
+    if progress_callback:
+        progress_callback(0, len(combinations))
+    for index, (model_name, device) in enumerate(combinations):
+        logger.info('Benchmarking', extra={'model': model_name, 'device': device})
+        try:
+            results.append(benchmark_model(model_name, device, runs, concurrency,
+                                           language=language, speaker_wav=speaker_wav))
+        except Exception as e:
+            logger.error('Benchmark failed for %s on %s: %s', model_name, device, e)
+            results.append({'model_name': model_name, 'device': device, 'error': str(e)})
+        if progress_callback:
+            progress_callback(index + 1, len(combinations))
+
+    return {
+        'created_at': time.time(),
+        'host': platform.node(),
+        'python': platform.python_version(),
+        'torch': torch.__version__,
+        'cpu_count': os.cpu_count(),
+        'cuda': torch.cuda.get_device_name(0) if torch.cuda.is_available() else None,
+        'runs': runs,
+        'concurrency': concurrency,
+        'results': results,
+    }
+
+
+def main(argv: list) -> int:
+    configure_logging()
+    parser = argparse.ArgumentParser(prog='python -m services.benchmark', description='Бенчмарк моделей TTS')
+    parser.add_argument('--models', default=','.join(DEFAULT_MODELS), help='Модели через запятую')
+    parser.add_argument('--devices', default='cpu', help='Устройства через запятую: cpu, cuda:0, ...')
+    parser.add_argument('--runs', type=int, default=3, help='Повторов каждого текста')
+    parser.add_argument('--concurrency', type=int, default=4, help='Одновременных клиентов (1 - без теста нагрузки)')
+    parser.add_argument('--language', default=None, help='Язык для многоязычных моделей')
+    parser.add_argument('--speaker-wav', default=None, help='Образец голоса для моделей с клонированием')
+    parser.add_argument('--output', default=None, help='Файл для JSON-результата (по умолчанию - stdout)')
+    args = parser.parse_args(argv)
+
+    report = run_benchmark(
+        [m.strip() for m in args.models.split(',') if m.strip()],
+        [d.strip() for d in args.devices.split(',') if d.strip()],
+        runs=args.runs,
+        concurrency=args.concurrency,
+        language=args.language,
+        speaker_wav=args.speaker_wav,
+    )
+    data = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(data)
+        print(f"✅ Benchmark saved: {args.output}")
+    else:
+        print(data)
+    return 1 if any('error' in result for result in report['results']) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,268 @@
+"""
+Массовый синтез по манифесту: JSONL или CSV со строками (text, model_name, speaker, language, filename).
+
+Строки группируются по модели, чтобы модели не перезагружались по очереди, а внутри
+группы синтезируются параллельно на всех устройствах. В папку результата пишутся файлы,
+results.jsonl (по строке на каждую обработанную строку манифеста, по мере готовности)
+и summary.json с итогами и временем каждой строки. Повторный запуск с той же папкой
+пропускает строки, файлы которых уже готовы:
+    python -m services.bulk script.jsonl --output-dir output/bulk/script --model tts_models/en/ljspeech/vits --format mp3
+"""
+import argparse
+import csv
+import io
+import json
+import logging
+import os
+import re
+import sys
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, wait
+from pathlib import Path
+
+from services.config import env_int
+from services.encoding import OUTPUT_FORMATS, encode_file, output_extension, resolve_format
+from services.executor import QueueFullError
+from services.log import configure_logging, request_id_var
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_FIELDS = ('text', 'model_name', 'speaker', 'language', 'voice_id', 'filename')
+# Другие названия колонок, которые принимаются в манифесте
+FIELD_ALIASES = {'model': 'model_name', 'voice': 'voice_id', 'file': 'filename', 'output_filename': 'filename'}
+
+RESULTS_NAME = 'results.jsonl'
+SUMMARY_NAME = 'summary.json'
+
+
+def manifest_kind(filename: str) -> str:
+    """Формат манифеста по расширению: csv, tsv или jsonl (все остальные)"""
+    suffix = Path(filename).suffix.lower()
+    return suffix[1:] if suffix in ('.csv', '.tsv') else 'jsonl'
+
+
+def _records(content: str, kind: str):
+    if kind in ('csv', 'tsv'):
+        reader = csv.DictReader(io.StringIO(content), delimiter='\t' if kind == 'tsv' else ',')
+        # Первая строка CSV - заголовок, поэтому номера строк данных начинаются с 2
+        for line_number, record in enumerate(reader, start=2):
+            yield line_number, record
+        return
+    for line_number, line in enumerate(content.splitlines(), start=1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError as e:
+            raise ValueError(f'Строка {line_number}: неверный JSON ({e})')
+        if not isinstance(record, dict):
+            raise ValueError(f'Строка {line_number}: ожидается объект JSON')
+        yield line_number, record
+
+
+def _safe_filename(filename: str, audio_format: str) -> str:
+    name = re.sub(r'[^\w.\-]+', '_', Path(filename).name).strip('._')
+    if Path(name).suffix.lower() in {spec['extension'] for spec in OUTPUT_FORMATS.values()}:
+        name = name[:-len(Path(name).suffix)]
+    return f'{name}{output_extension(audio_format)}' if name else ''
+
+
+def parse_manifest(content: str, kind: str = 'jsonl', defaults: dict = None, audio_format: str = 'wav') -> list:
+    """
+    Разбирает манифест в список строк для синтеза.
+    @param defaults: Значения для пустых колонок (model_name, language, speaker, voice_id).
+    @raise ValueError: Если строка без текста или модели, имена файлов повторяются
+        или строк больше TTS_BULK_MAX_ROWS.
+    """
+    defaults = defaults or {}
+    rows = []
+    filenames = set()
+    for line_number, record in _records(content, kind):
+        record = {FIELD_ALIASES.get(str(k).strip().lower(), str(k).strip().lower()): v for k, v in record.items() if k}
+        row = {field: (str(record.get(field) or '').strip() or defaults.get(field) or None) for field in MANIFEST_FIELDS}
+        row['index'] = len(rows) + 1
+        if not row['text']:
+            raise ValueError(f'Строка {line_number}: текст не может быть пустым')
+        if not row['model_name']:
+            raise ValueError(f'Строка {line_number}: не указана модель')
+        row['filename'] = _safe_filename(row['filename'] or f"{row['index']:05d}", audio_format)
+        if not row['filename']:
+            raise ValueError(f'Строка {line_number}: неверное имя файла')
+        if row['filename'] in filenames:
+            raise ValueError(f"Строка {line_number}: имя файла {row['filename']} уже используется")
+        filenames.add(row['filename'])
+        rows.append(row)
+        if len(rows) > BULK_MAX_ROWS:
+            raise ValueError(f'Слишком много строк в манифесте. Максимум: {BULK_MAX_ROWS}')
+    if not rows:
+        raise ValueError('Манифест не содержит строк')
+    return rows
+
+
+def read_manifest(path: str, defaults: dict = None, audio_format: str = 'wav') -> list:
+    with open(path, encoding='utf-8-sig') as f:
+        return parse_manifest(f.read(), manifest_kind(path), defaults, audio_format)
+
+
+def group_rows(rows: list) -> dict:
+    """Строки по моделям в порядке первого упоминания модели"""
+    groups = {}
+    for row in rows:
+        groups.setdefault(row['model_name'], []).append(row)
+    return groups
+
+
+def is_produced(path: Path) -> bool:
+    """Файл строки уже готов: он появляется только после успешного синтеза и кодирования"""
+    try:
+        return path.stat().st_size > 0
+    except FileNotFoundError:
+        return False
+
+
+def default_workers() -> int:
+    """Параллельных строк по умолчанию: по числу синтезов, которые одновременно принимают устройства"""
+    from services.tts import device_scheduler
+    return max(1, len(device_scheduler.devices) * device_scheduler.max_inflight)
+
+
+def _submit_row(executor, fn, row: dict):
+    """Ставит строку в исполнитель синтеза; при переполненной очереди ждет и повторяет"""
+    while True:
+        try:
+            return executor.submit(fn, row)
+        except QueueFullError:
+            time.sleep(BULK_RETRY_SECONDS)
+
+
+def run_bulk(rows: list, output_dir: str, audio_format: str = 'wav', bitrate: int = None, workers: int = None,
+             gpu: bool = True, progress_callback=None, executor=None) -> dict:
+    """
+    Синтезирует строки манифеста в output_dir и пишет results.jsonl и summary.json.
+    Ошибка строки записывается в результат и не прерывает остальные.
+    Строки выполняются в общем исполнителе синтеза (TTS_SYNTH_WORKERS, очередь и /stats
+    учитывают их наравне с остальными запросами); одновременно в нем не больше workers строк.
+    @return: Итоги (summary.json без списка строк).
+    """
+    from services.tts import generate_audio
+
+    if executor is None:
+        from services.executor import synthesis_executor as executor
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    workers = min(workers or BULK_WORKERS or default_workers(), executor.max_workers)
+    started = time.time()
+    request_id = request_id_var.get()
+    lock = threading.Lock()
+    results = {}
+
+    def record(row: dict, **result):
+        result = {'index': row['index'], 'filename': row['filename'], 'model_name': row['model_name'], **result}
+        with lock:
+            results[row['index']] = result
+            with open(output_dir / RESULTS_NAME, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(result, ensure_ascii=False) + '\n')
+            done = len(results)
+        if progress_callback:
+            progress_callback(done, len(rows))
+
+    def synthesize(row: dict):
+        request_id_var.set(request_id)
+        dest = output_dir / row['filename']
+        wav_path = dest.with_name(dest.name + '.synth.wav')
+        row_started = time.perf_counter()
+        try:
+            generate_audio(
+                text=row['text'],
+                model_name=row['model_name'],
+                output_path=str(wav_path),
+                gpu=gpu,
+                language=row['language'],
+                speaker=row['speaker'],
+                voice_id=row['voice_id']
+            )
+            # Файл появляется под своим именем только готовым, поэтому прерванная строка повторится
+            encode_file(str(wav_path), str(dest), audio_format, bitrate)
+            record(row, status='done', seconds=round(time.perf_counter() - row_started, 3), bytes=dest.stat().st_size)
+        except Exception as e:
+            logger.error('Bulk row %d failed: %s', row['index'], e, extra={'model': row['model_name']})
+            wav_path.unlink(missing_ok=True)
+            record(row, status='failed', seconds=round(time.perf_counter() - row_started, 3), error=str(e))
+
+    pending = []
+    for row in rows:
+        if is_produced(output_dir / row['filename']):
+            record(row, status='skipped')
+        else:
+            pending.append(row)
+
+    groups = group_rows(pending)
+    logger.info('Bulk synthesis started', extra={
+        'rows': len(rows), 'pending': len(pending), 'models': list(groups), 'workers': workers
+    })
+    for model_name, group in groups.items():
+        # Следующая модель начинается, когда закончены строки предыдущей: модели не перезагружаются по очереди
+        inflight = set()
+        for row in group:
+            if len(inflight) >= workers:
+                _, inflight = wait(inflight, return_when=FIRST_COMPLETED)
+            inflight.add(_submit_row(executor, synthesize, row))
+        wait(inflight)
+
+    ordered = [results[row['index']] for row in rows]
+    summary = {
+        'created_at': time.time(),
+        'output_dir': str(output_dir),
+        'format': audio_format,
+        'bitrate': bitrate,
+        'total': len(rows),
+        'done': sum(1 for r in ordered if r['status'] == 'done'),
+        'skipped': sum(1 for r in ordered if r['status'] == 'skipped'),
+        'failed': sum(1 for r in ordered if r['status'] == 'failed'),
+        'seconds': round(time.time() - started, 3),
+    }
+    tmp_path = output_dir / f'{SUMMARY_NAME}.part'
+    tmp_path.write_text(json.dumps({**summary, 'rows': ordered}, ensure_ascii=False, indent=2), encoding='utf-8')
+    os.replace(tmp_path, output_dir / SUMMARY_NAME)
+    logger.info('Bulk synthesis finished', extra={k: summary[k] for k in ('done', 'skipped', 'failed', 'seconds')})
+    return summary
+
+
+def main(argv: list) -> int:
+    configure_logging()
+    parser = argparse.ArgumentParser(prog='python -m services.bulk', description='Массовый синтез по манифесту')
+    parser.add_argument('manifest', help='Манифест .jsonl или .csv: text, model_name, speaker, language, filename')
+    parser.add_argument('--output-dir', required=True, help='Папка для файлов и summary.json (повторный запуск продолжает)')
+    parser.add_argument('--model', default=None, help='Модель для строк без model_name')
+    parser.add_argument('--language', default=None, help='Язык для строк без language')
+    parser.add_argument('--speaker', default=None, help='Спикер для строк без speaker')
+    parser.add_argument('--voice-id', default=None, help='Зарегистрированный голос для строк без voice_id')
+    parser.add_argument('--format', default=None, help=f'Формат файлов: {", ".join(OUTPUT_FORMATS)}')
+    parser.add_argument('--bitrate', default=None, help='Битрейт для mp3/opus/ogg, например 48k')
+    parser.add_argument('--workers', type=int, default=0, help='Параллельных строк (0 - по числу устройств)')
+    parser.add_argument('--cpu', action='store_true', help='Синтез только на CPU')
+    args = parser.parse_args(argv)
+
+    try:
+        audio_format, bitrate = resolve_format(args.format, args.bitrate)
+        defaults = {'model_name': args.model, 'language': args.language, 'speaker': args.speaker, 'voice_id': args.voice_id}
+        rows = read_manifest(args.manifest, defaults, audio_format)
+    except (OSError, ValueError) as e:
+        print(f'❌ {e}')
+        return 2
+
+    summary = run_bulk(rows, args.output_dir, audio_format, bitrate, workers=args.workers, gpu=not args.cpu)
+    print(json.dumps(summary, ensure_ascii=False, indent=2))
+    return 1 if summary['failed'] else 0
+
+
+# Лимит строк в одном манифесте и число параллельных строк (0 - по числу устройств)
+BULK_MAX_ROWS = env_int('TTS_BULK_MAX_ROWS', 10000)
+BULK_WORKERS = env_int('TTS_BULK_WORKERS', 0)
+# Пауза перед повторной постановкой строки, когда очередь синтеза переполнена
+BULK_RETRY_SECONDS = 0.5
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
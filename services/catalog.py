@@ -0,0 +1,853 @@
+"""
+Каталог моделей TTS: описания моделей по категориям и индексы для быстрых запросов
+(по id, языку и возможностям). Индексы и JSON-ответы строятся один раз при импорте;
+ответы с фильтрами кэшируются вместе с ETag.
+"""
+import hashlib
+import json
+import threading
+
+# Доступные модели TTS с подробными описаниями
+AVAILABLE_MODELS = {
+    '🌍 Многоязычные модели с клонированием голоса': [
+        {
+            'id': 'tts_models/multilingual/multi-dataset/xtts_v2',
+            'name': 'XTTS v2 Multilingual',
+            'description': 'XTTS-v2.0.3 by Coqui с поддержкой 17 языков и клонированием голоса',
+            'language': 'multilingual',
+            'gender': 'mixed',
+            'quality': 'high',
+            'voice_cloning': True,
+            'speakers': True,
+            'default_speakers': ['female', 'male'],
+            'supported_languages': ['en', 'es', 'fr', 'de', 'it', 'pt', 'pl', 'tr', 'ru', 'nl', 'cs', 'ar', 'zh-cn', 'ja', 'hu', 'ko', 'hi']
+        },
+        {
+            'id': 'tts_models/multilingual/multi-dataset/xtts_v1.1',
+            'name': 'XTTS v1.1 Multilingual',
+            'description': 'XTTS-v1.1 с поддержкой 14 языков и клонированием голоса',
+            'language': 'multilingual',
+            'gender': 'mixed',
+            'quality': 'high',
+            'voice_cloning': True,
+            'speakers': True,
+            'default_speakers': ['female', 'male'],
+            'supported_languages': ['en', 'es', 'fr', 'de', 'it', 'pt', 'pl', 'tr', 'ru', 'nl', 'cs', 'ar', 'zh-cn', 'ja']
+        },
+        {
+            'id': 'tts_models/multilingual/multi-dataset/your_tts',
+            'name': 'YourTTS Multilingual',
+            'description': 'Your TTS модель с клонированием голоса и поддержкой множества языков',
+            'language': 'multilingual',
+            'gender': 'mixed',
+            'quality': 'high',
+            'voice_cloning': True,
+            'speakers': True,
+            'supported_languages': ['en', 'fr-fr', 'pt-br']
+        },
+        {
+            'id': 'tts_models/multilingual/multi-dataset/bark',
+            'name': 'Bark Multilingual',
+            'description': '🐶 Bark TTS модель с эмоциями и клонированием голоса',
+            'language': 'multilingual',
+            'gender': 'mixed',
+            'quality': 'high',
+            'voice_cloning': True,
+            'speakers': True,
+            'supported_languages': ['en', 'es', 'fr', 'de', 'it', 'pt', 'pl', 'tr', 'ru', 'nl', 'cs', 'ar', 'zh-cn', 'ja', 'hu', 'ko', 'hi']
+        }
+    ],
+    '🇷🇺 Русские модели': [
+        {
+            'id': 'tts_models/multilingual/multi-dataset/xtts_v2',
+            'name': 'XTTS v2 (Русский)',
+            'description': 'XTTS-v2.0.3 с поддержкой русского языка и клонированием голоса',
+            'language': 'ru',
+            'gender': 'mixed',
+            'quality': 'high',
+            'voice_cloning': True,
+            'speakers': True,
+            'default_speakers': ['female', 'male'],
+            'supported_languages': ['ru']
+        }
+    ],
+    '🇺🇸 Английские модели': [
+        {
+            'id': 'tts_models/en/ljspeech/tacotron2-DDC',
+            'name': 'LJSpeech Tacotron2-DDC',
+            'description': 'Tacotron2 с Double Decoder Consistency - высококачественная английская речь',
+            'language': 'en',
+            'gender': 'mixed',
+            'quality': 'high',
+            'voice_cloning': False,
+            'speakers': False
+        },
+        {
+            'id': 'tts_models/en/ljspeech/tacotron2-DDC_ph',
+            'name': 'LJSpeech Tacotron2-DDC Phonemes',
+            'description': 'Tacotron2 с Double Decoder Consistency и фонемами',
+            'language': 'en',
+            'gender': 'mixed',
+            'quality': 'high',
+            'voice_cloning': False,
+            'speakers': False
+        },
+        {
+            'id': 'tts_models/en/ljspeech/glow-tts',
+            'name': 'LJSpeech Glow-TTS',
+            'description': 'Glow-TTS модель с контролем темпа речи',
+            'language': 'en',
+            'gender': 'mixed',
+            'quality': 'high',
+            'voice_cloning': False,
+            'speakers': False
+        },
+        {
+            'id': 'tts_models/en/ljspeech/speedy-speech',
+            'name': 'LJSpeech Speedy Speech',
+            'description': 'Speedy Speech с Alignment Network для изучения длительностей',
+            'language': 'en',
+            'gender': 'mixed',
+            'quality': 'medium',
+            'voice_cloning': False,
+            'speakers': False
+        },
+        {
+            'id': 'tts_models/en/ljspeech/tacotron2-DCA',
+            'name': 'LJSpeech Tacotron2-DCA',
+            'description': 'Tacotron2 с Double Decoder Consistency',
+            'language': 'en',
+            'gender': 'mixed',
+            'quality': 'high',
+            'voice_cloning': False,
+            'speakers': False
+        },
+        {
+            'id': 'tts_models/en/ljspeech/vits',
+            'name': 'LJSpeech VITS',
+            'description': 'VITS End2End TTS модель с фонемами',
+            'language': 'en',
+            'gender': 'mixed',
+            'quality': 'high',
+            'voice_cloning': False,
+            'speakers': False
+        },
+        {
+            'id': 'tts_models/en/ljspeech/fast_pitch',
+            'name': 'LJSpeech FastPitch',
+            'description': 'FastPitch модель с Aligner Network',
+            'language': 'en',
+            'gender': 'mixed',
+            'quality': 'medium',
+            'voice_cloning': False,
+            'speakers': False
+        },
+        {
+            'id': 'tts_models/en/ljspeech/overflow',
+            'name': 'LJSpeech Overflow',
+            'description': 'Overflow модель, обученная на LJSpeech',
+            'language': 'en',
+            'gender': 'mixed',
+            'quality': 'high',
+            'voice_cloning': False,
+            'speakers': False
+        },
+        {
+            'id': 'tts_models/en/ljspeech/neural_hmm',
+            'name': 'LJSpeech Neural HMM',
+            'description': 'Neural HMM модель, обученная на LJSpeech',
+            'language': 'en',
+            'gender': 'mixed',
+            'quality': 'high',
+            'voice_cloning': False,
+            'speakers': False
+        },
+        {
+            'id': 'tts_models/en/vctk/vits',
+            'name': 'VCTK VITS',
+            'description': 'VITS модель с 109 различными спикерами с английским акцентом',
+            'language': 'en',
+            'gender': 'mixed',
+            'quality': 'high',
+            'voice_cloning': False,
+            'speakers': True
+        },
+        {
+            'id': 'tts_models/en/vctk/fast_pitch',
+            'name': 'VCTK FastPitch',
+            'description': 'FastPitch модель, обученная на VCTK датасете',
+            'language': 'en',
+            'gender': 'mixed',
+            'quality': 'medium',
+            'voice_cloning': False,
+            'speakers': True
+        },
+        {
+            'id': 'tts_models/en/sam/tacotron-DDC',
+            'name': 'Sam Tacotron-DDC',
+            'description': 'Tacotron2 с Double Decoder Consistency, обученная на Sam датасете',
+            'language': 'en',
+            'gender': 'mixed',
+            'quality': 'high',
+            'voice_cloning': False,
+            'speakers': False
+        },
+        {
+            'id': 'tts_models/en/blizzard2013/capacitron-t2-c50',
+            'name': 'Blizzard2013 Capacitron-T2-C50',
+            'description': 'Capacitron добавления к Tacotron 2 с Capacity 50',
+            'language': 'en',
+            'gender': 'mixed',
+            'quality': 'high',
+            'voice_cloning': False,
+            'speakers': False
+        },
+        {
+            'id': 'tts_models/en/blizzard2013/capacitron-t2-c150_v2',
+            'name': 'Blizzard2013 Capacitron-T2-C150 v2',
+            'description': 'Capacitron добавления к Tacotron 2 с Capacity 150',
+            'language': 'en',
+            'gender': 'mixed',
+            'quality': 'high',
+            'voice_cloning': False,
+            'speakers': False
+        },
+        {
+            'id': 'tts_models/en/multi-dataset/tortoise-v2',
+            'name': 'Tortoise v2',
+            'description': 'Tortoise TTS модель с высоким качеством',
+            'language': 'en',
+            'gender': 'mixed',
+            'quality': 'high',
+            'voice_cloning': False,
+            'speakers': False
+        },
+        {
+            'id': 'tts_models/en/jenny/jenny',
+            'name': 'Jenny VITS',
+            'description': 'VITS модель, обученная на Jenny(Dioco) датасете',
+            'language': 'en',
+            'gender': 'female',
+            'quality': 'high',
+            'voice_cloning': False,
+            'speakers': False
+        },
+        {
+            'id': 'tts_models/en/ek1/tacotron2',
+            'name': 'EK1 Tacotron2',
+            'description': 'EK1 en-rp tacotron2 by NMStoker',
+            'language': 'en',
+            'gender': 'mixed',
+            'quality': 'high',
+            'voice_cloning': False,
+            'speakers': False
+        }
+    ],
+    '🇩🇪 Немецкие модели': [
+        {
+            'id': 'tts_models/de/thorsten/tacotron2-DDC',
+            'name': 'Thorsten Tacotron2-DDC',
+            'description': 'Thorsten-Dec2021-22k-DDC - высококачественная немецкая речь',
+            'language': 'de',
+            'gender': 'mixed',
+            'quality': 'high',
+            'voice_cloning': False,
+            'speakers': False
+        },
+        {
+            'id': 'tts_models/de/thorsten/tacotron2-DCA',
+            'name': 'Thorsten Tacotron2-DCA',
+            'description': 'Tacotron2 с Double Decoder Consistency для немецкого языка',
+            'language': 'de',
+            'gender': 'mixed',
+            'quality': 'high',
+            'voice_cloning': False,
+            'speakers': False
+        },
+        {
+            'id': 'tts_models/de/thorsten/vits',
+            'name': 'Thorsten VITS',
+            'description': 'VITS модель для немецкого языка',
+            'language': 'de',
+            'gender': 'mixed',
+            'quality': 'high',
+            'voice_cloning': False,
+            'speakers': False
+        },
+        {
+            'id': 'tts_models/de/css10/vits-neon',
+            'name': 'German CSS10 VITS-Neon',
+            'description': 'VITS-Neon модель для немецкого языка',
+            'language': 'de',
+            'gender': 'mixed',
+            'quality': 'high',
+            'voice_cloning': False,
+            'speakers': False
+        }
+    ],
+    '🇫🇷 Французские модели': [
+        {
+            'id': 'tts_models/fr/mai/tacotron2-DDC',
+            'name': 'MAI French Tacotron2-DDC',
+            'description': 'Tacotron2 с Double Decoder Consistency для французского языка',
+            'language': 'fr',
+            'gender': 'mixed',
+            'quality': 'high',
+            'voice_cloning': False,
+            'speakers': False
+        },
+        {
+            'id': 'tts_models/fr/css10/vits',
+            'name': 'French CSS10 VITS',
+            'description': 'VITS модель для французского языка',
+            'language': 'fr',
+            'gender': 'mixed',
+            'quality': 'high',
+            'voice_cloning': False,
+            'speakers': False
+        }
+    ],
+    '🇪🇸 Испанские модели': [
+        {
+            'id': 'tts_models/es/mai/tacotron2-DDC',
+            'name': 'MAI Spanish Tacotron2-DDC',
+            'description': 'Tacotron2 с Double Decoder Consistency для испанского языка',
+            'language': 'es',
+            'gender': 'mixed',
+            'quality': 'high',
+            'voice_cloning': False,
+            'speakers': False
+        },
+        {
+            'id': 'tts_models/es/css10/vits',
+            'name': 'Spanish CSS10 VITS',
+            'description': 'VITS модель для испанского языка',
+            'language': 'es',
+            'gender': 'mixed',
+            'quality': 'high',
+            'voice_cloning': False,
+            'speakers': False
+        }
+    ],
+    '🇮🇹 Итальянские модели': [
+        {
+            'id': 'tts_models/it/mai_female/glow-tts',
+            'name': 'MAI Italian Female Glow-TTS',
+            'description': 'GlowTTS модель для итальянского языка (женский голос)',
+            'language': 'it',
+            'gender': 'female',
+            'quality': 'high',
+            'voice_cloning': False,
+            'speakers': False
+        },
+        {
+            'id': 'tts_models/it/mai_female/vits',
+            'name': 'MAI Italian Female VITS',
+            'description': 'VITS модель для итальянского языка (женский голос)',
+            'language': 'it',
+            'gender': 'female',
+            'quality': 'high',
+            'voice_cloning': False,
+            'speakers': False
+        },
+        {
+            'id': 'tts_models/it/mai_male/glow-tts',
+            'name': 'MAI Italian Male Glow-TTS',
+            'description': 'GlowTTS модель для итальянского языка (мужской голос)',
+            'language': 'it',
+            'gender': 'male',
+            'quality': 'high',
+            'voice_cloning': False,
+            'speakers': False
+        },
+        {
+            'id': 'tts_models/it/mai_male/vits',
+            'name': 'MAI Italian Male VITS',
+            'description': 'VITS модель для итальянского языка (мужской голос)',
+            'language': 'it',
+            'gender': 'male',
+            'quality': 'high',
+            'voice_cloning': False,
+            'speakers': False
+        }
+    ],
+    '🇯🇵 Японские модели': [
+        {
+            'id': 'tts_models/ja/kokoro/tacotron2-DDC',
+            'name': 'Japanese Kokoro Tacotron2-DDC',
+            'description': 'Tacotron2 с Double Decoder Consistency, обученная на Kokoro Speech Dataset',
+            'language': 'ja',
+            'gender': 'mixed',
+            'quality': 'high',
+            'voice_cloning': False,
+            'speakers': False
+        }
+    ],
+    '🇨🇳 Китайские модели': [
+        {
+            'id': 'tts_models/zh-CN/baker/tacotron2-DDC-GST',
+            'name': 'Chinese Baker Tacotron2-DDC-GST',
+            'description': 'Tacotron2 с Double Decoder Consistency и GST для китайского языка',
+            'language': 'zh',
+            'gender': 'mixed',
+            'quality': 'high',
+            'voice_cloning': False,
+            'speakers': False
+        }
+    ],
+    '🇳🇱 Голландские модели': [
+        {
+            'id': 'tts_models/nl/mai/tacotron2-DDC',
+            'name': 'MAI Dutch Tacotron2-DDC',
+            'description': 'Tacotron2 с Double Decoder Consistency для голландского языка',
+            'language': 'nl',
+            'gender': 'mixed',
+            'quality': 'high',
+            'voice_cloning': False,
+            'speakers': False
+        },
+        {
+            'id': 'tts_models/nl/css10/vits',
+            'name': 'Dutch CSS10 VITS',
+            'description': 'VITS модель для голландского языка',
+            'language': 'nl',
+            'gender': 'mixed',
+            'quality': 'high',
+            'voice_cloning': False,
+            'speakers': False
+        }
+    ],
+    '🇺🇦 Украинские модели': [
+        {
+            'id': 'tts_models/uk/mai/glow-tts',
+            'name': 'MAI Ukrainian Glow-TTS',
+            'description': 'GlowTTS модель для украинского языка',
+            'language': 'uk',
+            'gender': 'mixed',
+            'quality': 'high',
+            'voice_cloning': False,
+            'speakers': False
+        },
+        {
+            'id': 'tts_models/uk/mai/vits',
+            'name': 'MAI Ukrainian VITS',
+            'description': 'VITS модель для украинского языка',
+            'language': 'uk',
+            'gender': 'mixed',
+            'quality': 'high',
+            'voice_cloning': False,
+            'speakers': False
+        }
+    ],
+    '🇹🇷 Турецкие модели': [
+        {
+            'id': 'tts_models/tr/common-voice/glow-tts',
+            'name': 'Turkish Common Voice Glow-TTS',
+            'description': 'Турецкая GlowTTS модель с неизвестным спикером из Common-Voice датасета',
+            'language': 'tr',
+            'gender': 'mixed',
+            'quality': 'high',
+            'voice_cloning': False,
+            'speakers': False
+        }
+    ],
+    '🇵🇱 Польские модели': [
+        {
+            'id': 'tts_models/pl/mai_female/vits',
+            'name': 'MAI Polish Female VITS',
+            'description': 'VITS модель для польского языка (женский голос)',
+            'language': 'pl',
+            'gender': 'female',
+            'quality': 'high',
+            'voice_cloning': False,
+            'speakers': False
+        }
+    ],
+    '🇧🇾 Белорусские модели': [
+        {
+            'id': 'tts_models/be/common-voice/glow-tts',
+            'name': 'Belarusian Common Voice Glow-TTS',
+            'description': 'Белорусская GlowTTS модель, созданная @alex73',
+            'language': 'be',
+            'gender': 'mixed',
+            'quality': 'high',
+            'voice_cloning': False,
+            'speakers': False
+        }
+    ],
+    '🌍 Другие языки': [
+        {
+            'id': 'tts_models/bg/cv/vits',
+            'name': 'Bulgarian VITS',
+            'description': 'VITS модель для болгарского языка',
+            'language': 'bg',
+            'gender': 'mixed',
+            'quality': 'high',
+            'voice_cloning': False,
+            'speakers': False
+        },
+        {
+            'id': 'tts_models/cs/cv/vits',
+            'name': 'Czech VITS',
+            'description': 'VITS модель для чешского языка',
+            'language': 'cs',
+            'gender': 'mixed',
+            'quality': 'high',
+            'voice_cloning': False,
+            'speakers': False
+        },
+        {
+            'id': 'tts_models/da/cv/vits',
+            'name': 'Danish VITS',
+            'description': 'VITS модель для датского языка',
+            'language': 'da',
+            'gender': 'mixed',
+            'quality': 'high',
+            'voice_cloning': False,
+            'speakers': False
+        },
+        {
+            'id': 'tts_models/et/cv/vits',
+            'name': 'Estonian VITS',
+            'description': 'VITS модель для эстонского языка',
+            'language': 'et',
+            'gender': 'mixed',
+            'quality': 'high',
+            'voice_cloning': False,
+            'speakers': False
+        },
+        {
+            'id': 'tts_models/ga/cv/vits',
+            'name': 'Irish VITS',
+            'description': 'VITS модель для ирландского языка',
+            'language': 'ga',
+            'gender': 'mixed',
+            'quality': 'high',
+            'voice_cloning': False,
+            'speakers': False
+        },
+        {
+            'id': 'tts_models/hu/css10/vits',
+            'name': 'Hungarian VITS',
+            'description': 'VITS модель для венгерского языка',
+            'language': 'hu',
+            'gender': 'mixed',
+            'quality': 'high',
+            'voice_cloning': False,
+            'speakers': False
+        },
+        {
+            'id': 'tts_models/el/cv/vits',
+            'name': 'Greek VITS',
+            'description': 'VITS модель для греческого языка',
+            'language': 'el',
+            'gender': 'mixed',
+            'quality': 'high',
+            'voice_cloning': False,
+            'speakers': False
+        },
+        {
+            'id': 'tts_models/fi/css10/vits',
+            'name': 'Finnish VITS',
+            'description': 'VITS модель для финского языка',
+            'language': 'fi',
+            'gender': 'mixed',
+            'quality': 'high',
+            'voice_cloning': False,
+            'speakers': False
+        },
+        {
+            'id': 'tts_models/hr/cv/vits',
+            'name': 'Croatian VITS',
+            'description': 'VITS модель для хорватского языка',
+            'language': 'hr',
+            'gender': 'mixed',
+            'quality': 'high',
+            'voice_cloning': False,
+            'speakers': False
+        },
+        {
+            'id': 'tts_models/lt/cv/vits',
+            'name': 'Lithuanian VITS',
+            'description': 'VITS модель для литовского языка',
+            'language': 'lt',
+            'gender': 'mixed',
+            'quality': 'high',
+            'voice_cloning': False,
+            'speakers': False
+        },
+        {
+            'id': 'tts_models/lv/cv/vits',
+            'name': 'Latvian VITS',
+            'description': 'VITS модель для латышского языка',
+            'language': 'lv',
+            'gender': 'mixed',
+            'quality': 'high',
+            'voice_cloning': False,
+            'speakers': False
+        },
+        {
+            'id': 'tts_models/mt/cv/vits',
+            'name': 'Maltese VITS',
+            'description': 'VITS модель для мальтийского языка',
+            'language': 'mt',
+            'gender': 'mixed',
+            'quality': 'high',
+            'voice_cloning': False,
+            'speakers': False
+        },
+        {
+            'id': 'tts_models/pt/cv/vits',
+            'name': 'Portuguese VITS',
+            'description': 'VITS модель для португальского языка',
+            'language': 'pt',
+            'gender': 'mixed',
+            'quality': 'high',
+            'voice_cloning': False,
+            'speakers': False
+        },
+        {
+            'id': 'tts_models/ro/cv/vits',
+            'name': 'Romanian VITS',
+            'description': 'VITS модель для румынского языка',
+            'language': 'ro',
+            'gender': 'mixed',
+            'quality': 'high',
+            'voice_cloning': False,
+            'speakers': False
+        },
+        {
+            'id': 'tts_models/sk/cv/vits',
+            'name': 'Slovak VITS',
+            'description': 'VITS модель для словацкого языка',
+            'language': 'sk',
+            'gender': 'mixed',
+            'quality': 'high',
+            'voice_cloning': False,
+            'speakers': False
+        },
+        {
+            'id': 'tts_models/sl/cv/vits',
+            'name': 'Slovenian VITS',
+            'description': 'VITS модель для словенского языка',
+            'language': 'sl',
+            'gender': 'mixed',
+            'quality': 'high',
+            'voice_cloning': False,
+            'speakers': False
+        },
+        {
+            'id': 'tts_models/sv/cv/vits',
+            'name': 'Swedish VITS',
+            'description': 'VITS модель для шведского языка',
+            'language': 'sv',
+            'gender': 'mixed',
+            'quality': 'high',
+            'voice_cloning': False,
+            'speakers': False
+        },
+        {
+            'id': 'tts_models/ca/custom/vits',
+            'name': 'Catalan VITS',
+            'description': 'VITS модель для каталанского языка, обученная на 101460 высказываниях от 257 спикеров',
+            'language': 'ca',
+            'gender': 'mixed',
+            'quality': 'high',
+            'voice_cloning': False,
+            'speakers': False
+        },
+        {
+            'id': 'tts_models/fa/custom/glow-tts',
+            'name': 'Persian Female Glow-TTS',
+            'description': 'Персидская GlowTTS модель (женский голос)',
+            'language': 'fa',
+            'gender': 'female',
+            'quality': 'medium',
+            'voice_cloning': False,
+            'speakers': False
+        },
+        {
+            'id': 'tts_models/bn/custom/vits-male',
+            'name': 'Bangla Male VITS',
+            'description': 'Бенгальская VITS модель (мужской голос)',
+            'language': 'bn',
+            'gender': 'male',
+            'quality': 'high',
+            'voice_cloning': False,
+            'speakers': False
+        },
+        {
+            'id': 'tts_models/bn/custom/vits-female',
+            'name': 'Bangla Female VITS',
+            'description': 'Бенгальская VITS модель (женский голос)',
+            'language': 'bn',
+            'gender': 'female',
+            'quality': 'high',
+            'voice_cloning': False,
+            'speakers': False
+        },
+        {
+            'id': 'tts_models/ewe/openbible/vits',
+            'name': 'Ewe VITS',
+            'description': 'VITS модель для языка эве',
+            'language': 'ewe',
+            'gender': 'mixed',
+            'quality': 'high',
+            'voice_cloning': False,
+            'speakers': False
+        },
+        {
+            'id': 'tts_models/hau/openbible/vits',
+            'name': 'Hausa VITS',
+            'description': 'VITS модель для языка хауса',
+            'language': 'hau',
+            'gender': 'mixed',
+            'quality': 'high',
+            'voice_cloning': False,
+            'speakers': False
+        },
+        {
+            'id': 'tts_models/lin/openbible/vits',
+            'name': 'Lingala VITS',
+            'description': 'VITS модель для языка лингала',
+            'language': 'lin',
+            'gender': 'mixed',
+            'quality': 'high',
+            'voice_cloning': False,
+            'speakers': False
+        },
+        {
+            'id': 'tts_models/tw_akuapem/openbible/vits',
+            'name': 'Twi Akuapem VITS',
+            'description': 'VITS модель для языка тви (акуапем)',
+            'language': 'tw_akuapem',
+            'gender': 'mixed',
+            'quality': 'high',
+            'voice_cloning': False,
+            'speakers': False
+        },
+        {
+            'id': 'tts_models/tw_asante/openbible/vits',
+            'name': 'Twi Asante VITS',
+            'description': 'VITS модель для языка тви (ашанти)',
+            'language': 'tw_asante',
+            'gender': 'mixed',
+            'quality': 'high',
+            'voice_cloning': False,
+            'speakers': False
+        },
+        {
+            'id': 'tts_models/yor/openbible/vits',
+            'name': 'Yoruba VITS',
+            'description': 'VITS модель для языка йоруба',
+            'language': 'yor',
+            'gender': 'mixed',
+            'quality': 'high',
+            'voice_cloning': False,
+            'speakers': False
+        }
+    ]
+}
+
+
+# Возможности модели, по которым можно фильтровать каталог
+CAPABILITIES = ('voice_cloning', 'speakers')
+
+
+def base_language(language: str) -> str:
+    """Основной код языка: 'pt-br' -> 'pt', 'zh-cn' -> 'zh'"""
+    return language.lower().split('-')[0]
+
+
+class ModelCatalog:
+    """Каталог моделей с индексами; содержимое не меняется после создания"""
+
+    def __init__(self, categories: dict, max_cached_responses: int = 256):
+        self.categories = categories
+        self.by_id = {}
+        self.by_language = {}
+        self.by_capability = {capability: set() for capability in CAPABILITIES}
+        self.max_cached_responses = max_cached_responses
+        self._responses = {}
+        self._lock = threading.Lock()
+
+        languages = {}
+        for category, models in categories.items():
+            for model in models:
+                entry = self.by_id.setdefault(model['id'], {**model, 'categories': []})
+                entry['categories'].append(category)
+                # Модель может входить в несколько категорий - заявленные языки объединяются
+                declared = languages.setdefault(model['id'], set())
+                declared.update(model.get('supported_languages') or [])
+                if model['language'] != 'multilingual':
+                    declared.add(model['language'])
+                for capability in CAPABILITIES:
+                    if model.get(capability):
+                        self.by_capability[capability].add(model['id'])
+                entry['supported_languages'] = sorted(
+                    set(entry.get('supported_languages') or []) | set(model.get('supported_languages') or [])
+                ) or None
+
+        for model_id, declared in languages.items():
+            for language in declared:
+                for key in {language.lower(), base_language(language)}:
+                    self.by_language.setdefault(key, set()).add(model_id)
+
+    def exists(self, model_id: str) -> bool:
+        return model_id in self.by_id
+
+    def get(self, model_id: str):
+        return self.by_id.get(model_id)
+
+    def supported_languages(self, model_id: str):
+        """Явно заявленные языки модели или None, если список неизвестен"""
+        entry = self.by_id.get(model_id)
+        return entry['supported_languages'] if entry else None
+
+    def matching_ids(self, language: str = None, voice_cloning: bool = None, speakers: bool = None,
+                     quality: str = None, gender: str = None) -> set:
+        """Id моделей, подходящих под все указанные условия"""
+        ids = set(self.by_id)
+        if language:
+            ids &= self.by_language.get(language.lower(), set()) | self.by_language.get(base_language(language), set())
+        for capability, wanted in (('voice_cloning', voice_cloning), ('speakers', speakers)):
+            if wanted is not None:
+                ids = ids & self.by_capability[capability] if wanted else ids - self.by_capability[capability]
+        if quality:
+            ids = {model_id for model_id in ids if self.by_id[model_id].get('quality') == quality}
+        if gender:
+            ids = {model_id for model_id in ids if self.by_id[model_id].get('gender') == gender}
+        return ids
+
+    def filter(self, **filters) -> dict:
+        """Каталог по категориям только с подходящими моделями (пустые категории опускаются)"""
+        if not any(value is not None for value in filters.values()):
+            return self.categories
+        ids = self.matching_ids(**filters)
+        result = {}
+        for category, models in self.categories.items():
+            matched = [model for model in models if model['id'] in ids]
+            if matched:
+                result[category] = matched
+        return result
+
+    def response(self, **filters) -> tuple:
+        """
+        JSON-ответ /models для фильтров: (тело в байтах, ETag).
+        Сериализация выполняется один раз на набор фильтров.
+        """
+        key = tuple(sorted((name, value) for name, value in filters.items() if value is not None))
+        cached = self._responses.get(key)
+        if cached is not None:
+            return cached
+        body = json.dumps({'models': self.filter(**filters)}, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+        cached = (body, f'"{hashlib.sha256(body).hexdigest()[:32]}"')
+        with self._lock:
+            if len(self._responses) >= self.max_cached_responses:
+                self._responses.pop(next(iter(self._responses)))
+            self._responses[key] = cached
+        return cached
+
+
+# Общий каталог моделей
+model_catalog = ModelCatalog(AVAILABLE_MODELS)
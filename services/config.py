@@ -0,0 +1,31 @@
+import os
+
+
+def env_int(name: str, default: int) -> int:
+    """Читает целое число из переменной окружения"""
+    try:
+        return int(os.environ.get(name, default))
+    except ValueError:
+        return default
+
+
+def env_float(name: str, default: float) -> float:
+    """Читает число с плавающей точкой из переменной окружения"""
+    try:
+        return float(os.environ.get(name, default))
+    except ValueError:
+        return default
+
+
+def env_bool(name: str, default: bool = False) -> bool:
+    """Читает флаг из переменной окружения (1/true/yes/on)"""
+    value = os.environ.get(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ('1', 'true', 'yes', 'on')
+
+
+def env_list(name: str, default: str = '') -> list:
+    """Читает список значений через запятую из переменной окружения"""
+    value = os.environ.get(name, default)
+    return [item.strip() for item in value.split(',') if item.strip()]
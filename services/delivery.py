@@ -0,0 +1,158 @@
+import gzip
+import hashlib
+import mimetypes
+import os
+import re
+import threading
+from pathlib import Path
+
+from services.config import env_bool
+from services.encoding import OUTPUT_FORMATS
+
+# Сгенерированные файлы не меняются (имена уникальны), поэтому их можно кэшировать надолго
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+CHUNK_SIZE = 64 * 1024
+
+# Предсжатые варианты файла: суффикс -> Content-Encoding, в порядке предпочтения
+PRECOMPRESSED_VARIANTS = (('.br', 'br'), ('.gz', 'gzip'))
+
+# Форматы, которые еще заметно сжимаются gzip (сжатые кодеки - нет)
+PRECOMPRESS_FORMATS = ('.wav',)
+
+_SAFE_FILENAME = re.compile(r'[^/\\\x00]+')
+_RANGE = re.compile(r'bytes=(\d*)-(\d*)')
+
+
+class RangeNotSatisfiable(ValueError):
+    """Запрошенный диапазон байтов вне файла"""
+
+
+def resolve_audio_path(store, filename: str):
+    """
+    Путь к результату из индекса хранилища или None. Диск не проверяется: незаконченные
+    файлы (.part, .synth.wav) в индекс не попадают, а имя с путем не может быть ключом.
+    """
+    if not _SAFE_FILENAME.fullmatch(filename or '') or filename.startswith('.'):
+        return None
+    return store.get(filename)
+
+
+def media_type(path: Path) -> str:
+    for spec in OUTPUT_FORMATS.values():
+        if path.suffix.lower() == spec['extension']:
+            return spec['media_type']
+    return mimetypes.guess_type(path.name)[0] or 'application/octet-stream'
+
+
+class ETagCache:
+    """
+    Сильные ETag по хэшу содержимого.
+    Хэш считается один раз на файл и пересчитывается, только если изменились размер или mtime.
+    """
+
+    def __init__(self, max_entries: int = 4096):
+        self.max_entries = max_entries
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def get(self, path: Path) -> str:
+        stat = path.stat()
+        key = str(path)
+        signature = (stat.st_size, stat.st_mtime_ns)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry[0] == signature:
+                return entry[1]
+
+        digest = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                digest.update(chunk)
+        etag = f'"{digest.hexdigest()[:32]}"'
+
+        with self._lock:
+            if len(self._entries) >= self.max_entries:
+                self._entries.pop(next(iter(self._entries)))
+            self._entries[key] = (signature, etag)
+        return etag
+
+
+def etag_matches(header: str, etag: str) -> bool:
+    """Проверяет If-None-Match / If-Range (список ETag или *)"""
+    if not header:
+        return False
+    candidates = [value.strip() for value in header.split(',')]
+    return '*' in candidates or etag in candidates
+
+
+def parse_range(header: str, size: int):
+    """
+    Разбирает заголовок Range с одним диапазоном.
+    @return: (start, end) включительно или None, если заголовок не поддерживается (отдаем весь файл).
+    """
+    match = _RANGE.fullmatch((header or '').strip())
+    if not match:
+        return None
+    start, end = match.groups()
+    if not start and not end:
+        return None
+    if not start:
+        # bytes=-N: последние N байт
+        length = int(end)
+        if length == 0:
+            raise RangeNotSatisfiable(header)
+        return max(0, size - length), size - 1
+    start = int(start)
+    end = min(int(end), size - 1) if end else size - 1
+    if start >= size or start > end:
+        raise RangeNotSatisfiable(header)
+    return start, end
+
+
+def read_file(path: Path, start: int = 0, end: int = None):
+    """Читает файл (или диапазон байтов) блоками для StreamingResponse"""
+    with open(path, 'rb') as f:
+        f.seek(start)
+        remaining = (end - start + 1) if end is not None else None
+        while remaining is None or remaining > 0:
+            chunk = f.read(CHUNK_SIZE if remaining is None else min(CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            if remaining is not None:
+                remaining -= len(chunk)
+            yield chunk
+
+
+def precompressed_variant(path: Path, accept_encoding: str):
+    """Находит предсжатый вариант файла, который принимает клиент: (путь, Content-Encoding) или None"""
+    accepted = {value.split(';')[0].strip().lower() for value in (accept_encoding or '').split(',')}
+    for suffix, encoding in PRECOMPRESSED_VARIANTS:
+        variant = path.with_name(path.name + suffix)
+        if encoding in accepted and variant.is_file():
+            return variant, encoding
+    return None
+
+
+def precompress(path: str):
+    """Сохраняет рядом с файлом gzip-вариант, если формат еще сжимается"""
+    path = Path(path)
+    if not PRECOMPRESS_ENABLED or path.suffix.lower() not in PRECOMPRESS_FORMATS:
+        return None
+    variant = path.with_name(path.name + '.gz')
+    tmp_path = variant.with_name(variant.name + '.part')
+    with open(path, 'rb') as src, gzip.open(tmp_path, 'wb', compresslevel=6) as dest:
+        for chunk in iter(lambda: src.read(1024 * 1024), b''):
+            dest.write(chunk)
+    # Вариант имеет смысл, только если он заметно меньше оригинала
+    if tmp_path.stat().st_size > path.stat().st_size * 0.9:
+        tmp_path.unlink()
+        return None
+    os.replace(tmp_path, variant)
+    return variant
+
+
+# Общий кэш ETag для отдаваемых файлов
+etag_cache = ETagCache()
+
+# Сохранять gzip-варианты WAV после генерации
+PRECOMPRESS_ENABLED = env_bool('TTS_PRECOMPRESS', False)
@@ -0,0 +1,256 @@
+import os
+import sys
+import threading
+from contextlib import contextmanager
+
+from services.config import env_int, env_list
+
+
+def is_accelerator(device: str) -> bool:
+    return not device.startswith('cpu')
+
+
+def torch_device(device: str) -> str:
+    """
+    Устройство для torch: логические CPU-устройства 'cpu:N' - это один и тот же 'cpu',
+    различаются только ядрами, к которым привязан поток синтеза.
+    """
+    return 'cpu' if device.startswith('cpu') else device
+
+
+def default_devices() -> list:
+    """Все CUDA-устройства, а без GPU - один CPU"""
+    try:
+        import torch
+        if torch.cuda.is_available():
+            return [f'cuda:{index}' for index in range(torch.cuda.device_count())]
+    except ImportError:
+        pass
+    return ['cpu']
+
+
+def split_cores(cpu_devices: list) -> dict:
+    """Делит доступные процессу ядра поровну между логическими CPU-устройствами"""
+    if len(cpu_devices) < 2 or not hasattr(os, 'sched_getaffinity'):
+        return {device: None for device in cpu_devices}
+    cores = sorted(os.sched_getaffinity(0))
+    per_device = max(1, len(cores) // len(cpu_devices))
+    return {
+        device: set(cores[index * per_device:(index + 1) * per_device] or cores)
+        for index, device in enumerate(cpu_devices)
+    }
+
+
+def free_memory(device: str):
+    """Свободная память устройства в байтах или None, если узнать нельзя"""
+    if is_accelerator(device):
+        try:
+            import torch
+            return torch.cuda.mem_get_info(torch.device(device))[0]
+        except Exception:
+            return None
+    try:
+        return os.sysconf('SC_AVPHYS_PAGES') * os.sysconf('SC_PAGE_SIZE')
+    except (ValueError, OSError, AttributeError):
+        return None
+
+
+class DeviceScheduler:
+    """
+    Распределяет запросы по устройствам и репликам моделей.
+    Запрос идет на наименее загруженную реплику своей модели; если все реплики
+    заняты, новая реплика размещается на свободном устройстве, где хватает памяти.
+    Когда все ускорители заняты, запросы уходят на CPU-устройства (если они указаны).
+    """
+
+    def __init__(self, devices: list, replicas, max_inflight: int = 1):
+        """
+        @param devices: Устройства: 'cuda:0', 'cuda:1', 'cpu', 'cpu:0', 'cpu:1', ...
+            Пустой список - все GPU или CPU; определяется при первом запросе,
+            чтобы импорт модуля не загружал torch.
+        @param replicas: Функция replicas(model_name) -> {device: размер модели в байтах}
+            для уже загруженных реплик.
+        @param max_inflight: Сколько синтезов одновременно выполнять на одном устройстве,
+            прежде чем считать его занятым.
+        """
+        self._replicas = replicas
+        self.max_inflight = max(1, max_inflight)
+        self._lock = threading.Lock()
+        self._init_lock = threading.Lock()
+        self.reset(devices)
+
+    def reset(self, devices: list = None):
+        """Задает новый список устройств (пустой - определить автоматически) и сбрасывает учет нагрузки"""
+        with self._init_lock:
+            self._configured = list(dict.fromkeys(devices or []))
+            self._devices = None
+            self.fallbacks = 0
+
+    @property
+    def devices(self) -> list:
+        if self._devices is None:
+            with self._init_lock:
+                if self._devices is None:
+                    devices = self._configured or default_devices()
+                    self._inflight = {device: 0 for device in devices}
+                    self._served = {device: 0 for device in devices}
+                    self._cores = split_cores([d for d in devices if not is_accelerator(d)])
+                    self._devices = devices
+        return self._devices
+
+    def select(self, model_name: str, gpu: bool = True) -> str:
+        """Выбирает устройство для запроса к модели (без учета запроса в нагрузке)"""
+        with self._lock:
+            return self._choose(model_name, gpu)
+
+    @contextmanager
+    def lease(self, model_name: str, gpu: bool = True):
+        """Выбирает устройство и учитывает запрос в его нагрузке до выхода из блока"""
+        with self._lock:
+            device = self._choose(model_name, gpu)
+            self._acquire(device)
+        try:
+            with self._pinned(device):
+                yield device
+        finally:
+            self._release(device)
+
+    @contextmanager
+    def track(self, device: str):
+        """Учитывает работу на заранее выбранном устройстве (например, сегмент длинного текста)"""
+        self.devices  # список устройств определяется при первом обращении
+        with self._lock:
+            self._acquire(device)
+        try:
+            with self._pinned(device):
+                yield device
+        finally:
+            self._release(device)
+
+    def pipeline_devices(self, gpu: bool = True) -> list:
+        """Устройства для параллельного синтеза сегментов одного текста"""
+        accelerators = [d for d in self.devices if is_accelerator(d)]
+        if gpu and accelerators:
+            return accelerators
+        return [d for d in self.devices if not is_accelerator(d)] or ['cpu']
+
+    def replica_devices(self, model_name: str, candidates: list, limit: int, current: str = None) -> list:
+        """
+        Устройства для реплик модели, между которыми делятся сегменты одного текста:
+        текущее устройство запроса, затем устройства с уже загруженной репликой, затем свободные
+        устройства, где хватает памяти для новой реплики. Не больше limit устройств.
+        """
+        self.devices  # список устройств определяется при первом обращении
+        with self._lock:
+            replicas = self._replicas(model_name)
+            model_bytes = max(replicas.values(), default=0)
+            chosen = [current] if current else []
+            others = [d for d in dict.fromkeys(candidates) if d not in chosen]
+            loaded = sorted((d for d in others if d in replicas), key=self._load)
+            new = sorted(
+                (d for d in others if d not in replicas
+                 and self._inflight.get(d, 0) < self.max_inflight and self._fits(d, model_bytes)),
+                key=self._load
+            )
+        return (chosen + loaded + new)[:max(1, limit)]
+
+    def stats(self) -> dict:
+        self.devices  # список устройств определяется при первом обращении
+        with self._lock:
+            return {
+                'max_inflight': self.max_inflight,
+                'cpu_fallbacks': self.fallbacks,
+                'devices': [
+                    {
+                        'device': device,
+                        'inflight': self._inflight.get(device, 0),
+                        'served': self._served.get(device, 0),
+                        'free_bytes': free_memory(device),
+                        'cores': sorted(self._cores[device]) if self._cores.get(device) else None,
+                    }
+                    for device in self._inflight
+                ],
+            }
+
+    def _choose(self, model_name: str, gpu: bool) -> str:
+        accelerators = [d for d in self.devices if is_accelerator(d)]
+        cpus = [d for d in self.devices if not is_accelerator(d)]
+        if gpu and accelerators:
+            # CPU - запасной вариант, только если он указан в списке устройств
+            groups = [accelerators, cpus] if cpus else [accelerators]
+        else:
+            groups = [cpus or ['cpu']]
+        replicas = self._replicas(model_name)
+        model_bytes = max(replicas.values(), default=0)
+
+        for position, group in enumerate(groups):
+            idle = [d for d in group if self._inflight.get(d, 0) < self.max_inflight]
+            # Сначала - свободная реплика, уже загруженная на устройство
+            loaded = [d for d in idle if d in replicas]
+            if loaded:
+                device = min(loaded, key=self._load)
+            else:
+                # Иначе - новая реплика на свободном устройстве, где хватает памяти
+                fits = [d for d in idle if self._fits(d, model_bytes)]
+                if not fits:
+                    continue
+                device = min(fits, key=lambda d: (self._inflight.get(d, 0), -(free_memory(d) or 0)))
+            if position > 0:
+                self.fallbacks += 1
+            return device
+
+        # Все устройства заняты: ставим в очередь к наименее загруженной реплике
+        group = groups[0]
+        loaded = [d for d in group if d in replicas]
+        return min(loaded or group, key=self._load)
+
+    def _load(self, device: str):
+        return self._inflight.get(device, 0), self._served.get(device, 0)
+
+    def _fits(self, device: str, model_bytes: int) -> bool:
+        if not model_bytes:
+            return True
+        free = free_memory(device)
+        # Запас на активации и буферы синтеза
+        return free is None or free >= model_bytes * 1.2
+
+    def _acquire(self, device: str):
+        self._inflight[device] = self._inflight.get(device, 0) + 1
+        self._served[device] = self._served.get(device, 0) + 1
+
+    def _release(self, device: str):
+        with self._lock:
+            self._inflight[device] -= 1
+
+    @contextmanager
+    def _pinned(self, device: str):
+        """
+        Привязывает поток синтеза к ядрам логического CPU-устройства и ограничивает
+        число потоков torch числом этих ядер, иначе каждое устройство запускает
+        потоки на все ядра машины и они мешают друг другу.
+        """
+        cores = self._cores.get(device)
+        if not cores:
+            yield
+            return
+        # В Linux sched_setaffinity(0) меняет привязку только текущего потока
+        previous = os.sched_getaffinity(0)
+        os.sched_setaffinity(0, cores)
+        # Число потоков OpenMP задается для вызывающего потока, новые потоки наследуют его привязку
+        torch = sys.modules.get('torch')
+        previous_threads = torch.get_num_threads() if torch else None
+        if torch:
+            torch.set_num_threads(len(cores))
+        try:
+            yield
+        finally:
+            if torch:
+                torch.set_num_threads(previous_threads)
+            os.sched_setaffinity(0, previous)
+
+
+# Устройства задаются TTS_DEVICES="cuda:0,cuda:1,cpu" (cpu в списке - запасной вариант при занятых GPU)
+# или TTS_DEVICES="cpu:0,cpu:1,cpu:2,cpu:3" - несколько CPU-устройств с разделением ядер;
+# без TTS_DEVICES используются все GPU (или CPU), список определяется при первом запросе
+DEVICES = env_list('TTS_DEVICES')
+DEVICE_MAX_INFLIGHT = env_int('TTS_DEVICE_MAX_INFLIGHT', 1)
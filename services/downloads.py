@@ -0,0 +1,354 @@
+"""
+Фоновая загрузка моделей в MODELS_DIR, чтобы первый запрос к новой модели
+не скачивал ее внутри HTTP-запроса.
+
+Источник задается TTS_MODEL_MIRROR: локальная папка или HTTP(S)-адрес, где лежат архивы
+<папка модели>.zip (например, tts_models--en--ljspeech--vits.zip) и, по желанию,
+контрольные суммы <архив>.sha256 в формате sha256sum. Загрузка докачивается с места обрыва
+(.part-файл и HTTP Range), архив проверяется по sha256 и распаковывается во временную папку,
+которая переименовывается в папку модели только целиком. Без TTS_MODEL_MIRROR модель
+скачивается штатным загрузчиком Coqui, но тоже в фоне.
+
+    python -m services.downloads tts_models/en/ljspeech/vits
+"""
+import hashlib
+import logging
+import os
+import shutil
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from services.config import env_int, env_list
+from services.log import configure_logging
+from services.model_index import model_dir_name, model_name_from_dir, models_root
+
+logger = logging.getLogger(__name__)
+
+QUEUED = 'queued'
+DOWNLOADING = 'downloading'
+VERIFYING = 'verifying'
+EXTRACTING = 'extracting'
+DONE = 'done'
+FAILED = 'failed'
+
+CHUNK_SIZE = 1024 * 1024
+# Файлы весов, без которых папка модели считается недокачанной
+CHECKPOINT_SUFFIXES = ('.pth', '.pt', '.tar', '.bin', '.safetensors', '.ckpt')
+
+
+class ChecksumMismatch(Exception):
+    """Контрольная сумма скачанного архива не совпала с ожидаемой"""
+
+
+def directory_size(path: Path) -> int:
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.path.getsize(os.path.join(root, name))
+            except OSError:
+                pass
+    return total
+
+
+def _is_url(source: str) -> bool:
+    return source.startswith(('http://', 'https://'))
+
+
+class DownloadManager:
+    """
+    Очередь загрузок моделей с ограничением числа одновременных загрузок.
+    Повторный запрос той же модели присоединяется к уже идущей загрузке.
+    """
+
+    def __init__(self, source: str = None, concurrency: int = 2, root: Path = None, timeout: int = 60):
+        """
+        @param source: Папка-зеркало или базовый HTTP(S)-адрес с архивами моделей; None - загрузчик Coqui.
+        @param concurrency: Сколько моделей скачивать одновременно.
+        @param root: Папка моделей (по умолчанию TTS_HOME/tts).
+        @param timeout: Таймаут сетевых операций в секундах.
+        """
+        self.source = source.rstrip('/') if source else None
+        self.concurrency = max(1, concurrency)
+        self._root = root
+        self.timeout = timeout
+        self._pool = ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix='tts-download')
+        self._lock = threading.Lock()
+        self._status = {}
+        self._events = {}
+
+    @property
+    def root(self) -> Path:
+        return self._root or models_root()
+
+    def model_dir(self, model_name: str) -> Path:
+        return self.root / model_dir_name(model_name)
+
+    def is_downloaded(self, model_name: str) -> bool:
+        """
+        Модель скачана: загрузка завершилась успешно (или не запускалась этим процессом),
+        не осталось метки незаконченной загрузки и в папке есть config.json и файл весов.
+        Загрузчик Coqui пишет файлы прямо в папку модели, поэтому оборванная или упавшая
+        загрузка оставляет частично заполненную папку.
+        """
+        status = self._status.get(model_name)
+        if status is not None and status['state'] != DONE:
+            return False
+        if self._incomplete_marker(model_name).exists():
+            return False
+        model_dir = self.model_dir(model_name)
+        try:
+            names = [path.name for path in model_dir.iterdir() if path.is_file()]
+        except FileNotFoundError:
+            return False
+        return 'config.json' in names and any(name.endswith(CHECKPOINT_SUFFIXES) for name in names)
+
+    def start(self, model_name: str) -> dict:
+        """Ставит модель в очередь загрузки (если она еще не скачана и не скачивается) и возвращает статус"""
+        with self._lock:
+            status = self._status.get(model_name)
+            if status is not None and status['state'] not in (DONE, FAILED):
+                return dict(status)
+            if not self.is_downloaded(model_name):
+                status = self._status[model_name] = {
+                    'model_name': model_name,
+                    'state': QUEUED,
+                    'source': 'mirror' if self.source else 'coqui',
+                    'bytes_done': 0,
+                    'bytes_total': None,
+                    'progress': 0.0,
+                    'resumed_from': 0,
+                    'error': None,
+                    'queued_at': time.time(),
+                    'started_at': None,
+                    'finished_at': None,
+                }
+                self._events[model_name] = threading.Event()
+                self._pool.submit(self._run, model_name)
+            status = dict(status) if status else None
+        return self._describe(model_name, status)
+
+    def wait(self, model_name: str, timeout: float = None) -> dict:
+        """
+        Запускает загрузку при необходимости и ждет ее окончания.
+        @raise RuntimeError: Если загрузка завершилась ошибкой.
+        """
+        status = self.start(model_name)
+        if status['state'] == DONE:
+            return status
+        with self._lock:
+            event = self._events[model_name]
+        event.wait(timeout)
+        status = self.status(model_name)
+        if status['state'] == FAILED:
+            raise RuntimeError(f"Не удалось скачать модель {model_name}: {status['error']}")
+        return status
+
+    def status(self, model_name: str) -> dict:
+        with self._lock:
+            status = self._status.get(model_name)
+            status = dict(status) if status else None
+        # Размер папки считается вне блокировки: обход больших моделей не задерживает загрузки
+        return self._describe(model_name, status)
+
+    def list(self) -> list:
+        """Статусы загрузок этого процесса и все уже скачанные модели с размером на диске"""
+        with self._lock:
+            names = set(self._status)
+        try:
+            names.update(
+                model_name_from_dir(path.name) for path in self.root.iterdir()
+                if path.is_dir() and '--' in path.name
+            )
+        except FileNotFoundError:
+            pass
+        return [self.status(name) for name in sorted(names)]
+
+    def shutdown(self):
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+    def _describe(self, model_name: str, status) -> dict:
+        downloaded = self.is_downloaded(model_name)
+        model_dir = self.model_dir(model_name)
+        status = dict(status) if status else {'model_name': model_name, 'state': DONE if downloaded else None}
+        if status['state'] is None and not downloaded:
+            status['state'] = 'missing'
+        # Для загрузчика Coqui прогресс виден только по росту папки модели
+        status['size_on_disk'] = directory_size(model_dir) if model_dir.exists() else 0
+        status['downloaded'] = downloaded
+        return status
+
+    def _update(self, model_name: str, **fields):
+        with self._lock:
+            self._status[model_name].update(fields)
+
+    def _incomplete_marker(self, model_name: str) -> Path:
+        """Метка незаконченной загрузки: остается после ошибки или перезапуска во время загрузки"""
+        return self.root / '.downloads' / f'{model_dir_name(model_name)}.incomplete'
+
+    def _run(self, model_name: str):
+        self._update(model_name, state=DOWNLOADING, started_at=time.time())
+        logger.info('Model download started', extra={'model': model_name, 'source': self.source or 'coqui'})
+        marker = self._incomplete_marker(model_name)
+        try:
+            marker.parent.mkdir(parents=True, exist_ok=True)
+            marker.touch()
+            if self.source:
+                self._download_from_mirror(model_name)
+            else:
+                self._download_with_coqui(model_name)
+            marker.unlink(missing_ok=True)
+            self._update(model_name, state=DONE, progress=1.0, finished_at=time.time())
+            logger.info('Model downloaded', extra={'model': model_name})
+        except Exception as e:
+            logger.error('Model download failed for %s: %s', model_name, e)
+            self._update(model_name, state=FAILED, error=str(e), finished_at=time.time())
+        finally:
+            with self._lock:
+                event = self._events.get(model_name)
+            if event is not None:
+                event.set()
+
+    def _download_with_coqui(self, model_name: str):
+        from services.tts import import_backend
+
+        # Остатки прошлой попытки: загрузчик Coqui считает существующую папку уже скачанной
+        shutil.rmtree(self.model_dir(model_name), ignore_errors=True)
+        import_backend()
+        from TTS.utils.manage import ModelManager
+        ModelManager(progress_bar=False).download_model(model_name)
+
+    def _download_from_mirror(self, model_name: str):
+        archive_name = f'{model_dir_name(model_name)}.zip'
+        work_dir = self.root / '.downloads'
+        work_dir.mkdir(parents=True, exist_ok=True)
+        part_path = work_dir / f'{archive_name}.part'
+
+        expected = self._expected_checksum(archive_name)
+        if expected is None:
+            logger.warning('No checksum for %s in the mirror, the archive is not verified', archive_name)
+
+        self._fetch(model_name, archive_name, part_path)
+
+        if expected is not None:
+            self._update(model_name, state=VERIFYING)
+            digest = hashlib.sha256()
+            with open(part_path, 'rb') as f:
+                for chunk in iter(lambda: f.read(CHUNK_SIZE), b''):
+                    digest.update(chunk)
+            if digest.hexdigest() != expected:
+                # Поврежденный архив не докачивается, а скачивается заново
+                part_path.unlink(missing_ok=True)
+                raise ChecksumMismatch(f'sha256 {digest.hexdigest()} != {expected}')
+
+        self._update(model_name, state=EXTRACTING)
+        self._extract(part_path, self.model_dir(model_name), work_dir)
+        part_path.unlink(missing_ok=True)
+
+    def _fetch(self, model_name: str, archive_name: str, part_path: Path):
+        """Скачивает архив в .part-файл, продолжая с уже скачанного места"""
+        offset = part_path.stat().st_size if part_path.exists() else 0
+        if _is_url(self.source):
+            request = urllib.request.Request(f'{self.source}/{archive_name}')
+            if offset:
+                request.add_header('Range', f'bytes={offset}-')
+            try:
+                response = urllib.request.urlopen(request, timeout=self.timeout)
+            except urllib.error.HTTPError as e:
+                if e.code != 416:
+                    raise
+                # Файл уже скачан целиком
+                self._update(model_name, bytes_done=offset, bytes_total=offset, resumed_from=offset)
+                return
+            if offset and response.status != 206:
+                # Сервер не поддерживает Range - начинаем заново
+                offset = 0
+            total = response.headers.get('Content-Length')
+            total = int(total) + offset if total is not None else None
+            stream = response
+        else:
+            source_path = Path(self.source) / archive_name
+            if not source_path.exists():
+                raise FileNotFoundError(f'Архив {archive_name} не найден в {self.source}')
+            total = source_path.stat().st_size
+            offset = min(offset, total)
+            stream = open(source_path, 'rb')
+            stream.seek(offset)
+
+        if offset:
+            logger.info('Resuming model download', extra={'model': model_name, 'offset': offset})
+        self._update(model_name, bytes_done=offset, bytes_total=total, resumed_from=offset)
+        done = offset
+        with stream, open(part_path, 'ab' if offset else 'wb') as out:
+            for chunk in iter(lambda: stream.read(CHUNK_SIZE), b''):
+                out.write(chunk)
+                done += len(chunk)
+                self._update(model_name, bytes_done=done, progress=round(done / total, 4) if total else 0.0)
+
+    def _expected_checksum(self, archive_name: str):
+        name = f'{archive_name}.sha256'
+        try:
+            if _is_url(self.source):
+                with urllib.request.urlopen(f'{self.source}/{name}', timeout=self.timeout) as response:
+                    text = response.read().decode('utf-8')
+            else:
+                text = (Path(self.source) / name).read_text(encoding='utf-8')
+        except (FileNotFoundError, urllib.error.HTTPError):
+            return None
+        return text.split()[0].lower() if text.strip() else None
+
+    @staticmethod
+    def _extract(archive_path: Path, target: Path, work_dir: Path):
+        """Распаковывает архив во временную папку и переименовывает ее в папку модели"""
+        tmp_dir = work_dir / f'{target.name}.extract'
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        with zipfile.ZipFile(archive_path) as archive:
+            for member in archive.namelist():
+                resolved = (tmp_dir / member).resolve()
+                if not resolved.is_relative_to(tmp_dir.resolve()):
+                    raise ValueError(f'Недопустимый путь в архиве: {member}')
+            archive.extractall(tmp_dir)
+
+        # Архив может содержать файлы модели как в корне, так и в папке с именем модели
+        entries = list(tmp_dir.iterdir())
+        content = entries[0] if len(entries) == 1 and entries[0].is_dir() else tmp_dir
+        if target.exists():
+            shutil.rmtree(target)
+        os.replace(content, target)
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+def main(argv: list) -> int:
+    configure_logging()
+    if not argv:
+        print('Usage: python -m services.downloads <model_name>...')
+        return 2
+    failed = 0
+    for model_name in argv:
+        try:
+            status = download_manager.wait(model_name)
+            print(f"✅ {model_name}: {status['size_on_disk']} bytes")
+        except RuntimeError as e:
+            print(f'❌ {e}')
+            failed += 1
+    return 1 if failed else 0
+
+
+# Источник архивов моделей (папка или HTTP-адрес) и число одновременных загрузок
+MODEL_MIRROR = os.environ.get('TTS_MODEL_MIRROR') or None
+DOWNLOAD_CONCURRENCY = env_int('TTS_DOWNLOAD_CONCURRENCY', 2)
+# Модели, которые скачиваются в фоне сразу после запуска (без загрузки в память)
+PREFETCH_MODELS = env_list('TTS_PREFETCH')
+
+# Общий менеджер загрузок
+download_manager = DownloadManager(MODEL_MIRROR, DOWNLOAD_CONCURRENCY)
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,164 @@
+import logging
+import os
+import re
+import shutil
+import subprocess
+import wave
+from pathlib import Path
+
+from services.config import env_int
+
+logger = logging.getLogger(__name__)
+
+# Форматы выходного файла: расширение, MIME-тип, кодек ffmpeg и битрейт по умолчанию
+OUTPUT_FORMATS = {
+    'wav': {'extension': '.wav', 'media_type': 'audio/wav', 'codec': None, 'bitrate': None},
+    'flac': {'extension': '.flac', 'media_type': 'audio/flac', 'codec': 'flac', 'bitrate': None},
+    'mp3': {'extension': '.mp3', 'media_type': 'audio/mpeg', 'codec': 'libmp3lame', 'bitrate': 'TTS_MP3_BITRATE'},
+    'opus': {'extension': '.opus', 'media_type': 'audio/ogg', 'codec': 'libopus', 'bitrate': 'TTS_OPUS_BITRATE'},
+    'ogg': {'extension': '.ogg', 'media_type': 'audio/ogg', 'codec': 'libopus', 'bitrate': 'TTS_OPUS_BITRATE'},
+}
+
+# Битрейт по умолчанию (кбит/с): для речи Opus 32k звучит как WAV, а весит примерно в 10 раз меньше
+DEFAULT_BITRATES = {
+    'TTS_OPUS_BITRATE': env_int('TTS_OPUS_BITRATE', 32),
+    'TTS_MP3_BITRATE': env_int('TTS_MP3_BITRATE', 64),
+}
+MIN_BITRATE = 6
+MAX_BITRATE = 320
+
+FFMPEG_BINARY = os.environ.get('TTS_FFMPEG', 'ffmpeg')
+DEFAULT_OUTPUT_FORMAT = os.environ.get('TTS_OUTPUT_FORMAT', 'wav').lower()
+
+
+def ffmpeg_available() -> bool:
+    return shutil.which(FFMPEG_BINARY) is not None
+
+
+def resolve_format(audio_format: str = None, bitrate: str = None) -> tuple:
+    """
+    Проверяет формат и битрейт.
+    @param bitrate: Битрейт в кбит/с: '48', '48k' или None для значения по умолчанию.
+    @return: (формат, битрейт в кбит/с или None для форматов без битрейта).
+    """
+    audio_format = (audio_format or DEFAULT_OUTPUT_FORMAT).lower().lstrip('.')
+    spec = OUTPUT_FORMATS.get(audio_format)
+    if spec is None:
+        raise ValueError(f'Неподдерживаемый формат. Разрешены: {", ".join(OUTPUT_FORMATS)}')
+    if spec['codec'] and not ffmpeg_available():
+        raise ValueError(f'Формат {audio_format} недоступен: не найден ffmpeg ({FFMPEG_BINARY})')
+
+    if spec['bitrate'] is None:
+        return audio_format, None
+    if not bitrate:
+        return audio_format, DEFAULT_BITRATES[spec['bitrate']]
+    match = re.fullmatch(r'(\d+)k?', str(bitrate).strip().lower())
+    if not match or not MIN_BITRATE <= int(match.group(1)) <= MAX_BITRATE:
+        raise ValueError(f'Неверный битрейт: {bitrate}. Допустимо от {MIN_BITRATE}k до {MAX_BITRATE}k')
+    return audio_format, int(match.group(1))
+
+
+def output_extension(audio_format: str) -> str:
+    return OUTPUT_FORMATS[audio_format]['extension']
+
+
+def encode_file(src_path: str, dest_path: str, audio_format: str, bitrate: int = None):
+    """
+    Кодирует WAV в нужный формат через ffmpeg и удаляет исходный WAV.
+    Вызывается в рабочем потоке: кодирование занимает заметное время и не должно
+    выполняться в цикле событий.
+    """
+    spec = OUTPUT_FORMATS[audio_format]
+    if spec['codec'] is None:
+        if str(src_path) != str(dest_path):
+            os.replace(src_path, dest_path)
+        return dest_path
+
+    command = [FFMPEG_BINARY, '-hide_banner', '-loglevel', 'error', '-y', '-i', str(src_path), '-ac', '1',
+               '-c:a', spec['codec']]
+    if bitrate:
+        command += ['-b:a', f'{bitrate}k']
+    if spec['codec'] == 'libopus':
+        # Режим voip настраивает Opus на разборчивость речи
+        command += ['-application', 'voip']
+    tmp_path = Path(dest_path).with_name(Path(dest_path).name + '.part')
+    command += ['-f', 'ogg' if spec['codec'] == 'libopus' else audio_format, str(tmp_path)]
+
+    try:
+        result = subprocess.run(command, capture_output=True, text=True)
+        if result.returncode != 0:
+            raise RuntimeError(f'Ошибка кодирования в {audio_format}: {result.stderr.strip()}')
+        os.replace(tmp_path, dest_path)
+    finally:
+        if tmp_path.exists():
+            tmp_path.unlink()
+        if os.path.exists(src_path):
+            os.unlink(src_path)
+
+    logger.info('Encoded', extra={
+        'file': os.path.basename(dest_path), 'format': audio_format, 'bitrate': bitrate,
+        'bytes': os.path.getsize(dest_path)
+    })
+    return dest_path
+
+
+def synthesis_path(output_path: str) -> str:
+    """Путь промежуточного WAV, в который синтезируется аудио перед кодированием"""
+    if str(output_path).endswith('.wav'):
+        return str(output_path)
+    return f'{output_path}.synth.wav'
+
+
+def prepare_reference(src_path: str, dest_path: str, sample_rate: int = None, max_seconds: float = None) -> str:
+    """
+    Готовит образец голоса один раз при загрузке: декодирует в моно WAV с частотой модели,
+    убирает тишину в начале и оставляет первые max_seconds секунд.
+    Без ffmpeg так обрабатывается только WAV, остальные форматы сохраняются как есть.
+    @return: Путь к подготовленному файлу.
+    """
+    from services.audio import read_wav, resample, trim_silence, write_wav
+
+    sample_rate = sample_rate or REFERENCE_SAMPLE_RATE
+    max_seconds = max_seconds or REFERENCE_MAX_SECONDS
+    dest_path = Path(dest_path).with_suffix('.wav')
+
+    if ffmpeg_available():
+        command = [
+            FFMPEG_BINARY, '-hide_banner', '-loglevel', 'error', '-y', '-i', str(src_path), '-vn',
+            '-ac', '1', '-ar', str(sample_rate),
+            '-af', 'silenceremove=start_periods=1:start_threshold=-50dB',
+            '-t', str(max_seconds), '-c:a', 'pcm_s16le', str(dest_path)
+        ]
+        result = subprocess.run(command, capture_output=True, text=True)
+        if result.returncode != 0:
+            raise ValueError(f'Не удалось прочитать образец голоса: {result.stderr.strip()}')
+    elif Path(src_path).suffix.lower() == '.wav':
+        try:
+            samples, source_rate = read_wav(src_path)
+        except (wave.Error, EOFError) as e:
+            raise ValueError(f'Не удалось прочитать образец голоса: {e}')
+        samples = trim_silence(resample(samples, source_rate, sample_rate))
+        write_wav(dest_path, samples[:int(sample_rate * max_seconds)], sample_rate)
+    else:
+        logger.warning('ffmpeg not found, speaker reference is kept as is: %s', src_path)
+        dest_path = dest_path.with_suffix(Path(src_path).suffix.lower())
+        shutil.copyfile(src_path, dest_path)
+        return str(dest_path)
+
+    with wave.open(str(dest_path), 'rb') as wav_file:
+        duration = wav_file.getnframes() / float(wav_file.getframerate())
+    if duration == 0:
+        dest_path.unlink()
+        raise ValueError('Образец голоса не содержит звука')
+    if duration < REFERENCE_MIN_SECONDS:
+        logger.warning('Speaker reference is short (%.1fs), %s+ s recommended', duration, REFERENCE_MIN_SECONDS)
+    logger.info('Speaker reference prepared', extra={
+        'file': dest_path.name, 'seconds': round(duration, 1), 'sample_rate': sample_rate
+    })
+    return str(dest_path)
+
+
+# Образец голоса: XTTS и YourTTS используют из него первые несколько секунд речи
+REFERENCE_SAMPLE_RATE = env_int('TTS_REFERENCE_SAMPLE_RATE', 22050)
+REFERENCE_MIN_SECONDS = 3
+REFERENCE_MAX_SECONDS = env_int('TTS_REFERENCE_MAX_SECONDS', 10)
@@ -0,0 +1,156 @@
+import asyncio
+import contextvars
+import threading
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+
+from services.config import env_int
+from services.metrics import QUEUE_WAIT_SECONDS
+
+
+class QueueFullError(Exception):
+    """Очередь синтеза переполнена, запрос нужно повторить позже"""
+
+
+class ExecutorClosedError(Exception):
+    """Исполнитель остановлен и не принимает новые задачи"""
+
+
+class SynthesisExecutor:
+    """
+    Исполнитель задач синтеза вне цикла событий asyncio.
+    Пул потоков для GPU-задач (torch отпускает GIL во время вычислений)
+    и опциональный пул процессов для CPU-моделей. Количество задач
+    в работе и в очереди ограничено: при переполнении задача отклоняется.
+    """
+
+    def __init__(self, max_workers: int = 1, max_queue: int = 8, process_workers: int = 0):
+        """
+        @param max_workers: Количество потоков синтеза.
+        @param max_queue: Сколько задач может ждать сверх выполняющихся.
+        @param process_workers: Количество процессов для CPU-задач (0 - не использовать).
+        """
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.process_workers = process_workers
+        self._threads = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='tts-synth')
+        self._processes = None
+        self._lock = threading.Lock()
+        self._closed = False
+        self.inflight = 0
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+
+    @property
+    def capacity(self) -> int:
+        return self.max_workers + self.process_workers + self.max_queue
+
+    def submit(self, fn, *args, cpu_bound: bool = False, **kwargs):
+        """
+        Ставит задачу в очередь и возвращает concurrent.futures.Future.
+        @param cpu_bound: Выполнить в пуле процессов (если он настроен).
+        @raise QueueFullError: Если превышен лимит задач.
+        """
+        with self._lock:
+            if self._closed:
+                raise ExecutorClosedError('Исполнитель синтеза остановлен')
+            if self.inflight >= self.capacity:
+                self.rejected += 1
+                raise QueueFullError(
+                    f'Очередь синтеза переполнена ({self.inflight}/{self.capacity}), повторите запрос позже'
+                )
+            self.inflight += 1
+            self.submitted += 1
+
+        pool = self._pool(cpu_bound)
+        if pool is self._threads:
+            fn = _in_context(fn, time.perf_counter())
+        try:
+            future = pool.submit(fn, *args, **kwargs)
+        except Exception:
+            with self._lock:
+                self.inflight -= 1
+            raise
+        future.add_done_callback(self._on_done)
+        return future
+
+    async def run(self, fn, *args, cpu_bound: bool = False, **kwargs):
+        """Выполняет задачу в исполнителе и ожидает результат без блокировки цикла событий"""
+        future = self.submit(fn, *args, cpu_bound=cpu_bound, **kwargs)
+        return await asyncio.wrap_future(future)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                'max_workers': self.max_workers,
+                'process_workers': self.process_workers,
+                'max_queue': self.max_queue,
+                'inflight': self.inflight,
+                'queued': max(0, self.inflight - self.max_workers - self.process_workers),
+                'submitted': self.submitted,
+                'completed': self.completed,
+                'failed': self.failed,
+                'rejected': self.rejected,
+            }
+
+    def start_processes(self) -> list:
+        """
+        Запускает процессы синтеза сразу (а не при первой CPU-задаче),
+        чтобы они унаследовали уже загруженные модели. Возвращает pid процессов.
+        """
+        if not self.process_workers:
+            return []
+        processes = self._pool(cpu_bound=True)
+        futures = [processes.submit(os.getpid) for _ in range(self.process_workers)]
+        wait(futures)
+        return sorted({future.result() for future in futures})
+
+    def shutdown(self, wait: bool = True):
+        with self._lock:
+            self._closed = True
+        self._threads.shutdown(wait=wait)
+        if self._processes is not None:
+            self._processes.shutdown(wait=wait)
+
+    def _pool(self, cpu_bound: bool):
+        if not cpu_bound or not self.process_workers:
+            return self._threads
+        if self._processes is None:
+            with self._lock:
+                if self._processes is None:
+                    from services.workers import create_process_pool, PROCESS_THREADS
+                    self._processes = create_process_pool(self.process_workers, PROCESS_THREADS)
+        return self._processes
+
+    def _on_done(self, future):
+        with self._lock:
+            self.inflight -= 1
+            if future.cancelled() or future.exception() is not None:
+                self.failed += 1
+            else:
+                self.completed += 1
+
+
+def _in_context(fn, queued_at: float):
+    """
+    Выполняет задачу пула потоков в контексте отправителя (id запроса для логов)
+    и замеряет ее ожидание в очереди. Задачи пула процессов не оборачиваются:
+    функция должна сериализоваться, а метрики дочернего процесса в основной не попадают.
+    """
+    context = contextvars.copy_context()
+
+    def run(*args, **kwargs):
+        QUEUE_WAIT_SECONDS.observe(time.perf_counter() - queued_at, pool='thread')
+        return context.run(fn, *args, **kwargs)
+    return run
+
+
+# Общий исполнитель синтеза для веб-приложения
+synthesis_executor = SynthesisExecutor(
+    max_workers=env_int('TTS_SYNTH_WORKERS', 1),
+    max_queue=env_int('TTS_SYNTH_QUEUE', 8),
+    process_workers=env_int('TTS_SYNTH_PROCESSES', 0),
+)
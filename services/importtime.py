@@ -0,0 +1,109 @@
+"""
+Профиль времени импорта: запускает импорт модуля в отдельном процессе с `python -X importtime`
+и показывает, какие пакеты и модули занимают время запуска.
+
+    python -m services.importtime                # импорт веб-приложения (app)
+    python -m services.importtime --backend      # плюс TTS, torch и transformers, как при первом синтезе
+    python -m services.importtime services.tts --top 30 --json
+"""
+import argparse
+import json
+import re
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).parent.parent
+
+_LINE = re.compile(r'^import time:\s+(\d+)\s*\|\s*(\d+)\s*\|(\s*)(\S+)')
+
+
+def parse_importtime(output: str) -> list:
+    """Строки вывода -X importtime -> [{'module', 'self_us', 'cumulative_us', 'depth'}]"""
+    entries = []
+    for line in output.splitlines():
+        match = _LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, module = match.groups()
+            entries.append({
+                'module': module,
+                'self_us': int(self_us),
+                'cumulative_us': int(cumulative_us),
+                'depth': (len(indent) - 1) // 2,
+            })
+    return entries
+
+
+def profile_import(module: str = 'app', backend: bool = False) -> dict:
+    """
+    Импортирует модуль в новом процессе и возвращает профиль.
+    @param backend: Дополнительно импортировать TTS (services.tts.import_backend).
+    """
+    code = f'import {module}'
+    if backend:
+        code += '; from services.tts import import_backend; import_backend()'
+    started = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', code],
+        cwd=ROOT, capture_output=True, text=True
+    )
+    wall_seconds = time.perf_counter() - started
+    entries = parse_importtime(result.stderr)
+    if result.returncode != 0:
+        errors = [line for line in result.stderr.splitlines() if not line.startswith('import time:')]
+        raise RuntimeError('\n'.join(errors[-20:]) or f'Импорт {module} завершился с кодом {result.returncode}')
+
+    packages = {}
+    for entry in entries:
+        package = entry['module'].split('.')[0]
+        packages[package] = packages.get(package, 0) + entry['self_us']
+    return {
+        'module': module,
+        'backend': backend,
+        'wall_seconds': round(wall_seconds, 3),
+        'import_seconds': round(sum(entry['self_us'] for entry in entries) / 1e6, 3),
+        'modules_imported': len(entries),
+        'packages': sorted(
+            ({'package': name, 'seconds': round(us / 1e6, 4)} for name, us in packages.items()),
+            key=lambda item: item['seconds'], reverse=True
+        ),
+        'modules': sorted(
+            ({'module': e['module'], 'self_seconds': round(e['self_us'] / 1e6, 4),
+              'cumulative_seconds': round(e['cumulative_us'] / 1e6, 4)} for e in entries),
+            key=lambda item: item['cumulative_seconds'], reverse=True
+        ),
+    }
+
+
+def main(argv: list) -> int:
+    parser = argparse.ArgumentParser(prog='python -m services.importtime', description='Профиль времени импорта')
+    parser.add_argument('module', nargs='?', default='app', help='Модуль для импорта (по умолчанию app)')
+    parser.add_argument('--backend', action='store_true', help='Импортировать и TTS/torch, как при первом синтезе')
+    parser.add_argument('--top', type=int, default=20, help='Сколько пакетов и модулей показать')
+    parser.add_argument('--json', action='store_true', help='Вывести полный профиль в JSON')
+    args = parser.parse_args(argv)
+
+    try:
+        report = profile_import(args.module, args.backend)
+    except RuntimeError as e:
+        print(f'❌ {e}')
+        return 1
+
+    if args.json:
+        print(json.dumps(report, ensure_ascii=False, indent=2))
+        return 0
+
+    print(f"{report['module']}: {report['wall_seconds']}s wall (interpreter included), "
+          f"{report['import_seconds']}s in {report['modules_imported']} imports")
+    print(f"\n{'package':<40} {'self, s':>9}")
+    for item in report['packages'][:args.top]:
+        print(f"{item['package']:<40} {item['seconds']:>9.4f}")
+    print(f"\n{'module':<60} {'cumulative, s':>14} {'self, s':>9}")
+    for item in report['modules'][:args.top]:
+        print(f"{item['module']:<60} {item['cumulative_seconds']:>14.4f} {item['self_seconds']:>9.4f}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
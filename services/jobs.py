@@ -0,0 +1,257 @@
+import contextvars
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import traceback
+import uuid
+
+from services.config import env_int
+
+logger = logging.getLogger(__name__)
+
+# Состояния задачи
+QUEUED = 'queued'
+RUNNING = 'running'
+DONE = 'done'
+FAILED = 'failed'
+
+FINISHED_STATES = (DONE, FAILED)
+
+
+def new_job(kind: str, params: dict) -> dict:
+    """Создает запись новой задачи"""
+    now = time.time()
+    return {
+        'id': uuid.uuid4().hex,
+        'kind': kind,
+        'state': QUEUED,
+        'params': params,
+        'progress': 0.0,
+        'done_segments': 0,
+        'total_segments': 0,
+        'eta_seconds': None,
+        'result': None,
+        'error': None,
+        'created_at': now,
+        'started_at': None,
+        'finished_at': None,
+        'updated_at': now,
+    }
+
+
+class MemoryJobStore:
+    """Хранилище задач в памяти процесса (теряется при перезапуске)"""
+
+    def __init__(self, max_jobs: int = 1000):
+        self.max_jobs = max_jobs
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+    def create(self, job: dict):
+        with self._lock:
+            self._jobs[job['id']] = dict(job)
+            self._trim()
+
+    def update(self, job_id: str, **fields) -> dict:
+        with self._lock:
+            job = self._jobs[job_id]
+            job.update(fields, updated_at=time.time())
+            return dict(job)
+
+    def get(self, job_id: str):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return dict(job) if job else None
+
+    def list(self, limit: int = 50) -> list:
+        with self._lock:
+            jobs = sorted(self._jobs.values(), key=lambda j: j['created_at'], reverse=True)
+            return [dict(job) for job in jobs[:limit]]
+
+    def _trim(self):
+        # Удаляем самые старые завершенные задачи сверх лимита
+        if len(self._jobs) <= self.max_jobs:
+            return
+        finished = sorted(
+            (job for job in self._jobs.values() if job['state'] in FINISHED_STATES),
+            key=lambda j: j['created_at']
+        )
+        for job in finished[:len(self._jobs) - self.max_jobs]:
+            del self._jobs[job['id']]
+
+
+class SQLiteJobStore:
+    """Хранилище задач в SQLite: история задач сохраняется между перезапусками"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS jobs ('
+            'id TEXT PRIMARY KEY, created_at REAL NOT NULL, data TEXT NOT NULL)'
+        )
+        self._conn.commit()
+        self._fail_interrupted()
+
+    def create(self, job: dict):
+        with self._lock:
+            self._conn.execute(
+                'INSERT INTO jobs (id, created_at, data) VALUES (?, ?, ?)',
+                (job['id'], job['created_at'], json.dumps(job))
+            )
+            self._conn.commit()
+
+    def update(self, job_id: str, **fields) -> dict:
+        with self._lock:
+            job = self._load(job_id)
+            if job is None:
+                raise KeyError(job_id)
+            job.update(fields, updated_at=time.time())
+            self._conn.execute('UPDATE jobs SET data = ? WHERE id = ?', (json.dumps(job), job_id))
+            self._conn.commit()
+            return job
+
+    def get(self, job_id: str):
+        with self._lock:
+            return self._load(job_id)
+
+    def list(self, limit: int = 50) -> list:
+        with self._lock:
+            rows = self._conn.execute(
+                'SELECT data FROM jobs ORDER BY created_at DESC LIMIT ?', (limit,)
+            ).fetchall()
+            return [json.loads(row[0]) for row in rows]
+
+    def _load(self, job_id: str):
+        row = self._conn.execute('SELECT data FROM jobs WHERE id = ?', (job_id,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def _fail_interrupted(self):
+        # Задачи, которые выполнялись в предыдущем процессе, уже не завершатся
+        with self._lock:
+            rows = self._conn.execute('SELECT id, data FROM jobs').fetchall()
+            for job_id, data in rows:
+                job = json.loads(data)
+                if job['state'] in FINISHED_STATES:
+                    continue
+                job.update(
+                    state=FAILED,
+                    error='Задача прервана перезапуском сервера',
+                    finished_at=time.time(),
+                    updated_at=time.time()
+                )
+                self._conn.execute('UPDATE jobs SET data = ? WHERE id = ?', (json.dumps(job), job_id))
+            self._conn.commit()
+
+
+def create_job_store():
+    """Создает хранилище задач по настройкам окружения (TTS_JOB_STORE=memory|sqlite)"""
+    kind = os.environ.get('TTS_JOB_STORE', 'memory').lower()
+    if kind == 'sqlite':
+        return SQLiteJobStore(os.environ.get('TTS_JOB_DB', 'jobs.sqlite3'))
+    return MemoryJobStore(max_jobs=env_int('TTS_JOB_MAX', 1000))
+
+
+class JobManager:
+    """Запускает задачи синтеза в исполнителе и отслеживает их прогресс"""
+
+    def __init__(self, store, executor):
+        self.store = store
+        self.executor = executor
+
+    def submit(self, kind: str, fn, params: dict, cleanup=None, wait=None, dispatcher: bool = False) -> dict:
+        """
+        Создает задачу и ставит ее в очередь исполнителя.
+        Задачи выполняются в потоках: прогресс пишется в хранилище из того же процесса.
+        @param kind: Тип задачи (например, 'generate').
+        @param fn: Функция fn(progress_callback=...) -> result, выполняющая работу.
+        @param params: Публичные параметры задачи для отображения клиенту.
+        @param cleanup: Функция, вызываемая после завершения задачи (успешного или нет).
+        @param wait: Функция, которая блокирует до готовности задачи к запуску (например, ждет
+            загрузки модели) и бросает исключение, если задача не может выполниться. Ожидание идет
+            в отдельном потоке, и место в исполнителе задача занимает только после него.
+        @param dispatcher: Задача сама раздает работу исполнителю (массовый синтез), поэтому
+            выполняется в своем потоке и не занимает в нем место.
+        @raise QueueFullError: Если очередь исполнителя переполнена (без wait и dispatcher).
+        """
+        job = new_job(kind, params)
+        self.store.create(job)
+        if wait is not None or dispatcher:
+            # Отдельный поток сохраняет контекст запроса (id запроса в логах задачи)
+            context = contextvars.copy_context()
+            threading.Thread(
+                target=context.run, args=(self._start_later, job['id'], fn, cleanup, wait, dispatcher),
+                name='tts-job-dispatch' if dispatcher else 'tts-job-wait', daemon=True
+            ).start()
+            return job
+        self._enqueue(job['id'], fn, cleanup)
+        return job
+
+    def _enqueue(self, job_id: str, fn, cleanup):
+        try:
+            self.executor.submit(self._run, job_id, fn, cleanup)
+        except Exception as e:
+            self.store.update(job_id, state=FAILED, error=str(e), finished_at=time.time())
+            if cleanup:
+                cleanup()
+            raise
+
+    def _start_later(self, job_id: str, fn, cleanup, wait, dispatcher: bool):
+        if wait is not None:
+            try:
+                wait()
+            except Exception as e:
+                logger.error('Job could not start: %s', e, extra={'job_id': job_id})
+                self.store.update(job_id, state=FAILED, error=str(e), finished_at=time.time())
+                if cleanup:
+                    cleanup()
+                return
+        if dispatcher:
+            self._run(job_id, fn, cleanup)
+            return
+        try:
+            self._enqueue(job_id, fn, cleanup)
+        except Exception as e:
+            # Ответ клиенту уже отправлен, ошибка видна в состоянии задачи
+            logger.error('Job could not be queued: %s', e, extra={'job_id': job_id})
+
+    def get(self, job_id: str):
+        return self.store.get(job_id)
+
+    def list(self, limit: int = 50) -> list:
+        return self.store.list(limit)
+
+    def _run(self, job_id: str, fn, cleanup):
+        started = time.time()
+        self.store.update(job_id, state=RUNNING, started_at=started)
+
+        def on_progress(done: int, total: int):
+            fields = {
+                'done_segments': done,
+                'total_segments': total,
+                'progress': round(done / total, 4) if total else 0.0,
+            }
+            if done:
+                # Оценка оставшегося времени по средней скорости готовых сегментов
+                fields['eta_seconds'] = round((time.time() - started) / done * (total - done), 1)
+            self.store.update(job_id, **fields)
+
+        try:
+            result = fn(progress_callback=on_progress)
+            self.store.update(
+                job_id, state=DONE, progress=1.0, eta_seconds=0,
+                result=result, finished_at=time.time()
+            )
+        except Exception as e:
+            logger.error('Job failed: %s', e, extra={'job_id': job_id})
+            self.store.update(
+                job_id, state=FAILED, error=str(e),
+                traceback=traceback.format_exc(), finished_at=time.time()
+            )
+        finally:
+            if cleanup:
+                cleanup()
@@ -0,0 +1,141 @@
+"""
+Логирование сервиса: уровни, id запроса в каждой записи, усечение больших полей
+и запись через очередь. Потоки синтеза только кладут запись в очередь, а вывод
+в stdout выполняет отдельный поток QueueListener, поэтому медленный вывод
+не задерживает синтез.
+
+Дополнительные поля передаются через extra и выводятся как key=value (TTS_LOG_FORMAT=text)
+или как поля JSON (TTS_LOG_FORMAT=json):
+    logger.info('Audio saved', extra={'path': output_path, 'seconds': 1.2})
+"""
+import atexit
+import contextvars
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+import uuid
+
+from services.config import env_int
+
+# Id запроса, к которому относится текущий код (задается middleware веб-приложения)
+request_id_var = contextvars.ContextVar('request_id', default='-')
+
+# Атрибуты LogRecord, которые не являются пользовательскими полями из extra
+_RECORD_ATTRS = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime', 'request_id'}
+
+_listener = None
+
+
+def new_request_id() -> str:
+    return uuid.uuid4().hex[:12]
+
+
+def truncate(value, limit: int = None):
+    """Усекает длинные строки и коллекции, чтобы один запрос не заполнял лог текстом или списком спикеров"""
+    limit = limit or LOG_MAX_FIELD
+    if isinstance(value, str):
+        return value if len(value) <= limit else f'{value[:limit]}...(+{len(value) - limit} chars)'
+    if isinstance(value, dict):
+        return {key: truncate(item, limit) for key, item in value.items()}
+    if isinstance(value, (list, tuple, set)):
+        items = list(value)
+        shown = [truncate(item, limit) for item in items[:LOG_MAX_ITEMS]]
+        if len(items) > LOG_MAX_ITEMS:
+            shown.append(f'...(+{len(items) - LOG_MAX_ITEMS} items)')
+        return shown
+    return value
+
+
+def _fields(record) -> dict:
+    return {
+        key: truncate(value)
+        for key, value in record.__dict__.items()
+        if key not in _RECORD_ATTRS and not key.startswith('_')
+    }
+
+
+class RequestIdFilter(logging.Filter):
+    """Добавляет в запись id текущего запроса"""
+
+    def filter(self, record):
+        record.request_id = request_id_var.get()
+        return True
+
+
+class TextFormatter(logging.Formatter):
+    def __init__(self):
+        super().__init__('%(asctime)s %(levelname)-7s [%(request_id)s] %(name)s: %(message)s')
+
+    def format(self, record):
+        line = super().format(record)
+        fields = _fields(record)
+        if fields:
+            line += ' ' + ' '.join(f'{key}={value}' for key, value in fields.items())
+        return line
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        data = {
+            'time': self.formatTime(record),
+            'level': record.levelname,
+            'logger': record.name,
+            'request_id': getattr(record, 'request_id', '-'),
+            'message': truncate(record.getMessage(), LOG_MAX_MESSAGE),
+            **_fields(record),
+        }
+        if record.exc_info:
+            data['exc_info'] = self.formatException(record.exc_info)
+        return json.dumps(data, ensure_ascii=False, default=str)
+
+
+def configure_logging(level: str = None, fmt: str = None, force: bool = False):
+    """
+    Настраивает корневой логгер: QueueHandler в вызывающих потоках и QueueListener,
+    который пишет в stderr. Повторный вызов ничего не делает, если не указан force
+    (нужен в процессах синтеза после fork: поток записи в них не наследуется).
+    """
+    global _listener
+    if _listener is not None and not force:
+        return
+    if _listener is not None:
+        try:
+            _listener.stop()
+        except Exception:
+            pass
+
+    handler = logging.StreamHandler(sys.stderr)
+    handler.setFormatter(JsonFormatter() if (fmt or LOG_FORMAT) == 'json' else TextFormatter())
+
+    log_queue = queue.SimpleQueue()
+    queue_handler = logging.handlers.QueueHandler(log_queue)
+    queue_handler.addFilter(RequestIdFilter())
+
+    root = logging.getLogger()
+    for existing in list(root.handlers):
+        if isinstance(existing, logging.handlers.QueueHandler):
+            root.removeHandler(existing)
+    root.addHandler(queue_handler)
+    root.setLevel((level or LOG_LEVEL).upper())
+
+    _listener = logging.handlers.QueueListener(log_queue, handler, respect_handler_level=True)
+    _listener.start()
+
+
+@atexit.register
+def _stop_listener():
+    # Дописываем оставшиеся в очереди записи при завершении процесса
+    if _listener is not None:
+        _listener.stop()
+
+
+LOG_LEVEL = os.environ.get('TTS_LOG_LEVEL', 'INFO')
+# text - строки для чтения человеком, json - по записи JSON в строке для сборщиков логов
+LOG_FORMAT = os.environ.get('TTS_LOG_FORMAT', 'text').strip().lower()
+# Максимальная длина строкового поля и число элементов списка в записи
+LOG_MAX_FIELD = env_int('TTS_LOG_MAX_FIELD', 200)
+LOG_MAX_ITEMS = env_int('TTS_LOG_MAX_ITEMS', 10)
+LOG_MAX_MESSAGE = env_int('TTS_LOG_MAX_MESSAGE', 2000)
@@ -0,0 +1,227 @@
+"""
+Метрики в текстовом формате Prometheus (без внешних зависимостей).
+
+Счетчики и гистограммы обновляются в коде синтеза, а показатели, которые
+уже считают другие сервисы (пул моделей, очередь, кэш), собираются
+функциями-коллекторами в момент запроса /metrics.
+"""
+import logging
+import threading
+import time
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+# Границы корзин гистограмм времени (секунды): от быстрых этапов до загрузки больших моделей
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def _escape(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(labels: dict) -> str:
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in labels.items()) + '}'
+
+
+def _format_value(value) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    type = None
+
+    def __init__(self, name: str, documentation: str, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values = {}
+
+    def _key(self, labels: dict) -> tuple:
+        return tuple(str(labels.get(name, '')) for name in self.labelnames)
+
+    def _labels(self, key: tuple, **extra) -> dict:
+        labels = dict(zip(self.labelnames, key))
+        labels.update(extra)
+        return labels
+
+
+class Counter(_Metric):
+    type = 'counter'
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def samples(self):
+        with self._lock:
+            return [(self.name, self._labels(key), value) for key, value in self._values.items()]
+
+
+class Gauge(_Metric):
+    type = 'gauge'
+
+    def set(self, value: float, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def samples(self):
+        with self._lock:
+            return [(self.name, self._labels(key), value) for key, value in self._values.items()]
+
+
+class Histogram(_Metric):
+    type = 'histogram'
+
+    def __init__(self, name: str, documentation: str, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (float('inf'),)
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = {'counts': [0] * len(self.buckets), 'sum': 0.0, 'count': 0}
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    entry['counts'][index] += 1
+                    break
+            entry['sum'] += value
+            entry['count'] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def samples(self):
+        samples = []
+        with self._lock:
+            for key, entry in self._values.items():
+                cumulative = 0
+                for bound, count in zip(self.buckets, entry['counts']):
+                    cumulative += count
+                    samples.append((f'{self.name}_bucket', self._labels(key, le=_format_value(bound)), cumulative))
+                samples.append((f'{self.name}_sum', self._labels(key), entry['sum']))
+                samples.append((f'{self.name}_count', self._labels(key), entry['count']))
+        return samples
+
+
+class Registry:
+    """Набор метрик и коллекторов, отдаваемый одним ответом /metrics"""
+
+    def __init__(self):
+        self._metrics = []
+        self._collectors = []
+        self._lock = threading.Lock()
+
+    def register(self, metric):
+        with self._lock:
+            self._metrics.append(metric)
+        return metric
+
+    def add_collector(self, collector):
+        """
+        @param collector: Функция без аргументов, возвращающая список
+            (имя, тип, описание, [(метки, значение), ...]).
+        """
+        with self._lock:
+            self._collectors.append(collector)
+
+    def render(self) -> str:
+        lines = []
+        with self._lock:
+            metrics, collectors = list(self._metrics), list(self._collectors)
+        for metric in metrics:
+            lines.append(f'# HELP {metric.name} {metric.documentation}')
+            lines.append(f'# TYPE {metric.name} {metric.type}')
+            for name, labels, value in metric.samples():
+                lines.append(f'{name}{_format_labels(labels)} {_format_value(value)}')
+        for collector in collectors:
+            try:
+                families = collector()
+            except Exception as e:
+                logger.warning('Metrics collector failed: %s', e)
+                continue
+            for name, metric_type, documentation, samples in families:
+                lines.append(f'# HELP {name} {documentation}')
+                lines.append(f'# TYPE {name} {metric_type}')
+                for labels, value in samples:
+                    if value is not None:
+                        lines.append(f'{name}{_format_labels(labels)} {_format_value(value)}')
+        return '\n'.join(lines) + '\n'
+
+
+# Общий реестр метрик процесса
+registry = Registry()
+
+STAGE_SECONDS = registry.register(Histogram(
+    'tts_stage_seconds',
+    'Длительность этапов синтеза: model_load, preprocess, inference, vocoder, write, encode',
+    ('stage', 'model', 'device')
+))
+QUEUE_WAIT_SECONDS = registry.register(Histogram(
+    'tts_queue_wait_seconds',
+    'Время ожидания задачи в очереди исполнителя синтеза',
+    ('pool',)
+))
+REQUESTS = registry.register(Counter(
+    'tts_requests_total',
+    'Запросы синтеза по типу и модели',
+    ('kind', 'model')
+))
+ERRORS = registry.register(Counter(
+    'tts_errors_total',
+    'Ошибки синтеза по типу запроса и причине',
+    ('kind', 'reason')
+))
+
+_local = threading.local()
+
+
+@contextmanager
+def stage_timer(stage: str, model: str = '', device: str = '', exclude_nested: bool = False):
+    """
+    Замеряет этап синтеза.
+    @param exclude_nested: Вычесть время вложенных этапов, замеренных через instrument_method
+        (например, вокодер внутри общего синтеза).
+    """
+    started = time.perf_counter()
+    nested_before = getattr(_local, 'nested', 0.0)
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        if exclude_nested:
+            elapsed -= getattr(_local, 'nested', 0.0) - nested_before
+        STAGE_SECONDS.observe(max(elapsed, 0.0), stage=stage, model=model, device=device)
+
+
+def instrument_method(obj, method: str, stage: str, model: str = '', device: str = ''):
+    """Оборачивает метод объекта замером этапа (для этапов внутри библиотечного кода, например вокодера)"""
+    original = getattr(obj, method)
+
+    def timed(*args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return original(*args, **kwargs)
+        finally:
+            elapsed = time.perf_counter() - started
+            _local.nested = getattr(_local, 'nested', 0.0) + elapsed
+            STAGE_SECONDS.observe(elapsed, stage=stage, model=model, device=device)
+
+    setattr(obj, method, timed)
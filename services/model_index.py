@@ -0,0 +1,208 @@
+"""
+Индекс метаданных скачанных моделей: спикеры, языки, частота дискретизации,
+размер и архитектура. Метаданные извлекаются один раз из файлов модели
+(config.json, файлы спикеров и языков) без загрузки весов, хранятся
+в models/index.json и отдаются из памяти.
+
+Перестроить индекс после добавления моделей:
+    python -m services.model_index rebuild
+"""
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from pathlib import Path
+
+from services.log import configure_logging
+
+logger = logging.getLogger(__name__)
+
+INDEX_VERSION = 2
+
+# Файлы со списком спикеров, которые Coqui кладет рядом с моделью
+SPEAKER_FILES = ('speakers_xtts.pth', 'speaker_ids.json', 'speaker_ids.pth', 'speakers.json', 'speakers.pth')
+
+
+def models_root() -> Path:
+    """Папка, в которую Coqui скачивает модели (TTS_HOME/tts)"""
+    tts_home = os.environ.get('TTS_HOME') or str(Path(__file__).parent.parent / 'models')
+    return Path(tts_home) / 'tts'
+
+
+def model_dir_name(model_name: str) -> str:
+    """Имя папки модели в формате Coqui: tts_models/en/ljspeech/vits -> tts_models--en--ljspeech--vits"""
+    return model_name.replace('/', '--')
+
+
+def model_name_from_dir(dir_name: str) -> str:
+    return dir_name.replace('--', '/')
+
+
+def _dir_signature(model_dir: Path) -> list:
+    """Список (имя, размер, mtime) файлов модели - меняется при повторной загрузке"""
+    return sorted(
+        [p.name, p.stat().st_size, int(p.stat().st_mtime)]
+        for p in model_dir.iterdir() if p.is_file()
+    )
+
+
+def _load_names(path: Path) -> list:
+    """Читает имена спикеров или языков из json/pth файла Coqui"""
+    if path.suffix == '.json':
+        with open(path, encoding='utf-8') as f:
+            data = json.load(f)
+    else:
+        import torch
+        data = torch.load(path, map_location='cpu')
+
+    if not isinstance(data, dict):
+        return list(data)
+    values = list(data.values())
+    # speakers.json / speakers.pth: {clip: {'name': speaker, 'embedding': [...]}}
+    if values and isinstance(values[0], dict) and 'name' in values[0]:
+        return sorted({value['name'] for value in values})
+    return list(data.keys())
+
+
+def extract_metadata(model_name: str, model_dir: Path) -> dict:
+    """Извлекает метаданные модели из ее файлов, не загружая веса"""
+    config = {}
+    config_path = model_dir / 'config.json'
+    if config_path.exists():
+        with open(config_path, encoding='utf-8') as f:
+            config = json.load(f)
+    audio = config.get('audio') or {}
+    model_args = config.get('model_args') or {}
+
+    speakers = []
+    for file_name in SPEAKER_FILES:
+        if (model_dir / file_name).exists():
+            try:
+                speakers = _load_names(model_dir / file_name)
+            except Exception as e:
+                logger.warning('Could not read speakers from %s: %s', model_dir / file_name, e)
+            break
+
+    languages = list(config.get('languages') or [])
+    if not languages and (model_dir / 'language_ids.json').exists():
+        languages = _load_names(model_dir / 'language_ids.json')
+
+    return {
+        'model_name': model_name,
+        'architecture': config.get('model'),
+        'sample_rate': audio.get('output_sample_rate') or audio.get('sample_rate'),
+        # Частота, с которой модель читает образец голоса (у XTTS она отличается от частоты вывода)
+        'reference_sample_rate': audio.get('sample_rate') or audio.get('output_sample_rate'),
+        'speakers': speakers,
+        'languages': languages,
+        'multi_speaker': bool(speakers) or bool(model_args.get('use_speaker_embedding')),
+        'size_bytes': sum(p.stat().st_size for p in model_dir.rglob('*') if p.is_file()),
+        'signature': _dir_signature(model_dir),
+        'indexed_at': time.time(),
+    }
+
+
+class ModelIndex:
+    """Индекс метаданных моделей: на диске в index.json, в работе - в памяти"""
+
+    def __init__(self, root: Path, index_path: Path = None):
+        self.root = Path(root)
+        self.index_path = Path(index_path) if index_path else self.root / 'index.json'
+        self._lock = threading.Lock()
+        self._entries = self._load()
+
+    def get(self, model_name: str):
+        """
+        Метаданные модели или None, если модель еще не скачана.
+        Модель, скачанная после построения индекса, индексируется при первом обращении.
+        """
+        with self._lock:
+            entry = self._entries.get(model_name)
+        if entry is not None:
+            return entry
+
+        dir_name = model_dir_name(model_name)
+        # Имя модели не должно указывать за пределы папки моделей ('..', абсолютные пути, '\\')
+        if not dir_name or dir_name.startswith('.') or '\\' in dir_name or '/' in dir_name:
+            return None
+        model_dir = self.root / dir_name
+        if not model_dir.is_dir():
+            return None
+        entry = extract_metadata(model_name, model_dir)
+        with self._lock:
+            self._entries[model_name] = entry
+            self._save()
+        return entry
+
+    def all(self) -> dict:
+        with self._lock:
+            return dict(self._entries)
+
+    def rebuild(self) -> dict:
+        """Заново индексирует все скачанные модели (измененные или новые)"""
+        entries = {}
+        if self.root.is_dir():
+            # Скрытые папки (например, .downloads с незаконченными загрузками) - не модели
+            for model_dir in sorted(p for p in self.root.iterdir() if p.is_dir() and not p.name.startswith('.')):
+                model_name = model_name_from_dir(model_dir.name)
+                with self._lock:
+                    previous = self._entries.get(model_name)
+                if previous and previous['signature'] == _dir_signature(model_dir):
+                    entries[model_name] = previous
+                    continue
+                logger.info('Indexing model', extra={'model': model_name})
+                try:
+                    entries[model_name] = extract_metadata(model_name, model_dir)
+                except Exception as e:
+                    logger.warning('Could not index %s: %s', model_name, e)
+        with self._lock:
+            self._entries = entries
+            self._save()
+        return entries
+
+    def _load(self) -> dict:
+        if not self.index_path.exists():
+            return {}
+        try:
+            with open(self.index_path, encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get('version') == INDEX_VERSION:
+                return data.get('models', {})
+        except (OSError, ValueError) as e:
+            logger.warning('Model index is unreadable, it will be rebuilt: %s', e)
+        return {}
+
+    def _save(self):
+        self.index_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.index_path.with_suffix('.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'version': INDEX_VERSION, 'models': self._entries}, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self.index_path)
+
+
+# Общий индекс метаданных моделей
+model_index = ModelIndex(models_root(), models_root().parent / 'index.json')
+
+
+def main(argv: list) -> int:
+    configure_logging()
+    command = argv[0] if argv else 'rebuild'
+    if command == 'rebuild':
+        entries = model_index.rebuild()
+        print(f"✅ Indexed {len(entries)} models -> {model_index.index_path}")
+        return 0
+    if command == 'show' and len(argv) > 1:
+        entry = model_index.get(argv[1])
+        if entry is None:
+            print(f"❌ Model is not downloaded: {argv[1]}")
+            return 1
+        print(json.dumps(entry, ensure_ascii=False, indent=2))
+        return 0
+    print('Usage: python -m services.model_index [rebuild | show <model_name>]')
+    return 2
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
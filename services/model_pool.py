@@ -0,0 +1,215 @@
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+from services.config import env_int
+
+logger = logging.getLogger(__name__)
+
+
+class ModelPool:
+    """
+    Пул загруженных моделей TTS, общий для всего процесса.
+    Модели хранятся по ключу (model_name, device) и вытесняются по LRU,
+    когда превышен лимит по количеству моделей или по объему параметров.
+    """
+
+    def __init__(self, loader, max_models: int = 2, max_bytes: int = 0):
+        """
+        @param loader: Функция loader(model_name, device), возвращающая готовую модель.
+        @param max_models: Максимальное количество моделей в памяти (0 - без ограничения).
+        @param max_bytes: Максимальный суммарный объем параметров в байтах (0 - без ограничения).
+        """
+        self._loader = loader
+        self.max_models = max_models
+        self.max_bytes = max_bytes
+        self._models = OrderedDict()
+        self._lock = threading.RLock()
+        self._load_locks = {}
+        self.hits = 0
+        self.shared_loads = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, model_name: str, device: str):
+        """
+        Возвращает модель из пула, загружая ее при промахе.
+        Загрузка идет под отдельной блокировкой на ключ: одновременные первые
+        запросы к одной модели ждут одну загрузку, а разные модели грузятся параллельно.
+        """
+        key = (model_name, device)
+        with self._lock:
+            entry = self._models.get(key)
+            if entry is not None:
+                return self._touch(key, entry)
+            load_lock = self._load_locks.setdefault(key, threading.Lock())
+
+        with load_lock:
+            with self._lock:
+                entry = self._models.get(key)
+                if entry is not None:
+                    # Модель загрузил параллельный запрос, пока мы ждали
+                    self.shared_loads += 1
+                    return self._touch(key, entry)
+                self.misses += 1
+
+            logger.info('Model pool miss', extra={'model': model_name, 'device': device})
+            started = time.time()
+            model = self._loader(model_name, device)
+            size = get_model_size(model)
+
+            with self._lock:
+                self._models[key] = {
+                    'model': model,
+                    'size': size,
+                    'loaded_at': time.time(),
+                    'last_used': time.time(),
+                    'load_seconds': time.time() - started,
+                }
+                self._evict(keep=key)
+            return model
+
+    def _touch(self, key, entry):
+        self._models.move_to_end(key)
+        entry['last_used'] = time.time()
+        self.hits += 1
+        return entry['model']
+
+    def peek(self, model_name: str):
+        """Возвращает уже загруженную модель на любом устройстве или None"""
+        with self._lock:
+            for (name, device), entry in reversed(self._models.items()):
+                if name == model_name:
+                    self.hits += 1
+                    entry['last_used'] = time.time()
+                    self._models.move_to_end((name, device))
+                    return entry['model']
+            return None
+
+    def replicas(self, model_name: str) -> dict:
+        """Устройства, на которых загружена модель: {device: размер в байтах}"""
+        with self._lock:
+            return {device: entry['size'] for (name, device), entry in self._models.items() if name == model_name}
+
+    def contains(self, model_name: str, device: str) -> bool:
+        """Проверяет, загружена ли модель без изменения порядка LRU"""
+        with self._lock:
+            return (model_name, device) in self._models
+
+    def evict(self, model_name: str, device: str = None) -> int:
+        """Выгружает модель (на всех устройствах, если device не указан)"""
+        with self._lock:
+            keys = [
+                key for key in self._models
+                if key[0] == model_name and (device is None or key[1] == device)
+            ]
+            for key in keys:
+                self._remove(key)
+            return len(keys)
+
+    def clear(self):
+        """Выгружает все модели"""
+        with self._lock:
+            for key in list(self._models):
+                self._remove(key)
+
+    def stats(self) -> dict:
+        """Статистика пула: счетчики попаданий/промахов/вытеснений и список моделей"""
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'shared_loads': self.shared_loads,
+                'max_models': self.max_models,
+                'max_bytes': self.max_bytes,
+                'resident_bytes': self._total_bytes(),
+                'models': [
+                    {
+                        'model_name': model_name,
+                        'device': device,
+                        'size_bytes': entry['size'],
+                        'load_seconds': round(entry['load_seconds'], 3),
+                        'idle_seconds': round(time.time() - entry['last_used'], 3),
+                    }
+                    for (model_name, device), entry in self._models.items()
+                ],
+            }
+
+    def _total_bytes(self) -> int:
+        return sum(entry['size'] for entry in self._models.values())
+
+    def _over_budget(self) -> bool:
+        if self.max_models and len(self._models) > self.max_models:
+            return True
+        if self.max_bytes and self._total_bytes() > self.max_bytes:
+            return True
+        return False
+
+    def _evict(self, keep):
+        # Вытесняем самые давно использованные модели, но не только что загруженную
+        while self._over_budget():
+            victim = next((key for key in self._models if key != keep), None)
+            if victim is None:
+                break
+            self._remove(victim)
+            self.evictions += 1
+
+    def _remove(self, key):
+        entry = self._models.pop(key)
+        logger.info('Model evicted from pool', extra={'model': key[0], 'device': key[1]})
+        del entry
+        _release_device_memory(key[1])
+
+
+def get_model_size(model) -> int:
+    """Считает объем параметров и буферов модели в байтах"""
+    try:
+        import torch
+    except ImportError:
+        return 0
+
+    total = 0
+    seen = set()
+    for module in _iter_torch_modules(model):
+        for tensor in list(module.parameters()) + list(module.buffers()):
+            if id(tensor) in seen:
+                continue
+            seen.add(id(tensor))
+            total += tensor.numel() * tensor.element_size()
+    return total
+
+
+def _iter_torch_modules(model):
+    """Находит torch-модули внутри объекта TTS (модель и вокодер синтезатора)"""
+    import torch
+
+    if isinstance(model, torch.nn.Module):
+        yield model
+        return
+    synthesizer = getattr(model, 'synthesizer', None)
+    if synthesizer is None:
+        return
+    for name in ('tts_model', 'vocoder_model'):
+        module = getattr(synthesizer, name, None)
+        if isinstance(module, torch.nn.Module):
+            yield module
+
+
+def _release_device_memory(device: str):
+    """Освобождает кэш CUDA после выгрузки модели"""
+    if not device.startswith('cuda'):
+        return
+    try:
+        import gc
+        import torch
+        gc.collect()
+        torch.cuda.empty_cache()
+    except ImportError:
+        pass
+
+
+# Лимиты пула задаются через переменные окружения
+POOL_MAX_MODELS = env_int('TTS_POOL_MAX_MODELS', 2)
+POOL_MAX_BYTES = env_int('TTS_POOL_MAX_BYTES', 0)
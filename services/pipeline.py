@@ -0,0 +1,114 @@
+import logging
+import queue
+import re
+import threading
+import time
+
+from services.config import env_int
+from services.text import split_paragraphs, split_sentences
+
+logger = logging.getLogger(__name__)
+
+# Места, где можно разрезать слишком длинное предложение (по убыванию приоритета)
+_CLAUSE_BREAK = re.compile(r'(?<=[,;:—–])\s+')
+
+
+def _split_long(sentence: str, max_chars: int) -> list:
+    """Режет предложение длиннее max_chars по запятым, а затем по пробелам"""
+    if len(sentence) <= max_chars:
+        return [sentence]
+
+    parts = []
+    current = ''
+    for piece in _CLAUSE_BREAK.split(sentence):
+        words = piece.split() if len(piece) > max_chars else [piece]
+        for word in words:
+            candidate = f'{current} {word}'.strip()
+            if current and len(candidate) > max_chars:
+                parts.append(current)
+                current = word
+            else:
+                current = candidate
+    if current:
+        parts.append(current)
+    return parts
+
+
+def segment_text(text: str, max_chars: int) -> list:
+    """
+    Делит текст на сегменты по границам абзацев и предложений, не длиннее max_chars.
+    @return: Список (текст сегмента, True если сегмент завершает абзац).
+    """
+    segments = []
+    for paragraph in split_paragraphs(text):
+        pieces = []
+        for sentence in split_sentences(paragraph):
+            pieces.extend(_split_long(sentence, max_chars))
+        for index, piece in enumerate(pieces):
+            segments.append((piece, index == len(pieces) - 1))
+    return segments
+
+
+def run_segments(texts: list, workers: list, retries: int = 2, progress_callback=None) -> list:
+    """
+    Синтезирует сегменты параллельно: каждый воркер (обычно - реплика модели
+    на своем устройстве) берет следующий сегмент из общей очереди.
+    @param workers: Список функций worker(text) -> сэмплы.
+    @param retries: Сколько раз повторить сегмент после ошибки.
+    @return: Сэмплы сегментов в исходном порядке.
+    """
+    results = [None] * len(texts)
+    pending = queue.Queue()
+    for index in range(len(texts)):
+        pending.put(index)
+
+    lock = threading.Lock()
+    failed = []
+    done = [0]
+    if progress_callback:
+        progress_callback(0, len(texts))
+
+    def work(worker):
+        while not failed:
+            try:
+                index = pending.get_nowait()
+            except queue.Empty:
+                return
+            for attempt in range(retries + 1):
+                try:
+                    results[index] = worker(texts[index])
+                    break
+                except Exception as e:
+                    logger.warning('Segment %d/%d failed (attempt %d): %s', index + 1, len(texts), attempt + 1, e)
+                    if attempt == retries:
+                        with lock:
+                            failed.append((index, e))
+                        return
+                    time.sleep(0.1 * (attempt + 1))
+            with lock:
+                done[0] += 1
+                if progress_callback:
+                    progress_callback(done[0], len(texts))
+
+    threads = [
+        threading.Thread(target=work, args=(worker,), name=f'tts-segment-{n}')
+        for n, worker in enumerate(workers[:max(1, len(texts))])
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    if failed:
+        index, error = failed[0]
+        raise RuntimeError(f'Не удалось синтезировать сегмент {index + 1} из {len(texts)}: {error}') from error
+    return results
+
+
+# Параметры конвейера для длинных текстов
+PIPELINE_MIN_CHARS = env_int('TTS_PIPELINE_MIN_CHARS', 400)
+PIPELINE_MAX_CHARS = env_int('TTS_PIPELINE_MAX_CHARS', 400)
+PIPELINE_SILENCE_MS = env_int('TTS_PIPELINE_SILENCE_MS', 150)
+PIPELINE_PARAGRAPH_SILENCE_MS = env_int('TTS_PIPELINE_PARAGRAPH_SILENCE_MS', 400)
+PIPELINE_CROSSFADE_MS = env_int('TTS_PIPELINE_CROSSFADE_MS', 10)
+PIPELINE_RETRIES = env_int('TTS_PIPELINE_RETRIES', 2)
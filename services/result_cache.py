@@ -0,0 +1,147 @@
+import hashlib
+import json
+import os
+import shutil
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
+from services.config import env_bool, env_int
+from services.text import normalize_text
+
+CHUNK_SIZE = 1024 * 1024
+
+
+def file_digest(path: str) -> str:
+    """SHA-256 содержимого файла (читается частями)"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def make_cache_key(
+        text: str,
+        model_name: str,
+        speaker: str = None,
+        language: str = None,
+        speaker_wav: str = None
+) -> str:
+    """
+    Ключ кэша: хэш нормализованного текста, модели, спикера, языка
+    и содержимого образца голоса (а не его временного имени файла).
+    """
+    speaker_wav_digest = file_digest(speaker_wav) if speaker_wav and os.path.exists(speaker_wav) else ''
+    payload = json.dumps(
+        [normalize_text(text), model_name, speaker or '', language or '', speaker_wav_digest],
+        ensure_ascii=False
+    )
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class ResultCache:
+    """
+    Дисковый кэш результатов синтеза с вытеснением по LRU при превышении объема.
+    Порядок LRU сохраняется между перезапусками через mtime файлов.
+    """
+
+    def __init__(self, directory: str, max_bytes: int, enabled: bool = True):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self.enabled = enabled
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.evictions = 0
+        if enabled:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            self._load_index()
+
+    def fetch(self, key: str, dest_path: str) -> bool:
+        """Копирует закэшированный результат в dest_path; возвращает False при промахе"""
+        with self._lock:
+            if key not in self._entries:
+                self.misses += 1
+                return False
+            path = self._path(key)
+            self._entries.move_to_end(key)
+            self.hits += 1
+        try:
+            shutil.copyfile(path, dest_path)
+            os.utime(path)
+            return True
+        except FileNotFoundError:
+            # Файл удалили с диска вручную - считаем промахом
+            with self._lock:
+                self._entries.pop(key, None)
+                self.hits -= 1
+                self.misses += 1
+            return False
+
+    def store(self, key: str, src_path: str):
+        """Сохраняет результат синтеза в кэш"""
+        path = self._path(key)
+        path.parent.mkdir(exist_ok=True)
+        tmp_path = path.with_suffix(f'.{threading.get_ident()}.tmp')
+        shutil.copyfile(src_path, tmp_path)
+        os.replace(tmp_path, path)
+        size = path.stat().st_size
+        with self._lock:
+            self._entries[key] = size
+            self._entries.move_to_end(key)
+            self.stores += 1
+            self._evict()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'enabled': self.enabled,
+                'entries': len(self._entries),
+                'bytes': sum(self._entries.values()),
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+                'stores': self.stores,
+                'evictions': self.evictions,
+            }
+
+    def _path(self, key: str) -> Path:
+        # Подпапки по первым символам ключа, чтобы не держать все файлы в одной директории
+        return self.directory / key[:2] / f'{key}.wav'
+
+    def _load_index(self):
+        files = []
+        for path in self.directory.glob('*/*.wav'):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            files.append((stat.st_mtime, path.stem, stat.st_size))
+        for _, key, size in sorted(files):
+            self._entries[key] = size
+        with self._lock:
+            self._evict()
+
+    def _evict(self):
+        total = sum(self._entries.values())
+        while self.max_bytes and total > self.max_bytes and len(self._entries) > 1:
+            key, size = self._entries.popitem(last=False)
+            total -= size
+            self.evictions += 1
+            try:
+                self._path(key).unlink()
+            except FileNotFoundError:
+                pass
+
+
+# Общий кэш результатов синтеза
+result_cache = ResultCache(
+    os.environ.get('TTS_CACHE_DIR', 'cache'),
+    max_bytes=env_int('TTS_CACHE_MAX_BYTES', 1024 * 1024 * 1024),
+    enabled=env_bool('TTS_CACHE_ENABLED', True)
+)
@@ -0,0 +1,295 @@
+"""
+Хранение результатов в output/: подпапки-шарды, индекс файлов и удаление старых результатов.
+
+Файлы раскладываются по подпапкам output/<2 символа хэша имени>/<имя>, чтобы в одной папке
+не копились десятки тысяч записей. Индекс (имя -> путь, размер, последнее обращение) строится
+один раз при запуске, и поиск файла для /audio и выбор уникального имени не обращаются к диску.
+Фоновый поток удаляет результаты, к которым не обращались дольше TTS_OUTPUT_TTL, а затем
+самые давно использованные, пока output/ больше TTS_OUTPUT_MAX_BYTES или на диске меньше
+TTS_OUTPUT_MIN_FREE_BYTES свободного места. Время последнего обращения сохраняется в atime
+файла, поэтому порядок LRU переживает перезапуск.
+"""
+import hashlib
+import logging
+import os
+import shutil
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from contextlib import contextmanager
+from pathlib import Path
+
+from services.config import env_int
+
+logger = logging.getLogger(__name__)
+
+# Папка массового синтеза: каждая ее подпапка хранится и удаляется целиком
+BULK_DIR = 'bulk'
+# Суффиксы файлов, которые лежат рядом с результатом и удаляются вместе с ним
+VARIANT_SUFFIXES = ('.gz', '.br')
+# Незаконченные файлы (синтез, кодирование, сжатие), которые не попадают в индекс
+TEMPORARY_SUFFIXES = ('.part', '.synth.wav', '.tmp')
+# Резерв имени, для которого так и не появился файл (синтез завершился ошибкой)
+RESERVATION_TTL = 3600
+# Как часто записывать время обращения в atime файла
+ACCESS_PERSIST_INTERVAL = 60
+
+
+def shard_name(filename: str) -> str:
+    return hashlib.md5(filename.encode('utf-8')).hexdigest()[:2]
+
+
+def _path_size(path: Path) -> int:
+    if path.is_dir():
+        return sum(p.stat().st_size for p in path.rglob('*') if p.is_file())
+    size = path.stat().st_size
+    for suffix in VARIANT_SUFFIXES:
+        variant = path.with_name(path.name + suffix)
+        if variant.is_file():
+            size += variant.stat().st_size
+    return size
+
+
+def _remove(path: Path):
+    if path.is_dir():
+        shutil.rmtree(path, ignore_errors=True)
+        return
+    for target in (path, *(path.with_name(path.name + suffix) for suffix in VARIANT_SUFFIXES)):
+        try:
+            target.unlink()
+        except FileNotFoundError:
+            pass
+
+
+class OutputStore:
+    """
+    Индекс результатов в output/ с вытеснением по TTL, объему и свободному месту на диске.
+    Ключ записи - имя файла (как в /audio/<имя>) или bulk/<name> для папки массового синтеза.
+    """
+
+    def __init__(self, directory: str, ttl: int = 0, max_bytes: int = 0, min_free_bytes: int = 0,
+                 sweep_interval: int = 300):
+        """
+        @param ttl: Удалять результаты, к которым не обращались столько секунд (0 - не удалять).
+        @param max_bytes: Максимальный объем output/ (0 - без ограничения).
+        @param min_free_bytes: Сколько места оставлять свободным на диске (0 - не следить).
+        @param sweep_interval: Период фоновой очистки в секундах.
+        """
+        self.directory = Path(directory)
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.min_free_bytes = min_free_bytes
+        self.sweep_interval = sweep_interval
+        self._entries = OrderedDict()
+        self._reserved = {}
+        self._held = {}
+        self._shards = set()
+        self._lock = threading.Lock()
+        self._load_lock = threading.Lock()
+        self._loaded = False
+        self._thread = None
+        self._stop = threading.Event()
+        self.expired = 0
+        self.evictions = 0
+        self.last_sweep = None
+
+    def reserve(self, filename: str) -> str:
+        """
+        Выбирает уникальное имя для нового результата (по индексу, без проверки диска)
+        и возвращает путь к нему в подпапке-шарде. Суффикс добавляется всегда: /audio отдает
+        файлы как immutable, поэтому имя удаленного очисткой результата не должно достаться новому.
+        """
+        self._ensure_loaded()
+        path = Path(filename)
+        with self._lock:
+            filename = f'{path.stem}_{uuid.uuid4().hex[:8]}{path.suffix}'
+            while filename in self._entries or filename in self._reserved:
+                filename = f'{path.stem}_{uuid.uuid4().hex[:8]}{path.suffix}'
+            self._reserved[filename] = time.time()
+        return str(self._shard_dir(filename) / filename)
+
+    def add(self, path: str, key: str = None):
+        """Добавляет готовый результат (файл или папку) в индекс"""
+        self._ensure_loaded()
+        path = Path(path)
+        key = key or path.name
+        entry = {'path': path, 'size': _path_size(path), 'last_access': time.time(), 'persisted': time.time()}
+        with self._lock:
+            self._reserved.pop(key, None)
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+
+    def get(self, key: str):
+        """Путь к результату или None; обращение обновляет его место в LRU"""
+        self._ensure_loaded()
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            self._entries.move_to_end(key)
+            entry['last_access'] = now
+            persist = now - entry['persisted'] > ACCESS_PERSIST_INTERVAL
+            if persist:
+                entry['persisted'] = now
+        if persist:
+            try:
+                # mtime не меняется: от него зависят ETag и кэш браузеров
+                os.utime(entry['path'], (now, entry['path'].stat().st_mtime))
+            except FileNotFoundError:
+                pass
+        return entry['path']
+
+    def discard(self, key: str):
+        """Убирает из индекса запись, файл которой удалили с диска вручную"""
+        with self._lock:
+            self._entries.pop(key, None)
+
+    @contextmanager
+    def hold(self, key: str):
+        """Не удалять запись, пока с ней идет работа (например, массовый синтез дописывает папку)"""
+        with self._lock:
+            self._held[key] = self._held.get(key, 0) + 1
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._held[key] -= 1
+                if not self._held[key]:
+                    del self._held[key]
+
+    def sweep(self) -> dict:
+        """Удаляет результаты по TTL, объему и свободному месту; файлы удаляются вне блокировки"""
+        self._ensure_loaded()
+        now = time.time()
+        victims = []
+        with self._lock:
+            self._reserved = {key: at for key, at in self._reserved.items() if now - at < RESERVATION_TTL}
+            candidates = [key for key in self._entries if key not in self._held]
+            if self.ttl:
+                for key in candidates:
+                    if now - self._entries[key]['last_access'] > self.ttl:
+                        victims.append((key, self._entries.pop(key), 'ttl'))
+                candidates = [key for key in candidates if key in self._entries]
+            total = sum(entry['size'] for entry in self._entries.values())
+            need = total - self.max_bytes if self.max_bytes else 0
+            if self.min_free_bytes:
+                free = shutil.disk_usage(self.directory).free
+                need = max(need, self.min_free_bytes - free)
+            for key in candidates:
+                if need <= 0:
+                    break
+                entry = self._entries.pop(key)
+                need -= entry['size']
+                victims.append((key, entry, 'lru'))
+            self.expired += sum(1 for _, _, reason in victims if reason == 'ttl')
+            self.evictions += sum(1 for _, _, reason in victims if reason == 'lru')
+            self.last_sweep = now
+
+        for key, entry, reason in victims:
+            _remove(entry['path'])
+            logger.debug('Output removed', extra={'key': key, 'reason': reason, 'bytes': entry['size']})
+        freed = sum(entry['size'] for _, entry, _ in victims)
+        if victims:
+            logger.info('Output sweep finished', extra={'removed': len(victims), 'freed_bytes': freed})
+        return {'removed': len(victims), 'freed_bytes': freed}
+
+    def start(self):
+        """Запускает фоновую очистку (первый проход также строит индекс)"""
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._loop, name='tts-output-sweeper', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                'loaded': self._loaded,
+                'entries': len(self._entries),
+                'bytes': sum(entry['size'] for entry in self._entries.values()),
+                'max_bytes': self.max_bytes,
+                'ttl': self.ttl,
+                'min_free_bytes': self.min_free_bytes,
+                'expired': self.expired,
+                'evictions': self.evictions,
+                'last_sweep': self.last_sweep,
+            }
+
+    def _loop(self):
+        while True:
+            try:
+                self.sweep()
+            except Exception as e:
+                logger.error('Output sweep failed: %s', e)
+            if self._stop.wait(self.sweep_interval):
+                return
+
+    def _shard_dir(self, filename: str) -> Path:
+        shard = shard_name(filename)
+        directory = self.directory / shard
+        if shard not in self._shards:
+            directory.mkdir(parents=True, exist_ok=True)
+            self._shards.add(shard)
+        return directory
+
+    def _ensure_loaded(self):
+        if self._loaded:
+            return
+        with self._load_lock:
+            if not self._loaded:
+                self._load_index()
+                self._loaded = True
+
+    def _load_index(self):
+        started = time.perf_counter()
+        files = []
+        self.directory.mkdir(parents=True, exist_ok=True)
+        for path in self.directory.iterdir():
+            if path.is_dir() and path.name == BULK_DIR:
+                for job_dir in path.iterdir():
+                    if job_dir.is_dir():
+                        files.append((f'{BULK_DIR}/{job_dir.name}', job_dir))
+            elif path.is_dir():
+                files.extend((p.name, p) for p in path.iterdir() if p.is_file())
+            elif path.is_file():
+                # Результаты, сохраненные до появления подпапок, остаются на своих местах
+                files.append((path.name, path))
+
+        loaded = []
+        for key, path in files:
+            if key.endswith(VARIANT_SUFFIXES + TEMPORARY_SUFFIXES) or key.startswith('.'):
+                continue
+            try:
+                stat = path.stat()
+                size = _path_size(path)
+            except FileNotFoundError:
+                continue
+            last_access = max(stat.st_atime, stat.st_mtime)
+            loaded.append((last_access, key, {'path': path, 'size': size, 'last_access': last_access,
+                                              'persisted': last_access}))
+        with self._lock:
+            for _, key, entry in sorted(loaded, key=lambda item: item[0]):
+                self._entries.setdefault(key, entry)
+        logger.info('Output index loaded', extra={
+            'entries': len(loaded), 'seconds': round(time.perf_counter() - started, 3)
+        })
+
+
+# Срок хранения результатов, лимиты объема и свободного места, период очистки (секунды)
+OUTPUT_TTL = env_int('TTS_OUTPUT_TTL', 0)
+OUTPUT_MAX_BYTES = env_int('TTS_OUTPUT_MAX_BYTES', 0)
+OUTPUT_MIN_FREE_BYTES = env_int('TTS_OUTPUT_MIN_FREE_BYTES', 0)
+OUTPUT_SWEEP_INTERVAL = env_int('TTS_OUTPUT_SWEEP_INTERVAL', 300)
+
+# Общее хранилище результатов
+output_store = OutputStore(
+    'output',
+    ttl=OUTPUT_TTL,
+    max_bytes=OUTPUT_MAX_BYTES,
+    min_free_bytes=OUTPUT_MIN_FREE_BYTES,
+    sweep_interval=OUTPUT_SWEEP_INTERVAL
+)
@@ -0,0 +1,33 @@
+import re
+
+# Конец предложения: точка, восклицательный/вопросительный знак, многоточие
+# (в том числе CJK-варианты), за которыми идет пробел или конец текста
+_SENTENCE_END = re.compile(r'(?<=[.!?…。！？])\s+')
+_PARAGRAPH_BREAK = re.compile(r'\n\s*\n')
+
+
+def normalize_text(text: str) -> str:
+    """
+    Схлопывает пробельные символы внутри строк и обрезает края.
+    Границы абзацев сохраняются отдельно от переносов строк: между абзацами синтез
+    вставляет более длинную паузу, поэтому такие тексты звучат по-разному.
+    """
+    paragraphs = []
+    for paragraph in split_paragraphs(text):
+        lines = [' '.join(line.split()) for line in paragraph.splitlines()]
+        paragraphs.append('\n'.join(line for line in lines if line))
+    return '\n\n'.join(paragraphs)
+
+
+def split_paragraphs(text: str) -> list:
+    """Делит текст на абзацы по пустым строкам"""
+    return [p.strip() for p in _PARAGRAPH_BREAK.split(text.strip()) if p.strip()]
+
+
+def split_sentences(text: str) -> list:
+    """Делит текст на предложения с сохранением знаков препинания"""
+    sentences = []
+    for paragraph in split_paragraphs(text):
+        for line in paragraph.splitlines():
+            sentences.extend(s.strip() for s in _SENTENCE_END.split(line) if s.strip())
+    return sentences
@@ -1,6 +1,10 @@
+import logging
 import os
-import sys
-from io import StringIO
+import threading
+import time
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
 
 # Исправляем проблему с BeamSearchScorer в новых версиях transformers
 def fix_transformers_compatibility():
@@ -15,7 +19,7 @@ def fix_transformers_compatibility():
         
         # Если версия >= 4.40, добавляем заглушку для BeamSearchScorer
         if major > 4 or (major == 4 and minor >= 40):
-            print("🔧 Исправление совместимости с transformers >= 4.40")
+            logger.info('Исправление совместимости с transformers >= 4.40')
             
             # Добавляем заглушку для BeamSearchScorer
             import transformers.generation
@@ -24,66 +28,181 @@ def fix_transformers_compatibility():
                     def __init__(self, *args, **kwargs):
                         pass
                 transformers.generation.BeamSearchScorer = BeamSearchScorer
-                print("✅ Добавлена заглушка для BeamSearchScorer")
+                logger.info('Добавлена заглушка для BeamSearchScorer')
                 
     except Exception as e:
-        print(f"⚠️ Не удалось исправить совместимость: {e}")
+        logger.warning('Не удалось исправить совместимость: %s', e)
 
-# Применяем исправление при импорте
-fix_transformers_compatibility()
 
-from TTS.api import TTS  # noqa
+from services.audio import concatenate, to_pcm16, wav_header, write_wav
+from services.batching import padded_batch_inference, supports_padded_batch
+from services.catalog import model_catalog
+from services.config import env_list
+from services.devices import DeviceScheduler, DEVICES, DEVICE_MAX_INFLIGHT, is_accelerator, torch_device
+from services.metrics import ERRORS, instrument_method, stage_timer
+from services.model_pool import ModelPool, POOL_MAX_MODELS, POOL_MAX_BYTES
+from services.optimize import cpu_optimize_enabled, inference_context, optimize_for_cpu
+from services.pipeline import (
+    segment_text, run_segments, PIPELINE_MIN_CHARS, PIPELINE_MAX_CHARS, PIPELINE_SILENCE_MS,
+    PIPELINE_PARAGRAPH_SILENCE_MS, PIPELINE_CROSSFADE_MS, PIPELINE_RETRIES
+)
+from services.result_cache import make_cache_key, result_cache
+from services.voices import supports_latents, voice_registry, VOICES_AUTO_REGISTER
 
 os.makedirs("../output", exist_ok=True)
 
-# Автоматически соглашаемся с лицензией XTTS v2
-def auto_accept_license():
-    """Автоматически принимает лицензионные условия для XTTS v2"""
-    # Устанавливаем переменную окружения для автоматического принятия лицензии
-    os.environ['COQUI_TOS_AGREED'] = '1'
-    original_stdin = sys.stdin
-    sys.stdin = StringIO('y\n')
-    return original_stdin
+# Лицензию Coqui (CPML для XTTS) принимаем один раз через переменную окружения:
+# при COQUI_TOS_AGREED=1 Coqui не спрашивает подтверждение через stdin, поэтому
+# загрузка моделей не меняет глобальное состояние процесса и безопасна из нескольких потоков
+os.environ.setdefault('COQUI_TOS_AGREED', '1')
 
-def restore_stdin(original_stdin):
-    """Восстанавливает оригинальный stdin"""
-    sys.stdin = original_stdin
 
+_backend_lock = threading.Lock()
+_tts_class = None
+_gpu = None
 
-def get_model_supported_languages(model_name: str):
-    """Получает список поддерживаемых языков для модели"""
-    # Словарь поддерживаемых языков для каждой модели
-    model_languages = {
-        'tts_models/multilingual/multi-dataset/xtts_v2': ['en', 'es', 'fr', 'de', 'it', 'pt', 'pl', 'tr', 'ru', 'nl', 'cs', 'ar', 'zh-cn', 'ja', 'hu', 'ko', 'hi'],
-        'tts_models/multilingual/multi-dataset/xtts_v1.1': ['en', 'es', 'fr', 'de', 'it', 'pt', 'pl', 'tr', 'ru', 'nl', 'cs', 'ar', 'zh-cn', 'ja', 'hu', 'ko', 'hi'],
-        'tts_models/multilingual/multi-dataset/your_tts': ['en', 'fr-fr', 'pt-br'],
-        'tts_models/multilingual/multi-dataset/bark': ['en', 'es', 'fr', 'de', 'it', 'pt', 'pl', 'tr', 'ru', 'nl', 'cs', 'ar', 'zh-cn', 'ja', 'hu', 'ko', 'hi'],
-    }
-    
-    # Если модель не найдена в словаре, возвращаем None (неизвестно)
-    return model_languages.get(model_name, None)
 
-def generate_audio(
-        text: str,
-        model_name: str,
-        output_path: str,
-        gpu: bool = True,
-        speaker_wav: str = None,
-        language: str = None,
-        speaker: str = None
-):
+def import_backend():
     """
-    Generate audio from text using Coqui TTS.
-    @param text: Text to generate audio from.
-    @param model_name: Model name to use.
-    @param output_path: Path to save the audio.
-    @param gpu: Whether to use GPU.
-    @param speaker_wav: Path to speaker audio file for voice cloning.
-    @param language: Language code for multilingual models.
-    @param speaker: Speaker name for multi-speaker models.
-    @return: None
+    Импортирует Coqui TTS (вместе с ним torch и transformers) при первой загрузке модели,
+    а не при импорте модуля: веб-сервер запускается, не дожидаясь тяжелых библиотек.
+    @return: Класс TTS.api.TTS.
+    """
+    global _tts_class
+    if _tts_class is None:
+        with _backend_lock:
+            if _tts_class is None:
+                started = time.perf_counter()
+                # Исправление совместимости нужно до импорта TTS
+                fix_transformers_compatibility()
+                from TTS.api import TTS
+                _tts_class = TTS
+                logger.info('TTS backend imported', extra={'seconds': round(time.perf_counter() - started, 3)})
+    return _tts_class
+
+
+def gpu_available() -> bool:
+    """Проверяет, доступен ли CUDA GPU (результат кэшируется: torch импортируется один раз)"""
+    global _gpu
+    if _gpu is None:
+        try:
+            import torch
+            _gpu = torch.cuda.is_available()
+        except ImportError:
+            _gpu = False
+    return _gpu
+
+
+def gpu_checked():
+    """Результат gpu_available без импорта torch: None, если проверки еще не было"""
+    return _gpu
+
+
+def load_tts(model_name: str, device: str):
+    """Загружает модель TTS и переносит ее на указанное устройство"""
+    try:
+        logger.info('Loading TTS model', extra={'model': model_name, 'device': device})
+        with stage_timer('model_load', model_name, device):
+            tts = import_backend()(model_name)
+
+            tts.to(torch_device(device))
+
+            # Оптимизированный путь для CPU: int8-квантизация, inference_mode, опционально torch.compile
+            if not is_accelerator(device) and cpu_optimize_enabled(model_name):
+                try:
+                    optimize_for_cpu(tts, model_name)
+                except Exception as e:
+                    logger.warning('CPU optimization failed for %s, using the original model: %s', model_name, e)
+
+        # Метки метрик реплики; отдельный вокодер (Tacotron/Glow-TTS) замеряется как свой этап
+        tts.metric_labels = {'model': model_name, 'device': device}
+        if getattr(tts.synthesizer, 'vocoder_model', None) is not None:
+            instrument_method(tts.synthesizer.vocoder_model, 'inference', 'vocoder', model_name, device)
+
+        # Проверяем доступные атрибуты модели
+        logger.info('Model loaded', extra={
+            'model': model_name, 'device': device, 'accelerator': is_accelerator(device),
+            'speakers': hasattr(tts, 'speakers'), 'languages': hasattr(tts, 'language')
+        })
+        return tts
+
+    except Exception as e:
+        logger.error('Error initializing TTS: %s', e, extra={'model': model_name})
+
+        # Специальная обработка для модели Bark
+        if 'bark' in model_name.lower():
+            logger.info('Bark model failed, suggesting alternatives')
+            alternative_models = [
+                'tts_models/multilingual/multi-dataset/xtts_v2',
+                'tts_models/multilingual/multi-dataset/xtts_v1.1',
+                'tts_models/multilingual/multi-dataset/your_tts'
+            ]
+            raise ValueError(
+                f"Модель Bark повреждена или не может быть загружена. "
+                f"Попробуйте альтернативные модели: {', '.join(alternative_models)}"
+            )
+
+        raise
+
+
+# Общий для процесса пул загруженных моделей
+model_pool = ModelPool(load_tts, max_models=POOL_MAX_MODELS, max_bytes=POOL_MAX_BYTES)
+
+
+# Размещение реплик моделей по устройствам и маршрутизация запросов (TTS_DEVICES)
+device_scheduler = DeviceScheduler(DEVICES, model_pool.replicas, max_inflight=DEVICE_MAX_INFLIGHT)
+
+
+def get_tts(model_name: str, gpu: bool = True):
+    """Возвращает модель из пула (загружает при первом обращении) на выбранном планировщиком устройстве"""
+    return model_pool.get(model_name, device_scheduler.select(model_name, gpu))
+
+
+@contextmanager
+def use_tts(model_name: str, gpu: bool = True):
+    """
+    Модель на наименее загруженном устройстве; пока блок выполняется,
+    запрос учитывается в нагрузке этого устройства.
     """
-    # Проверяем поддержку языка для модели
+    with device_scheduler.lease(model_name, gpu) as device:
+        yield model_pool.get(model_name, device)
+
+
+def stage(tts, name: str):
+    """Замер этапа синтеза с метками модели и устройства реплики"""
+    return stage_timer(name, **getattr(tts, 'metric_labels', {}))
+
+
+def preload_model(model_name: str, device: str = None):
+    """Загружает модель в пул; без device устройство выбирает планировщик. Возвращает (tts, device)"""
+    device = device or device_scheduler.select(model_name, True)
+    return model_pool.get(model_name, device), device
+
+
+def warm_up(tts, model_name: str, text: str = 'Warm up.'):
+    """Пробный синтез короткой фразы, чтобы первый настоящий запрос не платил за инициализацию"""
+    languages = getattr(tts, 'languages', None) or []
+    language = None
+    if languages:
+        language = 'en' if 'en' in languages else languages[0]
+    tts_params = resolve_tts_params(tts, model_name, language=language)
+    synthesize_text(tts, text, tts_params)
+
+    try:
+        import torch
+        if torch.cuda.is_available():
+            torch.cuda.synchronize()
+    except ImportError:
+        pass
+
+
+def get_model_supported_languages(model_name: str):
+    """Получает список поддерживаемых языков для модели из каталога (None - неизвестно)"""
+    return model_catalog.supported_languages(model_name)
+
+
+def validate_language(model_name: str, language: str = None):
+    """Проверяет, что модель поддерживает выбранный язык"""
     if language:
         supported_languages = get_model_supported_languages(model_name)
         if supported_languages and language not in supported_languages:
@@ -103,72 +222,30 @@ def generate_audio(
                     f"Модель {model_name} не поддерживает язык '{language}'. "
                     f"Поддерживаемые языки: {supported_languages}"
                 )
-    
-    # Автоматически принимаем лицензию для XTTS v2
-    original_stdin = None
-    if 'xtts' in model_name.lower():
-        original_stdin = auto_accept_license()
-    
-    try:
-        print(f"🔄 Loading TTS model: {model_name}")
-        tts = TTS(model_name)
-        print(f"✅ Model loaded successfully")
-        
-        # Используем новый API вместо устаревшего параметра gpu
-        if gpu:
-            try:
-                import torch
-                if torch.cuda.is_available():
-                    tts.to('cuda')
-                    print('🚀 Using GPU acceleration')
-                else:
-                    print('⚠️ GPU not available, using CPU')
-            except ImportError:
-                print('⚠️ PyTorch not available, using CPU')
-        else:
-            tts.to('cpu')
-            print('💻 Using CPU')
-            
-        # Проверяем доступные атрибуты модели
-        print(f"📋 Model attributes: speakers={hasattr(tts, 'speakers')}, language={hasattr(tts, 'language')}")
-        
-    except Exception as e:
-        print(f"❌ Error initializing TTS: {e}")
-        print(f"📋 Model name: {model_name}")
-        
-        # Специальная обработка для модели Bark
-        if 'bark' in model_name.lower():
-            print("🔧 Bark model failed, suggesting alternatives...")
-            alternative_models = [
-                'tts_models/multilingual/multi-dataset/xtts_v2',
-                'tts_models/multilingual/multi-dataset/xtts_v1.1',
-                'tts_models/multilingual/multi-dataset/your_tts'
-            ]
-            raise ValueError(
-                f"Модель Bark повреждена или не может быть загружена. "
-                f"Попробуйте альтернативные модели: {', '.join(alternative_models)}"
-            )
-        
-        raise
-    finally:
-        if original_stdin:
-            restore_stdin(original_stdin)
 
-    # Подготавливаем параметры для генерации
-    tts_params = {
-        'text': text,
-        'file_path': output_path
-    }
+
+def resolve_tts_params(
+        tts,
+        model_name: str,
+        speaker_wav: str = None,
+        language: str = None,
+        speaker: str = None
+) -> dict:
+    """
+    Подбирает параметры синтеза (speaker_wav, language, speaker) для модели.
+    @return: Словарь параметров для tts.tts() / tts.tts_to_file() без text и file_path.
+    """
+    tts_params = {}
 
     # Добавляем speaker_wav если предоставлен (для клонирования голоса)
     if speaker_wav and os.path.exists(speaker_wav):
         tts_params['speaker_wav'] = speaker_wav
-        print(f'🎯 Using speaker sample: {speaker_wav}')
+        logger.debug('Using speaker sample', extra={'speaker_wav': speaker_wav})
 
     # Добавляем language если предоставлен
     if language:
         tts_params['language'] = language
-        print(f'🌍 Using language: {language}')
+        logger.debug('Using language', extra={'language': language})
 
     # Специальная обработка для XTTS v2
     if 'xtts' in model_name.lower():
@@ -178,31 +255,31 @@ def generate_audio(
             try:
                 speakers = tts.speakers
                 if speakers and len(speakers) > 0:
-                    print(f"📋 Available speakers: {speakers}")
+                    logger.debug('Available speakers', extra={'count': len(speakers), 'speakers': speakers})
                     # Если пользователь выбрал спикера, проверяем его наличие
                     if speaker and speaker in speakers:
                         tts_params['speaker'] = speaker
-                        print(f"🎯 Using selected XTTS speaker: {speaker}")
+                        logger.debug('Using selected XTTS speaker', extra={'speaker': speaker})
                     else:
                         # Используем первого доступного спикера
                         first_speaker = list(speakers.keys())[0] if isinstance(speakers, dict) else speakers[0]
                         tts_params['speaker'] = first_speaker
-                        print(f"🎯 Using first available XTTS speaker: {first_speaker}")
+                        logger.debug('Using first available XTTS speaker', extra={'speaker': first_speaker})
                 else:
                     # Если нет встроенных спикеров, XTTS v2 требует speaker_wav
-                    print(f"🎯 No built-in speakers found for XTTS, speaker_wav required")
+                    logger.debug('No built-in speakers found for XTTS, speaker_wav required')
                     if not speaker_wav:
                         raise ValueError("XTTS v2 не имеет встроенных спикеров. Пожалуйста, загрузите образец голоса (3-10 секунд аудио) или выберите другую модель.")
             except Exception as e:
                 # Если ошибка получения спикеров, XTTS v2 требует speaker_wav
-                print(f"🎯 Could not get XTTS speakers: {e}, speaker_wav required")
+                logger.debug('Could not get XTTS speakers, speaker_wav required: %s', e)
                 if not speaker_wav:
                     raise ValueError("XTTS v2 не может получить список спикеров. Пожалуйста, загрузите образец голоса (3-10 секунд аудио) или выберите другую модель.")
     else:
         # Добавляем speaker если предоставлен (для моделей с множественными спикерами)
         if speaker:
             tts_params['speaker'] = speaker
-            print(f'🎤 Using speaker: {speaker}')
+            logger.debug('Using speaker', extra={'speaker': speaker})
         elif not speaker_wav and 'multilingual' in model_name:
             # Для многоязычных моделей без speaker_wav используем default speaker
             try:
@@ -210,27 +287,290 @@ def generate_audio(
                 if speakers and len(speakers) > 0:
                     first_speaker = list(speakers.keys())[0] if isinstance(speakers, dict) else speakers[0]
                     tts_params['speaker'] = first_speaker
-                    print(f"🎯 Using multilingual speaker: {first_speaker}")
+                    logger.debug('Using multilingual speaker', extra={'speaker': first_speaker})
                 else:
                     # Если нет встроенных спикеров, используем дефолтный
                     tts_params['speaker'] = 'female'
-                    print(f"🎯 Using default speaker for multilingual model")
+                    logger.debug('Using default speaker for multilingual model')
             except:  # noqa
                 # В крайнем случае используем дефолтный спикер
                 tts_params['speaker'] = 'female'
-                print(f"🎯 Using fallback default speaker for multilingual model")
+                logger.debug('Using fallback default speaker for multilingual model')
 
-    try:
-        print(f"🎵 Generating audio with parameters: {tts_params}")
-        print(f"📋 Model: {model_name}")
-        print(f"📋 Has speaker_wav: {bool(speaker_wav)}")
-        print(f"📋 Has speaker: {bool(speaker)}")
-        print(f"📋 Has language: {bool(language)}")
-        
-        tts.tts_to_file(**tts_params)
-        print(f"✅ Audio saved: {output_path}")
-    except Exception as e:
-        print(f"❌ Error generating audio: {e}")
-        print(f"📋 Parameters used: {tts_params}")
-        print(f"📋 Model name: {model_name}")
-        raise
+    return tts_params
+
+
+def generate_audio(
+        text: str,
+        model_name: str,
+        output_path: str,
+        gpu: bool = True,
+        speaker_wav: str = None,
+        language: str = None,
+        speaker: str = None,
+        progress_callback=None,
+        voice_id: str = None,
+        use_cache: bool = True
+):
+    """
+    Generate audio from text using Coqui TTS.
+    @param text: Text to generate audio from.
+    @param model_name: Model name to use.
+    @param output_path: Path to save the audio.
+    @param gpu: Whether to use GPU.
+    @param speaker_wav: Path to speaker audio file for voice cloning.
+    @param language: Language code for multilingual models.
+    @param speaker: Speaker name for multi-speaker models.
+    @param progress_callback: Optional callable(done, total); when set, text is
+        synthesized sentence by sentence and progress is reported after each one.
+    @param voice_id: Registered voice id; XTTS reuses its cached conditioning latents.
+    @param use_cache: Read and store the result cache; False always runs the model.
+    @return: None
+    """
+    validate_language(model_name, language)
+
+    # Зарегистрированный голос заменяет загруженный образец
+    if voice_id:
+        speaker_wav = voice_registry.reference_path(voice_id)
+
+    # Одинаковые запросы отдаем из кэша, не обращаясь к модели
+    cache_key = None
+    if use_cache and result_cache.enabled:
+        cache_key = make_cache_key(text, model_name, speaker, language, speaker_wav)
+        if result_cache.fetch(cache_key, output_path):
+            logger.info('Result cache hit', extra={'path': output_path})
+            if progress_callback is not None:
+                progress_callback(1, 1)
+            return
+
+    with use_tts(model_name, gpu) as tts:
+        with stage(tts, 'preprocess'):
+            # Подготавливаем параметры для генерации
+            tts_params = resolve_tts_params(tts, model_name, speaker_wav, language, speaker)
+
+            # Загруженный образец для XTTS регистрируем как голос: при повторной загрузке
+            # того же файла латенты берутся с диска, а не вычисляются заново
+            if not voice_id and speaker_wav and VOICES_AUTO_REGISTER and supports_latents(tts):
+                voice_id = voice_registry.register(speaker_wav)['id']
+            voice_latents = get_voice_latents(tts, model_name, voice_id)
+
+        try:
+            logger.info('Generating audio', extra={
+                'model': model_name, 'chars': len(text), 'params': tts_params, 'voice_id': voice_id
+            })
+
+            if progress_callback is not None or len(text) > PIPELINE_MIN_CHARS:
+                # Длинный текст (или нужен прогресс) - синтез по сегментам на всех доступных устройствах
+                _generate_long(tts, text, model_name, output_path, gpu, tts_params, voice_id, progress_callback)
+            else:
+                # Синтез и запись разделены, чтобы этапы замерялись по отдельности
+                wav = synthesize_text(tts, text, tts_params, voice_latents)
+                with stage(tts, 'write'):
+                    write_wav(output_path, wav, get_output_sample_rate(tts))
+            logger.info('Audio saved', extra={'path': output_path})
+
+            if cache_key:
+                result_cache.store(cache_key, output_path)
+        except Exception as e:
+            ERRORS.inc(kind='generate', reason=type(e).__name__)
+            logger.error('Error generating audio: %s', e, extra={'model': model_name, 'params': tts_params})
+            raise
+
+
+def generate_audio_batch(
+        model_name: str,
+        items: list,
+        gpu: bool = True,
+        language: str = None,
+        speaker: str = None,
+        voice_id: str = None
+) -> list:
+    """
+    Generate several short clips with the same model, speaker and language.
+    @param items: List of dicts with 'text' and 'output_path'.
+    @return: List with None (success) or the exception for every item, in order.
+    """
+    validate_language(model_name, language)
+    speaker_wav = voice_registry.reference_path(voice_id) if voice_id else None
+
+    results = [None] * len(items)
+    pending = []
+    for index, item in enumerate(items):
+        cache_key = None
+        if result_cache.enabled:
+            cache_key = make_cache_key(item['text'], model_name, speaker, language, speaker_wav)
+            if result_cache.fetch(cache_key, item['output_path']):
+                continue
+        pending.append((index, item, cache_key))
+    if not pending:
+        return results
+
+    with use_tts(model_name, gpu) as tts:
+        with stage(tts, 'preprocess'):
+            tts_params = resolve_tts_params(tts, model_name, speaker_wav, language, speaker)
+            voice_latents = get_voice_latents(tts, model_name, voice_id)
+        sample_rate = get_output_sample_rate(tts)
+
+        # Пакетный прогон одним тензором, если модель это поддерживает, иначе - подряд
+        wavs = None
+        if voice_latents is None and len(pending) > 1 and supports_padded_batch(tts, tts_params):
+            try:
+                with stage_timer('inference', **getattr(tts, 'metric_labels', {}), exclude_nested=True):
+                    wavs = padded_batch_inference(tts, [item['text'] for _, item, _ in pending], tts_params)
+                logger.info('Padded batch synthesized', extra={'model': model_name, 'size': len(pending)})
+            except Exception as e:
+                logger.warning('Padded batch failed, falling back to sequential synthesis: %s', e)
+
+        for position, (index, item, cache_key) in enumerate(pending):
+            try:
+                wav = wavs[position] if wavs is not None else synthesize_text(tts, item['text'], tts_params, voice_latents)
+                with stage(tts, 'write'):
+                    write_wav(item['output_path'], wav, sample_rate)
+                if cache_key:
+                    result_cache.store(cache_key, item['output_path'])
+            except Exception as e:
+                ERRORS.inc(kind='batch', reason=type(e).__name__)
+                logger.error('Error generating batch item: %s', e, extra={'path': item['output_path']})
+                results[index] = e
+    return results
+
+
+def get_output_sample_rate(tts) -> int:
+    """Частота дискретизации, с которой модель выдает аудио"""
+    return tts.synthesizer.output_sample_rate
+
+
+def get_voice_latents(tts, model_name: str, voice_id: str = None):
+    """Латенты зарегистрированного голоса, если модель умеет их использовать (XTTS)"""
+    if not voice_id or not supports_latents(tts):
+        return None
+    return voice_registry.get_conditioning(voice_id, tts, model_name)
+
+
+def synthesize_text(tts, text: str, tts_params: dict, voice_latents=None):
+    """
+    Синтезирует фрагмент текста и возвращает сэмплы.
+    С латентами голоса XTTS пропускает кодирование образца и работает только декодер.
+    Время замеряется как этап inference (без вокодера, если он замерен отдельно).
+    """
+    labels = getattr(tts, 'metric_labels', {})
+    with stage_timer('inference', **labels, exclude_nested=True), inference_context(tts):
+        if voice_latents is None:
+            return tts.tts(text=text, **tts_params)
+
+        gpt_cond_latent, speaker_embedding = voice_latents
+        model = tts.synthesizer.tts_model
+        config = model.config
+        # Параметры сэмплирования из конфига модели, как в Xtts.synthesize: голос по voice_id
+        # звучит так же, как тот же образец, загруженный в запрос. Текст уже разбит на сегменты
+        output = model.inference(
+            text,
+            tts_params.get('language'),
+            gpt_cond_latent,
+            speaker_embedding,
+            temperature=config.temperature,
+            length_penalty=config.length_penalty,
+            repetition_penalty=config.repetition_penalty,
+            top_k=config.top_k,
+            top_p=config.top_p
+        )
+        return output['wav']
+
+
+def get_max_segment_chars(tts, language: str = None) -> int:
+    """Максимальная длина сегмента текста для модели (XTTS имеет лимиты по языкам)"""
+    tokenizer = getattr(getattr(tts.synthesizer, 'tts_model', None), 'tokenizer', None)
+    char_limits = getattr(tokenizer, 'char_limits', None)
+    if isinstance(char_limits, dict):
+        return char_limits.get(language or 'en', PIPELINE_MAX_CHARS)
+    return PIPELINE_MAX_CHARS
+
+
+def pipeline_devices(gpu: bool) -> list:
+    """Устройства для параллельного синтеза сегментов (TTS_PIPELINE_DEVICES или все GPU из TTS_DEVICES)"""
+    return env_list('TTS_PIPELINE_DEVICES') or device_scheduler.pipeline_devices(gpu)
+
+
+def _segment_worker(replica, device: str, tts_params: dict, latents):
+    """Синтез сегментов на реплике модели с учетом нагрузки ее устройства"""
+    def work(segment):
+        with device_scheduler.track(device):
+            return synthesize_text(replica, segment, tts_params, latents)
+    return work
+
+
+def _generate_long(tts, text: str, model_name: str, output_path: str, gpu: bool, tts_params: dict, voice_id: str = None, progress_callback=None):
+    """
+    Синтезирует длинный текст по сегментам: сегменты распределяются между
+    репликами модели на доступных устройствах, затем склеиваются с паузами.
+    """
+    with stage(tts, 'preprocess'):
+        segments = segment_text(text, get_max_segment_chars(tts, tts_params.get('language'))) or [(text, True)]
+    texts = [segment for segment, _ in segments]
+
+    # Реплики на других устройствах создаются только там, где хватает памяти, и одного запроса
+    # не должно хватать на то, чтобы вытеснить из пула все остальные модели
+    limit = len(texts)
+    if model_pool.max_models:
+        limit = min(limit, max(1, model_pool.max_models - 1))
+    current = getattr(tts, 'metric_labels', {}).get('device')
+    devices = device_scheduler.replica_devices(model_name, pipeline_devices(gpu), limit, current=current)
+    workers = []
+    for device in devices:
+        replica = tts if device == current else model_pool.get(model_name, device)
+        latents = get_voice_latents(replica, model_name, voice_id)
+        workers.append(_segment_worker(replica, device, tts_params, latents))
+    logger.info('Synthesizing segments', extra={'segments': len(texts), 'devices': devices})
+
+    wavs = run_segments(texts, workers, retries=PIPELINE_RETRIES, progress_callback=progress_callback)
+
+    # Между абзацами пауза длиннее, чем между предложениями
+    gaps_ms = [
+        PIPELINE_PARAGRAPH_SILENCE_MS if paragraph_end else PIPELINE_SILENCE_MS
+        for _, paragraph_end in segments[:-1]
+    ]
+    sample_rate = get_output_sample_rate(tts)
+    with stage(tts, 'write'):
+        write_wav(output_path, concatenate(wavs, sample_rate, crossfade_ms=PIPELINE_CROSSFADE_MS, gaps_ms=gaps_ms), sample_rate)
+
+
+def stream_audio(
+        text: str,
+        model_name: str,
+        gpu: bool = True,
+        speaker_wav: str = None,
+        language: str = None,
+        speaker: str = None,
+        audio_format: str = 'wav',
+        cancel_event=None,
+        voice_id: str = None
+):
+    """
+    Синтезирует текст по предложениям и отдает аудио частями.
+    Первым элементом генератор возвращает частоту дискретизации (int),
+    затем байты: заголовок WAV (для audio_format='wav') и 16-битный PCM каждого предложения.
+    @param audio_format: 'wav' - потоковый WAV, 'pcm' - сырой PCM s16le без заголовка.
+    @param cancel_event: threading.Event; синтез прекращается, когда он установлен.
+    @param voice_id: Id зарегистрированного голоса.
+    """
+    validate_language(model_name, language)
+    if voice_id:
+        speaker_wav = voice_registry.reference_path(voice_id)
+
+    with use_tts(model_name, gpu) as tts:
+        with stage(tts, 'preprocess'):
+            tts_params = resolve_tts_params(tts, model_name, speaker_wav, language, speaker)
+            voice_latents = get_voice_latents(tts, model_name, voice_id)
+            segments = segment_text(text, get_max_segment_chars(tts, language)) or [(text, True)]
+        sample_rate = get_output_sample_rate(tts)
+
+        yield sample_rate
+        if audio_format == 'wav':
+            yield wav_header(sample_rate)
+
+        logger.info('Streaming segments', extra={'model': model_name, 'segments': len(segments)})
+        for sentence, _ in segments:
+            if cancel_event is not None and cancel_event.is_set():
+                logger.info('Streaming cancelled by client')
+                return
+            yield to_pcm16(synthesize_text(tts, sentence, tts_params, voice_latents))
@@ -0,0 +1,181 @@
+import json
+import logging
+import os
+import re
+import shutil
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+
+from services.config import env_bool, env_int
+from services.result_cache import file_digest
+
+logger = logging.getLogger(__name__)
+
+# Версия сохраненных латентов: латенты другой версии вычисляются заново
+LATENTS_VERSION = 2
+
+
+def model_slug(model_name: str) -> str:
+    """Имя модели в виде, пригодном для имени файла"""
+    return re.sub(r'[^A-Za-z0-9_.-]+', '--', model_name)
+
+
+def supports_latents(tts) -> bool:
+    """Умеет ли модель синтезировать по заранее вычисленным латентам голоса (XTTS)"""
+    model = getattr(getattr(tts, 'synthesizer', None), 'tts_model', None)
+    return hasattr(model, 'get_conditioning_latents') and hasattr(model, 'inference')
+
+
+class VoiceRegistry:
+    """
+    Реестр загруженных образцов голоса.
+    Образец хранится один раз (по хэшу содержимого), а латенты XTTS
+    вычисляются один раз на пару (голос, модель) и сохраняются на диск.
+    """
+
+    def __init__(self, directory: str, memory_entries: int = 32):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.memory_entries = memory_entries
+        self._latents = OrderedDict()
+        self._lock = threading.Lock()
+        self._compute_locks = {}
+        self.latent_hits = 0
+        self.latent_misses = 0
+
+    def register(self, src_path: str, name: str = None) -> dict:
+        """Добавляет образец голоса; одинаковые файлы получают один и тот же id"""
+        digest = file_digest(src_path)
+        voice_id = digest[:16]
+        voice_dir = self.directory / voice_id
+        meta_path = voice_dir / 'voice.json'
+
+        with self._lock:
+            if meta_path.exists():
+                return json.loads(meta_path.read_text(encoding='utf-8'))
+
+            voice_dir.mkdir(parents=True, exist_ok=True)
+            reference = voice_dir / f'reference{Path(src_path).suffix.lower() or ".wav"}'
+            shutil.copyfile(src_path, reference)
+            voice = {
+                'id': voice_id,
+                'name': name or voice_id,
+                'digest': digest,
+                'reference': reference.name,
+                'size_bytes': reference.stat().st_size,
+                'created_at': time.time(),
+            }
+            meta_path.write_text(json.dumps(voice, ensure_ascii=False, indent=2), encoding='utf-8')
+            logger.info('Voice registered', extra={'voice_id': voice_id, 'voice_name': voice['name']})
+            return voice
+
+    def get(self, voice_id: str):
+        if not re.fullmatch(r'[0-9a-f]{16}', voice_id or ''):
+            return None
+        meta_path = self.directory / voice_id / 'voice.json'
+        if not meta_path.exists():
+            return None
+        voice = json.loads(meta_path.read_text(encoding='utf-8'))
+        voice['models'] = sorted(p.stem for p in (self.directory / voice_id).glob('*.pt'))
+        return voice
+
+    def list(self) -> list:
+        voices = [self.get(p.name) for p in self.directory.iterdir() if p.is_dir()]
+        return sorted((v for v in voices if v), key=lambda v: v['created_at'], reverse=True)
+
+    def delete(self, voice_id: str) -> bool:
+        if self.get(voice_id) is None:
+            return False
+        with self._lock:
+            for key in [key for key in self._latents if key[0] == voice_id]:
+                del self._latents[key]
+            shutil.rmtree(self.directory / voice_id, ignore_errors=True)
+        return True
+
+    def reference_path(self, voice_id: str) -> str:
+        """Путь к образцу голоса"""
+        voice = self.get(voice_id)
+        if voice is None:
+            raise ValueError(f'Голос {voice_id} не найден')
+        return str(self.directory / voice_id / voice['reference'])
+
+    def get_conditioning(self, voice_id: str, tts, model_name: str):
+        """
+        Возвращает (gpt_cond_latent, speaker_embedding) для голоса и модели XTTS.
+        Порядок поиска: память -> диск -> вычисление по образцу голоса.
+        """
+        import torch
+
+        model = tts.synthesizer.tts_model
+        device = next(model.parameters()).device
+        key = (voice_id, model_name, str(device))
+
+        with self._lock:
+            if key in self._latents:
+                self._latents.move_to_end(key)
+                self.latent_hits += 1
+                return self._latents[key]
+            compute_lock = self._compute_locks.setdefault((voice_id, model_name), threading.Lock())
+
+        # Один голос для одной модели вычисляем только один раз, даже при параллельных запросах
+        with compute_lock:
+            with self._lock:
+                if key in self._latents:
+                    self.latent_hits += 1
+                    return self._latents[key]
+
+            latents_path = self.directory / voice_id / f'{model_slug(model_name)}.pt'
+            data = torch.load(latents_path, map_location=device) if latents_path.exists() else None
+            if data is not None and data.get('version') == LATENTS_VERSION:
+                latents = (data['gpt_cond_latent'], data['speaker_embedding'])
+                with self._lock:
+                    self.latent_hits += 1
+            else:
+                logger.info('Computing conditioning latents', extra={'voice_id': voice_id, 'model': model_name})
+                # Те же параметры, что Xtts.synthesize берет из конфига модели для загруженного образца
+                config = model.config
+                gpt_cond_latent, speaker_embedding = model.get_conditioning_latents(
+                    audio_path=[self.reference_path(voice_id)],
+                    gpt_cond_len=config.gpt_cond_len,
+                    gpt_cond_chunk_len=config.gpt_cond_chunk_len,
+                    max_ref_length=config.max_ref_len,
+                    sound_norm_refs=config.sound_norm_refs
+                )
+                tmp_path = latents_path.with_suffix('.tmp')
+                torch.save(
+                    {'version': LATENTS_VERSION, 'gpt_cond_latent': gpt_cond_latent.cpu(),
+                     'speaker_embedding': speaker_embedding.cpu()},
+                    tmp_path
+                )
+                os.replace(tmp_path, latents_path)
+                latents = (gpt_cond_latent, speaker_embedding)
+                with self._lock:
+                    self.latent_misses += 1
+
+            with self._lock:
+                self._latents[key] = latents
+                while len(self._latents) > self.memory_entries:
+                    self._latents.popitem(last=False)
+            return latents
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                'voices': sum(1 for p in self.directory.iterdir() if p.is_dir()),
+                'latents_in_memory': len(self._latents),
+                'latent_hits': self.latent_hits,
+                'latent_misses': self.latent_misses,
+            }
+
+
+# Общий реестр голосов
+voice_registry = VoiceRegistry(
+    os.environ.get('TTS_VOICES_DIR', 'voices'),
+    memory_entries=env_int('TTS_VOICES_MEMORY', 32)
+)
+
+# Автоматически регистрировать образцы, загруженные вместе с запросом генерации
+# (выключено: такие образцы хранятся в voices/ бессрочно, пока их не удалят через DELETE /voices)
+VOICES_AUTO_REGISTER = env_bool('TTS_VOICES_AUTO_REGISTER', False)
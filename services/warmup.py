@@ -0,0 +1,101 @@
+import logging
+import threading
+import time
+
+from services.config import env_int, env_list
+
+logger = logging.getLogger(__name__)
+
+# Состояния предзагрузки модели
+PENDING = 'pending'
+LOADING = 'loading'
+WARMING = 'warming'
+READY = 'ready'
+FAILED = 'failed'
+
+
+def parse_preload(items: list) -> list:
+    """
+    Разбирает список моделей для предзагрузки вида 'model_name@device'.
+    Без @device модель загружается на GPU, если он доступен.
+    """
+    parsed = []
+    for item in items:
+        model_name, _, device = item.partition('@')
+        parsed.append((model_name.strip(), device.strip() or None))
+    return parsed
+
+
+class Warmup:
+    """
+    Предзагрузка моделей при старте и прогрев пробным синтезом
+    (инициализация CUDA-ядер, JIT и рост аллокатора до первого запроса).
+    """
+
+    def __init__(self, preload: list, load, warm, runs: int = 1):
+        """
+        @param preload: Список (model_name, device или None).
+        @param load: Функция load(model_name, device) -> (tts, device), кладет модель в пул.
+        @param warm: Функция warm(tts, model_name) для пробного синтеза.
+        @param runs: Количество прогревочных прогонов.
+        """
+        self.preload = preload
+        self._load = load
+        self._warm = warm
+        self.runs = runs
+        self._lock = threading.Lock()
+        self._thread = None
+        self.finished = not preload
+        self.models = {
+            model_name: {'device': device, 'state': PENDING, 'error': None,
+                         'load_seconds': None, 'warmup_seconds': None}
+            for model_name, device in preload
+        }
+
+    def start(self):
+        """Запускает предзагрузку в фоне, не задерживая старт веб-сервера"""
+        if self.finished or self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, name='tts-warmup', daemon=True)
+        self._thread.start()
+
+    def is_ready(self) -> bool:
+        """Готов, когда все модели из списка предзагрузки загружены и прогреты"""
+        with self._lock:
+            return self.finished and all(m['state'] == READY for m in self.models.values())
+
+    def status(self) -> dict:
+        with self._lock:
+            return {
+                'finished': self.finished,
+                'models': {name: dict(info) for name, info in self.models.items()},
+            }
+
+    def _update(self, model_name: str, **fields):
+        with self._lock:
+            self.models[model_name].update(fields)
+
+    def _run(self):
+        for model_name, device in self.preload:
+            try:
+                self._update(model_name, state=LOADING)
+                started = time.time()
+                tts, device = self._load(model_name, device)
+                self._update(model_name, state=WARMING, device=device, load_seconds=round(time.time() - started, 3))
+                logger.info('Warming up', extra={'model': model_name, 'device': device})
+
+                started = time.time()
+                for _ in range(self.runs):
+                    self._warm(tts, model_name)
+                self._update(model_name, state=READY, warmup_seconds=round(time.time() - started, 3))
+                logger.info('Model ready', extra={'model': model_name, 'device': device})
+            except Exception as e:
+                logger.error('Preload failed for %s: %s', model_name, e)
+                self._update(model_name, state=FAILED, error=str(e))
+        with self._lock:
+            self.finished = True
+
+
+# Модели для предзагрузки: TTS_PRELOAD="tts_models/en/ljspeech/vits@cpu,tts_models/multilingual/multi-dataset/xtts_v2"
+PRELOAD_MODELS = parse_preload(env_list('TTS_PRELOAD'))
+WARMUP_RUNS = env_int('TTS_WARMUP_RUNS', 1)
@@ -0,0 +1,102 @@
+"""
+Режим нескольких процессов синтеза для CPU.
+
+Основной процесс (веб-сервер) загружает модели один раз, переводит их веса
+в разделяемую память и только после этого запускает процессы синтеза через fork:
+воркеры наследуют уже загруженные модели, поэтому N процессов не занимают
+N копий весов XTTS. Каждый воркер привязан к своей части ядер и использует
+для torch столько потоков, сколько у него ядер.
+"""
+import logging
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from services.config import env_int
+from services.log import configure_logging
+
+logger = logging.getLogger(__name__)
+
+
+def cores_for_worker(index: int, workers: int):
+    """Ядра, закрепленные за воркером с номером index (доступные ядра делятся поровну)"""
+    if not hasattr(os, 'sched_getaffinity'):
+        return None
+    cores = sorted(os.sched_getaffinity(0))
+    per_worker = max(1, len(cores) // workers)
+    start = (index % workers) * per_worker
+    return set(cores[start:start + per_worker] or cores)
+
+
+def share_model_memory(tts) -> int:
+    """Переводит параметры и буферы модели в разделяемую память; возвращает число модулей"""
+    from services.model_pool import _iter_torch_modules
+
+    modules = list(_iter_torch_modules(tts))
+    for module in modules:
+        module.share_memory()
+    return len(modules)
+
+
+def prepare_shared_models(models: list, load):
+    """
+    Загружает модели на CPU в основном процессе до запуска воркеров.
+    @param load: Функция load(model_name, device) -> (tts, device), кладет модель в пул.
+    """
+    for model_name in models:
+        try:
+            tts, _ = load(model_name, 'cpu')
+            share_model_memory(tts)
+            logger.info('Model weights shared with synthesis processes', extra={'model': model_name})
+        except Exception as e:
+            logger.error('Could not share %s with synthesis processes: %s', model_name, e)
+
+
+def init_worker(counter, workers: int, threads: int):
+    """Инициализация процесса синтеза: привязка к ядрам и число потоков torch"""
+    with counter.get_lock():
+        index = counter.value
+        counter.value += 1
+
+    cores = cores_for_worker(index, workers)
+    if cores:
+        os.sched_setaffinity(0, cores)
+    threads = threads or (len(cores) if cores else 1)
+    try:
+        import torch
+        torch.set_num_threads(threads)
+    except ImportError:
+        pass
+
+    # Поток записи логов не наследуется при fork - запускаем его в процессе заново
+    configure_logging(force=True)
+
+    # Процесс уже закреплен за своими ядрами, поэтому внутри него модели работают на обычном 'cpu'
+    from services.tts import device_scheduler
+    device_scheduler.reset(['cpu'])
+    logger.info('Synthesis process started', extra={
+        'worker': index, 'pid': os.getpid(), 'cores': sorted(cores) if cores else 'all', 'threads': threads
+    })
+
+
+def create_process_pool(workers: int, threads: int = 0) -> ProcessPoolExecutor:
+    """
+    Пул процессов синтеза. Используется fork, чтобы воркеры разделяли уже загруженные веса;
+    там, где fork недоступен, каждый воркер загрузит модели сам.
+    """
+    if 'fork' in multiprocessing.get_all_start_methods():
+        context = multiprocessing.get_context('fork')
+    else:
+        logger.warning('fork is not available, synthesis processes will load their own model copies')
+        context = multiprocessing.get_context()
+    counter = context.Value('i', 0)
+    return ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=context,
+        initializer=init_worker,
+        initargs=(counter, workers, threads)
+    )
+
+
+# Потоков torch на процесс синтеза (0 - по числу закрепленных ядер)
+PROCESS_THREADS = env_int('TTS_PROCESS_THREADS', 0)
@@ -0,0 +1,27 @@
+from services.devices import DeviceScheduler
+
+
+def test_gpu_only_config_queues_on_gpu_instead_of_cpu():
+    scheduler = DeviceScheduler(['cuda:0'], replicas=lambda model_name: {'cuda:0': 1})
+
+    with scheduler.lease('xtts', gpu=True) as first:
+        with scheduler.lease('xtts', gpu=True) as second:
+            assert first == second == 'cuda:0'
+
+    assert scheduler.stats()['cpu_fallbacks'] == 0
+
+
+def test_listed_cpu_takes_over_when_gpus_are_busy():
+    scheduler = DeviceScheduler(['cuda:0', 'cpu'], replicas=lambda model_name: {})
+
+    with scheduler.lease('xtts', gpu=True) as first:
+        with scheduler.lease('xtts', gpu=True) as second:
+            assert (first, second) == ('cuda:0', 'cpu')
+
+    assert scheduler.stats()['cpu_fallbacks'] == 1
+
+
+def test_cpu_model_runs_on_cpu_without_cpu_devices():
+    scheduler = DeviceScheduler(['cuda:0'], replicas=lambda model_name: {})
+
+    assert scheduler.select('vits', gpu=False) == 'cpu'